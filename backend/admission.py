@@ -0,0 +1,170 @@
+"""Admission control and load shedding for council runs."""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Optional
+
+from . import metrics
+from .config import (
+    MAX_CONCURRENT_COUNCILS,
+    MAX_QUEUED_COUNCILS,
+    ADMISSION_RETRY_AFTER,
+    ADMISSION_MAX_WAIT,
+)
+
+
+class OverloadedError(Exception):
+    """Raised when a council run cannot be admitted; maps to 503 + Retry-After."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A council run's place in the admission controller: queued or admitted."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._changed = asyncio.Event()
+        self.admitted = False
+        self.released = False
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def position(self) -> int:
+        """1-based position in the wait queue (0 once admitted)."""
+        return self._controller._position(self)
+
+    def _notify(self):
+        self._changed.set()
+
+    async def changed(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the ticket is admitted or its queue position moves.
+
+        Returns:
+            False if `timeout` elapsed first, True otherwise
+        """
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._changed.clear()
+        return True
+
+    def release(self):
+        """Give up the slot, or leave the queue if not admitted yet. Idempotent."""
+        if not self.released:
+            self.released = True
+            self._controller._release(self)
+
+
+class AdmissionController:
+    """
+    Bounds concurrent council runs with a bounded FIFO wait queue.
+
+    Runs beyond `max_concurrent` wait in the queue; once `max_queued` runs
+    are waiting, new ones are rejected immediately with OverloadedError.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, retry_after: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self.max_wait = max_wait
+        self.running = 0
+        self._waiting: Deque[Ticket] = deque()
+
+    def _update_gauges(self):
+        metrics.COUNCILS_RUNNING.set(self.running)
+        metrics.COUNCILS_QUEUED.set(len(self._waiting))
+
+    def _position(self, ticket: Ticket) -> int:
+        if ticket.admitted:
+            return 0
+        try:
+            return self._waiting.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def enter(self) -> Ticket:
+        """
+        Take a slot or a place in the wait queue.
+
+        Raises:
+            OverloadedError: If the wait queue is full
+        """
+        ticket = Ticket(self)
+        if self.running < self.max_concurrent and not self._waiting:
+            ticket.admitted = True
+            self.running += 1
+        elif len(self._waiting) < self.max_queued:
+            self._waiting.append(ticket)
+        else:
+            metrics.COUNCILS_REJECTED.inc(reason="queue_full")
+            raise OverloadedError("Server is at capacity, please retry shortly", self.retry_after)
+        self._update_gauges()
+        return ticket
+
+    def _release(self, ticket: Ticket):
+        if ticket.admitted:
+            self.running -= 1
+        else:
+            try:
+                self._waiting.remove(ticket)
+            except ValueError:
+                pass
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admit waiting runs into free slots and tell the rest their new positions."""
+        while self.running < self.max_concurrent and self._waiting:
+            ticket = self._waiting.popleft()
+            ticket.admitted = True
+            self.running += 1
+            metrics.COUNCIL_QUEUE_WAIT.observe(time.monotonic() - ticket.enqueued_at)
+            ticket._notify()
+        for ticket in self._waiting:
+            ticket._notify()
+        self._update_gauges()
+
+    async def wait(self, ticket: Ticket):
+        """
+        Wait for admission, yielding the queue position whenever it changes.
+
+        Raises:
+            OverloadedError: If the run waited longer than `max_wait`
+        """
+        deadline = ticket.enqueued_at + self.max_wait
+        while not ticket.admitted:
+            yield ticket.position
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await ticket.changed(remaining):
+                if ticket.admitted:
+                    break
+                ticket.release()
+                metrics.COUNCILS_REJECTED.inc(reason="queue_timeout")
+                raise OverloadedError("Timed out waiting for a council slot", self.retry_after)
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a council slot for the duration of the block (waiting if queued)."""
+        ticket = self.enter()
+        try:
+            async for _ in self.wait(ticket):
+                pass
+            yield ticket
+        finally:
+            ticket.release()
+
+
+# Process-wide limiter for council runs (full runs, continues and reruns)
+council_admission = AdmissionController(
+    MAX_CONCURRENT_COUNCILS,
+    MAX_QUEUED_COUNCILS,
+    ADMISSION_RETRY_AFTER,
+    ADMISSION_MAX_WAIT,
+)
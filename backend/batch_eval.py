@@ -0,0 +1,213 @@
+"""Offline batch evaluation: run the council over a JSONL prompt dataset.
+
+Usage:
+    python -m backend.batch_eval prompts.jsonl results.jsonl [--concurrency 8]
+
+Each input line is a JSON object with a "prompt" (or "content") string and an
+optional "id", "council_models" and "chairman_model"; a bare JSON string is
+also accepted. Lines without an "id" are identified by their line number.
+
+Councils run in-process at batch priority, so they go through the same
+upstream dispatcher and concurrency limits as the server, and nothing is
+written to conversation storage. Results are appended to the output file as
+they finish, one JSON object per line. Re-running with the same output file
+skips prompts that already succeeded and retries failed ones; when an id
+appears more than once, its last line wins.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from .council import run_full_council
+from .dispatcher import priority, BATCH
+from .metrics import percentile
+from .openrouter import fetch_available_models, close_http_client, track_usage
+
+
+def read_prompts(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read prompt records from a JSONL file.
+
+    Yields:
+        Dicts with 'id', 'prompt' and optional 'council_models' / 'chairman_model'
+    """
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"prompt": item}
+            prompt = item.get("prompt", item.get("content"))
+            if not isinstance(prompt, str) or not prompt.strip():
+                raise ValueError(f"{path}:{line_number}: missing 'prompt'")
+            yield {
+                "id": str(item.get("id", line_number)),
+                "prompt": prompt,
+                "council_models": item.get("council_models"),
+                "chairman_model": item.get("chairman_model"),
+            }
+
+
+def completed_ids(path: str) -> Set[str]:
+    """
+    Ids that already have a successful result in an existing output file.
+
+    A truncated last line (from an interrupted run) is ignored.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("error"):
+                done.discard(record.get("id"))
+            else:
+                done.add(record.get("id"))
+    return done
+
+
+def _open_output(path: str):
+    """Open the output for appending, terminating a truncated last line first."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    truncated = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            truncated = f.read(1) != b"\n"
+    f = open(path, 'a')
+    if truncated:
+        f.write("\n")
+    return f
+
+
+async def evaluate(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one council and build its output record."""
+    start = time.perf_counter()
+    record: Dict[str, Any] = {"id": item["id"], "prompt": item["prompt"]}
+    with track_usage() as usage:
+        try:
+            stage1, stage2, stage3, metadata = await run_full_council(
+                item["prompt"],
+                item.get("council_models"),
+                item.get("chairman_model"),
+            )
+            record.update({"stage1": stage1, "stage2": stage2, "stage3": stage3, "metadata": metadata})
+            if not stage1:
+                record["error"] = stage3.get("response")
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+    record["duration_s"] = round(time.perf_counter() - start, 3)
+    record["usage"] = dict(usage)
+    return record
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int = 4, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run councils for every pending prompt, appending results as they finish.
+
+    Args:
+        input_path: JSONL prompt file
+        output_path: JSONL results file (appended to; existing successes are skipped)
+        concurrency: Councils running at once
+        limit: Stop after this many pending prompts
+
+    Returns:
+        Summary with counts, throughput, latency percentiles, tokens and cost
+    """
+    done = completed_ids(output_path)
+    pending: List[Dict[str, Any]] = []
+    skipped = 0
+    for item in read_prompts(input_path):
+        if item["id"] in done:
+            skipped += 1
+            continue
+        pending.append(item)
+        if limit is not None and len(pending) >= limit:
+            break
+
+    # Catalog pricing is the cost fallback when the upstream reports none
+    await fetch_available_models()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+
+    durations: List[float] = []
+    totals = {"ok": 0, "failed": 0, "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+    start = time.perf_counter()
+
+    with _open_output(output_path) as out:
+        def write(record: Dict[str, Any]):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            totals["failed" if record.get("error") else "ok"] += 1
+            for key in ("calls", "prompt_tokens", "completion_tokens", "cost"):
+                totals[key] += record["usage"][key]
+            durations.append(record["duration_s"])
+            finished = totals["ok"] + totals["failed"]
+            print(f"[{finished}/{len(pending)}] {record['id']}: "
+                  f"{'error: ' + str(record['error']) if record.get('error') else 'ok'} "
+                  f"({record['duration_s']:.1f}s)", file=sys.stderr)
+
+        async def worker():
+            while not queue.empty():
+                write(await evaluate(queue.get_nowait()))
+
+        with priority(BATCH):
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    elapsed = time.perf_counter() - start
+    completed = totals["ok"] + totals["failed"]
+    return {
+        "pending": len(pending),
+        "skipped": skipped,
+        "ok": totals["ok"],
+        "failed": totals["failed"],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_min": round(completed / elapsed * 60, 2) if elapsed > 0 else None,
+        "latency_p50_s": percentile(durations, 50),
+        "latency_p95_s": percentile(durations, 95),
+        "llm_calls": totals["calls"],
+        "prompt_tokens": totals["prompt_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "cost_usd": round(totals["cost"], 6),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the LLM council over a JSONL prompt dataset")
+    parser.add_argument("input", help="JSONL file of prompts")
+    parser.add_argument("output", help="JSONL file results are appended to (resumed if it exists)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Councils running at once")
+    parser.add_argument("--limit", type=int, default=None, help="Only run this many pending prompts")
+    parser.add_argument("--summary", default=None, help="Also write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    async def run() -> Dict[str, Any]:
+        try:
+            return await run_batch(args.input, args.output, args.concurrency, args.limit)
+        finally:
+            await close_http_client()
+
+    summary = asyncio.run(run())
+    print(json.dumps(summary, indent=2))
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
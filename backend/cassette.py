@@ -0,0 +1,265 @@
+"""Record/replay cassettes for upstream HTTP traffic.
+
+With CASSETTE_MODE=record, every request made through the shared OpenRouter
+client is forwarded upstream and the response (status, content type, every
+body chunk with its arrival time, or the error it failed with) is appended to
+CASSETTE_PATH as one compact JSON line. With CASSETTE_MODE=replay, nothing
+goes to the network: responses are served from the cassette, either with the
+recorded chunk timings (CASSETTE_TIMING=original) or as fast as possible
+(CASSETTE_TIMING=fast).
+
+Replay matches a request on method, URL and request body. When the body
+differs (e.g. a benchmark using other prompts), it falls back to the
+recordings for the same model, then the same URL, so the traffic shape is
+preserved. Recordings for a key are reused round-robin. Request headers,
+including the API key, are never recorded.
+
+Recording asks upstream for uncompressed responses so the chunks are stored
+as readable text; a response that comes back compressed anyway is stored as
+base64 with its content encoding, and replayed with it.
+"""
+
+import asyncio
+import base64
+import codecs
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from .config import CASSETTE_MODE, CASSETTE_PATH, CASSETTE_TIMING
+
+
+def _body_fields(request: httpx.Request) -> Tuple[str, Optional[str]]:
+    """Canonical hash of the request body, plus the model it targets (if JSON)."""
+    body = request.content or b""
+    model = None
+    try:
+        payload = json.loads(body) if body else None
+        if isinstance(payload, dict):
+            model = payload.get("model")
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    except (ValueError, UnicodeDecodeError):
+        canonical = body
+    return hashlib.sha256(canonical).hexdigest()[:16], model
+
+
+def _error_kind(error: Exception) -> str:
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    return "connect"
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Pass response chunks through while timing them; writes the interaction when closed."""
+
+    def __init__(self, inner: httpx.AsyncByteStream, interaction: Dict[str, Any], start: float, cassette: "Cassette"):
+        self._inner = inner
+        self._interaction = interaction
+        self._start = start
+        self._cassette = cassette
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._binary = interaction["response"].get("body_encoding") == "base64"
+        self._written = False
+
+    def _encode(self, chunk: bytes) -> str:
+        if self._binary:
+            return base64.b64encode(chunk).decode("ascii")
+        return self._decoder.decode(chunk)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks = self._interaction["response"]["chunks"]
+        try:
+            async for chunk in self._inner:
+                chunks.append([round((time.perf_counter() - self._start) * 1000, 2), self._encode(chunk)])
+                yield chunk
+        except Exception as e:
+            self._interaction["response"]["error"] = _error_kind(e)
+            raise
+
+    async def aclose(self):
+        try:
+            await self._inner.aclose()
+        finally:
+            if not self._written:
+                self._written = True
+                self._cassette.append(self._interaction)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forwards requests to `inner` and records them to a cassette."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, cassette: "Cassette"):
+        self._inner = inner
+        self._cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body_hash, model = _body_fields(request)
+        interaction: Dict[str, Any] = {
+            "request": {"method": request.method, "url": str(request.url), "body": body_hash, "model": model},
+            "response": {"status": None, "content_type": None, "chunks": []},
+        }
+        # Uncompressed bodies can be stored as text (httpx asks for gzip by default)
+        request.headers["Accept-Encoding"] = "identity"
+        start = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception as e:
+            interaction["response"]["error"] = _error_kind(e)
+            interaction["response"]["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self._cassette.append(interaction)
+            raise
+        interaction["response"]["status"] = response.status_code
+        interaction["response"]["content_type"] = response.headers.get("content-type")
+        content_encoding = response.headers.get("content-encoding", "identity").strip().lower()
+        if content_encoding != "identity":
+            # The server compressed anyway: keep the raw bytes and the encoding to replay them
+            interaction["response"]["content_encoding"] = content_encoding
+            interaction["response"]["body_encoding"] = "base64"
+        interaction["response"]["headers_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, interaction, start, self._cassette),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    """Yields recorded chunks, optionally at their recorded offsets."""
+
+    def __init__(self, request: httpx.Request, response: Dict[str, Any], start: float, realtime: bool):
+        self._request = request
+        self._response = response
+        self._start = start
+        self._realtime = realtime
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for offset_ms, text in self._response["chunks"]:
+            if self._realtime:
+                delay = self._start + offset_ms / 1000 - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if self._response.get("body_encoding") == "base64":
+                yield base64.b64decode(text)
+            else:
+                yield text.encode("utf-8")
+        if self._response.get("error"):
+            raise _replayed_error(self._response["error"], self._request)
+
+
+def _replayed_error(kind: str, request: httpx.Request) -> Exception:
+    if kind == "timeout":
+        return httpx.ReadTimeout("Replayed timeout", request=request)
+    return httpx.ConnectError("Replayed connection error", request=request)
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves responses from a cassette without touching the network."""
+
+    def __init__(self, cassette: "Cassette", realtime: bool = True):
+        self._realtime = realtime
+        self._by_body: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self._by_model: Dict[Tuple[str, str, Optional[str]], List[Dict[str, Any]]] = defaultdict(list)
+        self._by_url: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self._next: Dict[Tuple, int] = defaultdict(int)
+        for interaction in cassette.load():
+            req = interaction["request"]
+            self._by_body[(req["method"], req["url"], req["body"])].append(interaction)
+            self._by_model[(req["method"], req["url"], req.get("model"))].append(interaction)
+            self._by_url[(req["method"], req["url"])].append(interaction)
+
+    def _match(self, request: httpx.Request) -> Optional[Dict[str, Any]]:
+        body_hash, model = _body_fields(request)
+        method, url = request.method, str(request.url)
+        for index, key in (
+            (self._by_body, (method, url, body_hash)),
+            (self._by_model, (method, url, model)),
+            (self._by_url, (method, url)),
+        ):
+            recordings = index.get(key)
+            if recordings:
+                position = self._next[key]
+                self._next[key] = position + 1
+                return recordings[position % len(recordings)]
+        return None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        interaction = self._match(request)
+        if interaction is None:
+            raise httpx.ConnectError(f"No cassette recording for {request.method} {request.url}", request=request)
+        response = interaction["response"]
+        if self._realtime:
+            delay = (response.get("headers_ms") or response.get("elapsed_ms") or 0) / 1000
+            await asyncio.sleep(delay)
+        if response.get("status") is None:
+            raise _replayed_error(response.get("error", "connect"), request)
+        headers = {"content-type": response["content_type"]} if response.get("content_type") else {}
+        if response.get("content_encoding"):
+            headers["content-encoding"] = response["content_encoding"]
+        return httpx.Response(
+            status_code=response["status"],
+            headers=headers,
+            stream=_ReplayStream(request, response, start, self._realtime),
+            request=request,
+        )
+
+
+class Cassette:
+    """A JSON Lines file of recorded interactions."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, interaction: Dict[str, Any]):
+        line = json.dumps(interaction, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(line + "\n")
+
+    def load(self) -> List[Dict[str, Any]]:
+        interactions = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    interactions.append(json.loads(line))
+        return interactions
+
+
+def wrap_transport(
+    transport: httpx.AsyncBaseTransport,
+    mode: str = CASSETTE_MODE,
+    path: str = CASSETTE_PATH,
+    timing: str = CASSETTE_TIMING,
+) -> httpx.AsyncBaseTransport:
+    """
+    Wrap the upstream transport according to the cassette settings.
+
+    Args:
+        transport: Real network transport
+        mode: "off", "record" or "replay"
+        path: Cassette file
+        timing: "original" or "fast" (replay only)
+    """
+    mode = (mode or "off").strip().lower()
+    if mode == "record":
+        return RecordingTransport(transport, Cassette(path))
+    if mode == "replay":
+        return ReplayTransport(Cassette(path), realtime=(timing or "original").strip().lower() != "fast")
+    if mode == "off":
+        return transport
+    raise ValueError(f"Unknown CASSETTE_MODE: {mode}")
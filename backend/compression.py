@@ -0,0 +1,73 @@
+"""HTTP response compression.
+
+Starlette's GZipMiddleware compresses large responses for clients accepting
+gzip (SSE streams are left alone). When the optional `brotli` package is
+installed, BrotliMiddleware runs inside it and compresses complete responses
+for clients accepting br; the gzip layer then passes them through untouched.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class BrotliMiddleware:
+    """
+    ASGI middleware brotli-compressing single-message responses.
+
+    Streamed (multi-chunk) bodies and already-encoded responses are passed
+    through, so SSE endpoints keep flushing event by event.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or "br" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def compressing_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body shows whether to compress
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and len(body) >= self.minimum_size
+            ):
+                body = brotli.compress(body, quality=self.quality)
+                headers["Content-Encoding"] = "br"
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(start_message)
+            start_message = None
+            await send(message)
+
+        await self.app(scope, receive, compressing_send)
+
+
+def add_compression(app, minimum_size: int):
+    """Install response compression on a Starlette/FastAPI app."""
+    if brotli is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=minimum_size)
+    # Added last so it wraps BrotliMiddleware and skips br-encoded responses
+    app.add_middleware(GZipMiddleware, minimum_size=minimum_size, compresslevel=6)
@@ -1,5 +1,6 @@
 """Configuration for the LLM Council."""
 
+import json
 import os
 from dotenv import load_dotenv
 
@@ -22,8 +23,123 @@ COUNCIL_MODELS = [
 # Chairman model - synthesizes final response
 CHAIRMAN_MODEL = "openai/gpt-5.1-chat"#"google/gemini-3-pro-preview"
 
-# OpenRouter API endpoint
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Council member selection: "static" queries every member; "adaptive" uses the
+# members' recorded latency, failure rate, cost and leaderboard standing to skip
+# or hold back members, querying held-back ones only if fewer than COUNCIL_QUORUM
+# members answer. Budgets apply to the Stage 1 fan-out (0 = no cost budget).
+COUNCIL_SELECTION = os.getenv("COUNCIL_SELECTION", "static").lower()
+COUNCIL_QUORUM = int(os.getenv("COUNCIL_QUORUM", "2"))
+COUNCIL_LATENCY_BUDGET = float(os.getenv("COUNCIL_LATENCY_BUDGET", "60"))
+COUNCIL_COST_BUDGET = float(os.getenv("COUNCIL_COST_BUDGET", "0"))
+COUNCIL_MAX_FAILURE_RATE = float(os.getenv("COUNCIL_MAX_FAILURE_RATE", "0.5"))
+# Members rated this far below the average (Elo-like leaderboard scale) are held back
+COUNCIL_ELO_MARGIN = float(os.getenv("COUNCIL_ELO_MARGIN", "200"))
+# Calls observed before a member's stats are trusted (until then it is always queried)
+COUNCIL_MIN_CALLS = int(os.getenv("COUNCIL_MIN_CALLS", "5"))
+
+# Near-duplicate Stage 1 responses (estimated word-shingle Jaccard similarity at
+# or above the threshold) are shown to rankers and the chairman only once (opt-in)
+STAGE1_DEDUP = os.getenv("STAGE1_DEDUP", "0").lower() not in ("0", "false", "no")
+STAGE1_DEDUP_THRESHOLD = float(os.getenv("STAGE1_DEDUP_THRESHOLD", "0.8"))
+
+# Stage 2 design: "full" (every ranker ranks every response), "sparse" (each
+# ranker ranks STAGE2_SUBSET_SIZE responses; rankings are combined with
+# Bradley-Terry) or "auto" (sparse once Stage 1 has more than
+# STAGE2_SPARSE_THRESHOLD responses)
+STAGE2_MODE = os.getenv("STAGE2_MODE", "full").lower()
+STAGE2_SUBSET_SIZE = int(os.getenv("STAGE2_SUBSET_SIZE", "4"))
+STAGE2_SPARSE_THRESHOLD = int(os.getenv("STAGE2_SPARSE_THRESHOLD", "8"))
+
+# Speculative Stage 3: start the chairman before every ranker has answered, once
+# the top STAGE3_CONSENSUS_TOP_K places of the partial aggregate can no longer
+# change, or once rankers agreeing on them make up STAGE3_CONSENSUS_THRESHOLD of
+# all rankers. Rankings arriving later are still stored with the message.
+STAGE3_SPECULATIVE = os.getenv("STAGE3_SPECULATIVE", "0").lower() not in ("0", "false", "no")
+STAGE3_CONSENSUS_TOP_K = int(os.getenv("STAGE3_CONSENSUS_TOP_K", "1"))
+STAGE3_CONSENSUS_THRESHOLD = float(os.getenv("STAGE3_CONSENSUS_THRESHOLD", "0.75"))
+
+# Multi-turn context: earlier questions and final answers sent with each new
+# question, newest first, within HISTORY_TOKEN_BUDGET estimated tokens (0 = no
+# history). Older turns are folded into a rolling summary written by
+# HISTORY_SUMMARY_MODEL once per completed turn and cached in the conversation.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+HISTORY_SUMMARY_MODEL = os.getenv("HISTORY_SUMMARY_MODEL", "google/gemini-2.5-flash")
+
+# Generation settings (max_tokens, temperature, reasoning_effort, stop) per stage
+# and per model, as JSON; see backend.generation for the layout. Conversations can
+# override them. Example: {"stage1": {"max_tokens": 1500}, "stage2": {"max_tokens": 800},
+# "models": {"x-ai/grok-4.1-fast": {"reasoning_effort": "low"}}}
+GENERATION_PARAMS = json.loads(os.getenv("GENERATION_PARAMS", "{}"))
+
+# OpenRouter API endpoint (override to point at a compatible server, e.g. backend.mock_openrouter)
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# OpenRouter model catalog endpoint (defaults to the sibling of OPENROUTER_API_URL)
+OPENROUTER_MODELS_URL = os.getenv(
+    "OPENROUTER_MODELS_URL",
+    OPENROUTER_API_URL.rsplit("/chat/completions", 1)[0] + "/models",
+)
+
+# Shared upstream connection pool
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# Further OpenAI-compatible providers (vLLM, Ollama, llama.cpp, ...), as JSON keyed
+# by name. Model ids starting with a provider's prefix (default "<name>/") go to
+# its base_url instead of OpenRouter; see backend.openrouter.Provider. Example:
+# {"local": {"base_url": "http://127.0.0.1:8000/v1", "api_key_env": "LOCAL_API_KEY"}}
+PROVIDERS = json.loads(os.getenv("PROVIDERS", "{}"))
+
+# Upstream calls in flight at once, and the share each priority class may use
+# (interactive calls also go ahead of queued batch calls)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_INTERACTIVE_MAX_CONCURRENCY = int(os.getenv("LLM_INTERACTIVE_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+LLM_BATCH_MAX_CONCURRENCY = int(os.getenv("LLM_BATCH_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY // 2)))
+
+# Record/replay of upstream traffic: CASSETTE_MODE is "off", "record" or "replay";
+# replay follows the recorded timings unless CASSETTE_TIMING is "fast"
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "data/cassette.jsonl")
+CASSETTE_TIMING = os.getenv("CASSETTE_TIMING", "original")
+
+# Connections to the LLM endpoint opened during startup warm-up
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "4"))
+
+# Persisted model catalog (loaded at startup, refreshed in the background once stale)
+MODEL_CATALOG_PATH = os.getenv("MODEL_CATALOG_PATH", "data/models.json")
+MODEL_CATALOG_TTL = int(os.getenv("MODEL_CATALOG_TTL", str(24 * 60 * 60)))
 
 # Data directory for conversation storage
-DATA_DIR = "data/conversations"
+DATA_DIR = os.getenv("DATA_DIR", "data/conversations")
+
+# Responses at least this large are gzip/brotli-compressed for clients that accept it
+HTTP_COMPRESSION_MIN_BYTES = int(os.getenv("HTTP_COMPRESSION_MIN_BYTES", "1024"))
+
+# Full-text search index (SQLite FTS5), kept in sync by the storage write paths
+SEARCH_ENABLED = os.getenv("SEARCH_ENABLED", "1").lower() not in ("0", "false", "no")
+SEARCH_DB_PATH = os.getenv("SEARCH_DB_PATH", os.path.join(DATA_DIR, "search.sqlite3"))
+
+# Running model leaderboard built from Stage 2 rankings
+LEADERBOARD_DB_PATH = os.getenv("LEADERBOARD_DB_PATH", os.path.join(DATA_DIR, "leaderboard.sqlite3"))
+
+# Per-model latency/failure/cost averages used by adaptive selection (only
+# recorded with COUNCIL_SELECTION=adaptive)
+MODEL_STATS_PATH = os.getenv("MODEL_STATS_PATH", os.path.join(DATA_DIR, "model_stats.json"))
+MODEL_STATS_FLUSH_INTERVAL = float(os.getenv("MODEL_STATS_FLUSH_INTERVAL", "30"))
+
+# Compression of long stage texts in stored conversations: "none", "gzip" or "zstd"
+# (zstd needs the zstandard package); texts shorter than the minimum stay plain
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "none")
+STORAGE_COMPRESSION_MIN_BYTES = int(os.getenv("STORAGE_COMPRESSION_MIN_BYTES", "1024"))
+
+# Tracing exporter: "none", "memory" or "jsonl" (spans appended to TRACE_FILE)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_FILE = os.getenv("TRACE_FILE", "data/traces.jsonl")
+
+# Admission control: council runs (full runs, continues and reruns) allowed at once,
+# runs allowed to wait for a slot, and how long they may wait before being shed
+MAX_CONCURRENT_COUNCILS = int(os.getenv("MAX_CONCURRENT_COUNCILS", "8"))
+MAX_QUEUED_COUNCILS = int(os.getenv("MAX_QUEUED_COUNCILS", "32"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "60"))
+# Retry-After (seconds) sent with 503 responses when a run is shed
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
@@ -1,87 +1,243 @@
 """3-stage LLM Council orchestration."""
 
-from typing import List, Dict, Any, Tuple
-from .openrouter import query_models_parallel, query_model
-from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
+import asyncio
+from typing import List, Dict, Any, Tuple, Callable, Iterable
+from .openrouter import query_models_parallel, query_model, query_model_stream
+from .config import (
+    COUNCIL_MODELS,
+    CHAIRMAN_MODEL,
+    COUNCIL_SELECTION,
+    STAGE1_DEDUP,
+    STAGE1_DEDUP_THRESHOLD,
+    STAGE2_MODE,
+    STAGE2_SUBSET_SIZE,
+    STAGE2_SPARSE_THRESHOLD,
+    STAGE3_SPECULATIVE,
+    STAGE3_CONSENSUS_TOP_K,
+    STAGE3_CONSENSUS_THRESHOLD,
+)
+from .ranking import bradley_terry, pairwise_wins, sparse_design, top_k_settled
+from .selection import plan_council
+from . import dedup, generation, metrics, tracing
+
+
+def _stage(name: str):
+    """Record a duration metric and a 'council.<name>' trace span for a stage function."""
+    def decorator(fn):
+        return metrics.timed(metrics.STAGE_DURATION, stage=name)(tracing.traced(f"council.{name}")(fn))
+    return decorator
+
+
+def _stage_params(stage: str, models: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Generation settings for each model's call in a stage."""
+    return {model: generation.params(stage, model) for model in models}
+
+
+def _truncated(response: Dict[str, Any]) -> bool:
+    """Whether a response was cut off by its max_tokens setting."""
+    return response.get('finish_reason') == 'length'
+
+
+async def query_models_with_events(
+    models: List[str],
+    messages: List[Dict[str, str]] | Dict[str, List[Dict[str, str]]],
+    stage: str,
+    on_event: Callable[[Dict[str, Any]], None],
+) -> Dict[str, Any]:
+    """
+    Query multiple models in parallel with streaming, reporting progress.
 
+    Emits '<stage>_model_start', '<stage>_model_delta' and
+    '<stage>_model_complete' events through `on_event`.
 
-async def stage1_collect_responses(user_query: str, models_override: List[str] | None = None) -> List[Dict[str, Any]]:
+    Args:
+        models: List of OpenRouter model identifiers
+        messages: List of message dicts to send to each model, or such a
+            list per model
+        stage: Stage name used as the event type prefix (e.g. "stage2")
+        on_event: Callback receiving event dicts
+
+    Returns:
+        Dict mapping model identifier to response dict (or None if failed)
+    """
+    async def run(model: str):
+        on_event({"type": f"{stage}_model_start", "model": model})
+        response = await query_model_stream(
+            model,
+            messages[model] if isinstance(messages, dict) else messages,
+            lambda delta: on_event({"type": f"{stage}_model_delta", "model": model, "delta": delta}),
+            params=generation.params(stage, model),
+            stage=stage,
+        )
+        on_event({"type": f"{stage}_model_complete", "model": model, "ok": response is not None})
+        return response
+
+    responses = await asyncio.gather(*[run(model) for model in models])
+    return {model: response for model, response in zip(models, responses)}
+
+
+@_stage("stage1")
+async def stage1_collect_responses(
+    user_query: str,
+    models_override: List[str] | None = None,
+    selection: Dict[str, Any] | None = None,
+    history: List[Dict[str, str]] | None = None,
+) -> List[Dict[str, Any]]:
     """
     Stage 1: Collect individual responses from all council models.
 
+    With COUNCIL_SELECTION=adaptive only the members picked by
+    backend.selection are queried up front; held-back members are called
+    only while fewer than the quorum have answered.
+
     Args:
         user_query: The user's question
+        models_override: Optional list of council models (defaults to COUNCIL_MODELS)
+        selection: Optional dict filled with the adaptive selection record
+        history: Optional earlier turns sent before the question (see backend.history)
 
     Returns:
-        List of dicts with 'model' and 'response' keys
+        List of dicts with 'model' and 'response' keys ('truncated' is set
+        when a response hit its max_tokens setting)
     """
-    messages = [{"role": "user", "content": user_query}]
+    messages = [*(history or []), {"role": "user", "content": user_query}]
 
     models = models_override if models_override is not None and len(models_override) > 0 else COUNCIL_MODELS
     models = [m for m in models if isinstance(m, str) and m.strip()]
-    responses = await query_models_parallel(models, messages)
+    plan = plan_council(models)
+    if plan is None:
+        responses = await query_models_parallel(models, messages, _stage_params("stage1", models), stage="stage1")
+    else:
+        responses = await query_models_parallel(plan.primary, messages, _stage_params("stage1", plan.primary), stage="stage1")
+        reserve = list(plan.reserve)
+        while reserve:
+            missing = plan.quorum - sum(1 for r in responses.values() if r is not None)
+            if missing <= 0:
+                break
+            batch, reserve = reserve[:missing], reserve[missing:]
+            plan.reserve_used.extend(batch)
+            responses.update(await query_models_parallel(batch, messages, _stage_params("stage1", batch), stage="stage1"))
+        # Keep the configured order so labels stay stable
+        responses = {m: responses[m] for m in models if m in responses}
+        if selection is not None:
+            selection.update(plan.record())
 
     # Format results
     stage1_results = []
     for model, response in responses.items():
         if response is not None:  # Only include successful responses
-            stage1_results.append({
+            result = {
                 "model": model,
                 "response": response.get('content', '')
-            })
+            }
+            if _truncated(response):
+                result["truncated"] = True
+            stage1_results.append(result)
 
     return stage1_results
 
 
-async def run_stage1_for_model(user_query: str, model_name: str) -> Dict[str, Any]:
+@_stage("stage1_model")
+async def run_stage1_for_model(
+    user_query: str,
+    model_name: str,
+    history: List[Dict[str, str]] | None = None,
+) -> Dict[str, Any]:
     """
     Run Stage 1 for a single model.
 
     Args:
         user_query: The user's question
         model_name: Model identifier to query
+        history: Optional earlier turns sent before the question
 
     Returns:
         Dict with 'model' and 'response' keys (empty response if failure)
     """
-    messages = [{"role": "user", "content": user_query}]
-    response = await query_model(model_name, messages)
+    messages = [*(history or []), {"role": "user", "content": user_query}]
+    response = await query_model(model_name, messages, params=generation.params("stage1", model_name), stage="stage1")
     if response is None:
         return {"model": model_name, "response": ""}
-    return {"model": model_name, "response": response.get("content", "")}
+    result = {"model": model_name, "response": response.get("content", "")}
+    if _truncated(response):
+        result["truncated"] = True
+    return result
 
 
-async def stage2_collect_rankings(
-    user_query: str,
-    stage1_results: List[Dict[str, Any]],
-    models_override: List[str] | None = None,
-) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
-    """
-    Stage 2: Each model ranks the anonymized responses.
+def _stage2_label(index: int) -> str:
+    return f"Response {chr(65 + index)}"  # A, B, C, ...
 
-    Args:
-        user_query: The original user query
-        stage1_results: Results from Stage 1
+
+def collapse_stage1(stage1_results: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[List[str]]]:
+    """
+    Collapse near-duplicate Stage 1 responses (see STAGE1_DEDUP).
 
     Returns:
-        Tuple of (rankings list, label_to_model mapping)
+        Tuple of (one representative result per group, the models of each
+        group with the representative first)
     """
-    # Create anonymized labels for responses (Response A, Response B, etc.)
-    labels = [chr(65 + i) for i in range(len(stage1_results))]  # A, B, C, ...
+    if not STAGE1_DEDUP or len(stage1_results) < 2:
+        return list(stage1_results), [[result['model']] for result in stage1_results]
+    clusters = dedup.cluster([result.get('response') or '' for result in stage1_results], STAGE1_DEDUP_THRESHOLD)
+    representatives = [stage1_results[c[0]] for c in clusters]
+    return representatives, [[stage1_results[i]['model'] for i in c] for c in clusters]
 
-    # Create mapping from label to model name
-    label_to_model = {
-        f"Response {label}": result['model']
-        for label, result in zip(labels, stage1_results)
-    }
 
-    # Build the ranking prompt
+def plain_label_to_model(stage1_results: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Labels as assigned before near-duplicate grouping: one per Stage 1 response, in order.
+
+    Messages stored without 'label_to_model' metadata were ranked under these.
+    """
+    return {_stage2_label(i): result['model'] for i, result in enumerate(stage1_results)}
+
+
+def _ranked_groups(
+    stage1_results: List[Dict[str, Any]],
+    label_to_model: Dict[str, str | List[str]] | None,
+) -> Tuple[List[Dict[str, Any]], List[List[str]]]:
+    """Stage 1 groups under the labels of an earlier Stage 2, or collapsed afresh (see collapse_stage1)."""
+    if label_to_model:
+        by_model = {result['model']: result for result in stage1_results}
+        labels = [_stage2_label(i) for i in range(len(label_to_model))]
+        if all(label in label_to_model for label in labels):
+            members = [label_models(label_to_model[label]) for label in labels]
+            if all(m and m[0] in by_model for m in members):
+                return [by_model[m[0]] for m in members], members
+    return collapse_stage1(stage1_results)
+
+
+def label_models(value: str | List[str]) -> List[str]:
+    """Models behind a label_to_model value."""
+    return value if isinstance(value, list) else [value]
+
+
+def _ranking_prompt(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    indices: Iterable[int],
+    with_example: bool = True,
+) -> str:
+    """Build the Stage 2 prompt for the responses at `indices` (labels stay global)."""
     responses_text = "\n\n".join([
-        f"Response {label}:\n{result['response']}"
-        for label, result in zip(labels, stage1_results)
+        f"{_stage2_label(i)}:\n{stage1_results[i]['response']}"
+        for i in indices
     ])
 
-    ranking_prompt = f"""You are evaluating different responses to the following question:
+    example = """
+
+Example of the correct format for your ENTIRE response:
+
+Response A provides good detail on X but misses Y...
+Response B is accurate but lacks depth on Z...
+Response C offers the most comprehensive answer...
+
+FINAL RANKING:
+1. Response C
+2. Response A
+3. Response B""" if with_example else ""
+
+    return f"""You are evaluating different responses to the following question:
 
 Question: {user_query}
 
@@ -97,100 +253,176 @@ IMPORTANT: Your final ranking MUST be formatted EXACTLY as follows:
 - Start with the line "FINAL RANKING:" (all caps, with colon)
 - Then list the responses from best to worst as a numbered list
 - Each line should be: number, period, space, then ONLY the response label (e.g., "1. Response A")
-- Do not add any other text or explanations in the ranking section
+- Do not add any other text or explanations in the ranking section{example}
 
-Example of the correct format for your ENTIRE response:
+Now provide your evaluation and ranking:"""
 
-Response A provides good detail on X but misses Y...
-Response B is accurate but lacks depth on Z...
-Response C offers the most comprehensive answer...
 
-FINAL RANKING:
-1. Response C
-2. Response A
-3. Response B
+def stage2_subsets(
+    user_query: str,
+    members: List[List[str]],
+    models: List[str],
+) -> Dict[str, List[int]] | None:
+    """
+    Choose which responses each ranker sees, per STAGE2_MODE.
 
-Now provide your evaluation and ranking:"""
+    Args:
+        members: Models behind each (collapsed) response
+
+    Returns:
+        Response indices per ranking model, or None when every ranker ranks
+        every response
+    """
+    n = len(members)
+    subset_size = max(2, STAGE2_SUBSET_SIZE)
+    if STAGE2_MODE == "full" or subset_size >= n:
+        return None
+    if STAGE2_MODE == "auto" and n <= STAGE2_SPARSE_THRESHOLD:
+        return None
+    own = {model: i for i, group in enumerate(members) for model in group}
+    # Seeded by the query so reruns of a message see the same design
+    return sparse_design(n, models, subset_size, own, seed=user_query)
+
+
+@_stage("stage2")
+async def stage2_collect_rankings(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    models_override: List[str] | None = None,
+    on_event: Callable[[Dict[str, Any]], None] | None = None,
+    on_ranking: Callable[[List[Dict[str, Any]], Dict[str, str | List[str]], int], None] | None = None,
+    history: List[Dict[str, str]] | None = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, str | List[str]]]:
+    """
+    Stage 2: Each model ranks the anonymized responses.
 
-    messages = [{"role": "user", "content": ranking_prompt}]
+    Near-duplicate responses are shown once (see collapse_stage1). In sparse
+    mode (see STAGE2_MODE) each model ranks only a subset of the responses,
+    recorded in its entry's 'subset', so Stage 2 input grows linearly with
+    council size instead of quadratically.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Results from Stage 1
+        models_override: Optional list of ranking models (defaults to COUNCIL_MODELS)
+        on_event: Optional callback; when given, rankers are streamed and
+            per-model progress events are emitted
+        on_ranking: Optional callback invoked as each ranker finishes, with
+            the rankings received so far, label_to_model and the number of
+            rankers still outstanding
+        history: Optional earlier turns sent before the ranking prompt
+
+    Returns:
+        Tuple of (rankings list, label_to_model mapping)
+    """
+    # Create mapping from anonymized labels (Response A, Response B, etc.) to model names
+    representatives, members = collapse_stage1(stage1_results)
+    label_to_model = {_stage2_label(i): m[0] if len(m) == 1 else m for i, m in enumerate(members)}
 
     models = models_override if models_override is not None and len(models_override) > 0 else COUNCIL_MODELS
     models = [m for m in models if isinstance(m, str) and m.strip()]
-    responses = await query_models_parallel(models, messages)
-
-    # Format results
-    stage2_results = []
-    for model, response in responses.items():
+    if COUNCIL_SELECTION == "adaptive":
+        # Members skipped (or failed) in Stage 1 do not rank either
+        answered = {result['model'] for result in stage1_results}
+        models = [m for m in models if m in answered] or models
+
+    subsets = stage2_subsets(user_query, members, models)
+    if subsets is None:
+        # Build the ranking prompt once; every ranker gets all responses
+        shared = [*(history or []), {"role": "user", "content": _ranking_prompt(user_query, representatives, range(len(representatives)))}]
+        messages = {model: shared for model in models}
+    else:
+        messages = {
+            model: [*(history or []), {"role": "user", "content": _ranking_prompt(user_query, representatives, subsets[model])}]
+            for model in models
+        }
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    outstanding = len(models)
+
+    async def rank(model: str):
+        nonlocal outstanding
+        if on_event is None:
+            response = await query_model(model, messages[model], params=generation.params("stage2", model), stage="stage2")
+        else:
+            response = (await query_models_with_events([model], messages, "stage2", on_event))[model]
+        outstanding -= 1
         if response is not None:
             full_text = response.get('content', '')
             parsed = parse_ranking_from_text(full_text)
-            stage2_results.append({
+            entry = {
                 "model": model,
                 "ranking": full_text,
                 "parsed_ranking": parsed
-            })
+            }
+            if subsets is not None:
+                entry["subset"] = [_stage2_label(i) for i in subsets[model]]
+            if _truncated(response):
+                entry["truncated"] = True
+            entries[model] = entry
+        if on_ranking is not None:
+            on_ranking([entries[m] for m in models if m in entries], label_to_model, outstanding)
+
+    await asyncio.gather(*[rank(model) for model in models])
+
+    # Format results (in council order, whatever order the rankers finished in)
+    stage2_results = [entries[model] for model in models if model in entries]
 
     return stage2_results, label_to_model
 
 
+@_stage("stage2_model")
 async def run_stage2_for_model(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     model_name: str,
-) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    subset: List[str] | None = None,
+    history: List[Dict[str, str]] | None = None,
+    label_to_model: Dict[str, str | List[str]] | None = None,
+) -> Tuple[Dict[str, Any], Dict[str, str | List[str]]]:
     """
     Run Stage 2 ranking using a single model.
 
+    Args:
+        subset: Labels to rank (a sparse-mode ranker's earlier subset);
+            defaults to all responses
+        history: Optional earlier turns sent before the ranking prompt
+        label_to_model: Labels the message's other rankings were made
+            under, so the new ranking uses the same ones; by default
+            responses are labelled afresh
+
     Returns:
       A tuple of (ranking_entry, label_to_model mapping)
     """
-    labels = [chr(65 + i) for i in range(len(stage1_results))]
-    label_to_model = {
-        f"Response {label}": result['model']
-        for label, result in zip(labels, stage1_results)
-    }
-
-    responses_text = "\n\n".join([
-        f"Response {label}:\n{result['response']}"
-        for label, result in zip(labels, stage1_results)
-    ])
-
-    ranking_prompt = f"""You are evaluating different responses to the following question:
-
-Question: {user_query}
-
-Here are the responses from different models (anonymized):
-
-{responses_text}
-
-Your task:
-1. First, evaluate each response individually. For each response, explain what it does well and what it does poorly.
-2. Then, at the very end of your response, provide a final ranking.
+    representatives, members = _ranked_groups(stage1_results, label_to_model)
+    label_to_model = {_stage2_label(i): m[0] if len(m) == 1 else m for i, m in enumerate(members)}
+    indices = [i for i in range(len(representatives)) if subset is None or _stage2_label(i) in subset]
 
-IMPORTANT: Your final ranking MUST be formatted EXACTLY as follows:
-- Start with the line "FINAL RANKING:" (all caps, with colon)
-- Then list the responses from best to worst as a numbered list
-- Each line should be: number, period, space, then ONLY the response label (e.g., "1. Response A")
-- Do not add any other text or explanations in the ranking section
+    ranking_prompt = _ranking_prompt(user_query, representatives, indices, with_example=False)
 
-Now provide your evaluation and ranking:"""
-
-    messages = [{"role": "user", "content": ranking_prompt}]
-    response = await query_model(model_name, messages)
+    messages = [*(history or []), {"role": "user", "content": ranking_prompt}]
+    response = await query_model(model_name, messages, params=generation.params("stage2", model_name), stage="stage2")
     if response is None:
-        return ({"model": model_name, "ranking": "", "parsed_ranking": []}, label_to_model)
-
-    full_text = response.get('content', '')
-    parsed = parse_ranking_from_text(full_text)
-    entry = {"model": model_name, "ranking": full_text, "parsed_ranking": parsed}
+        entry = {"model": model_name, "ranking": "", "parsed_ranking": []}
+    else:
+        full_text = response.get('content', '')
+        parsed = parse_ranking_from_text(full_text)
+        entry = {"model": model_name, "ranking": full_text, "parsed_ranking": parsed}
+        if _truncated(response):
+            entry["truncated"] = True
+    if subset is not None:
+        entry["subset"] = [_stage2_label(i) for i in indices]
     return (entry, label_to_model)
 
 
+@_stage("stage3")
 async def stage3_synthesize_final(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     stage2_results: List[Dict[str, Any]],
     chairman_override: str | None = None,
+    on_event: Callable[[Dict[str, Any]], None] | None = None,
+    history: List[Dict[str, str]] | None = None,
 ) -> Dict[str, Any]:
     """
     Stage 3: Chairman synthesizes final response.
@@ -199,14 +431,22 @@ async def stage3_synthesize_final(
         user_query: The original user query
         stage1_results: Individual model responses from Stage 1
         stage2_results: Rankings from Stage 2
+        chairman_override: Optional chairman model (defaults to CHAIRMAN_MODEL)
+        on_event: Optional callback; when given, the chairman is streamed and
+            'stage3_delta' events are emitted
+        history: Optional earlier turns sent before the chairman prompt
 
     Returns:
-        Dict with 'model' and 'response' keys
+        Dict with 'model' and 'response' keys, plus 'truncated' when the
+        answer hit its max_tokens setting
     """
-    # Build comprehensive context for chairman
+    # Build comprehensive context for chairman (near-duplicates shown once)
+    representatives, members = collapse_stage1(stage1_results)
     stage1_text = "\n\n".join([
-        f"Model: {result['model']}\nResponse: {result['response']}"
-        for result in stage1_results
+        f"Model: {result['model']}"
+        + (f" (near-identical answers from {', '.join(group[1:])} omitted)" if len(group) > 1 else "")
+        + f"\nResponse: {result['response']}"
+        for result, group in zip(representatives, members)
     ])
 
     stage2_text = "\n\n".join([
@@ -231,17 +471,30 @@ Your task as Chairman is to synthesize all of this information into a single, co
 
 Provide a clear, well-reasoned final answer that represents the council's collective wisdom:"""
 
-    messages = [{"role": "user", "content": chairman_prompt}]
+    messages = [*(history or []), {"role": "user", "content": chairman_prompt}]
 
     # Query the chairman model
     cm = chairman_override if chairman_override else CHAIRMAN_MODEL
-    response = await query_model(cm, messages)
+    params = generation.params("stage3", cm)
+    if on_event is None:
+        response = await query_model(cm, messages, params=params, stage="stage3")
+    else:
+        response = await query_model_stream(
+            cm,
+            messages,
+            lambda delta: on_event({"type": "stage3_delta", "model": cm, "delta": delta}),
+            params=params,
+            stage="stage3",
+        )
 
     if response is None:
         # Fallback if chairman fails
         return {"model": cm, "response": "Error: Unable to generate final synthesis."}
 
-    return {"model": cm, "response": response.get('content', '')}
+    result = {"model": cm, "response": response.get('content', '')}
+    if _truncated(response):
+        result["truncated"] = True
+    return result
 
 
 def parse_ranking_from_text(ranking_text: str) -> List[str]:
@@ -278,13 +531,29 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
     return matches
 
 
+def _ranked_labels(ranking: Dict[str, Any], label_to_model: Dict[str, str | List[str]]) -> List[str]:
+    """Known labels in a ranker's order, each once (parsed from the FINAL RANKING text)."""
+    order = []
+    for label in parse_ranking_from_text(ranking['ranking']):
+        if label in label_to_model and label not in order:
+            order.append(label)
+    return order
+
+
 def calculate_aggregate_rankings(
     stage2_results: List[Dict[str, Any]],
-    label_to_model: Dict[str, str]
+    label_to_model: Dict[str, str | List[str]]
 ) -> List[Dict[str, Any]]:
     """
     Calculate aggregate rankings across all models.
 
+    A label that stood for several near-identical responses credits each of
+    their models with its position. When rankers saw only a subset of the
+    responses (sparse Stage 2), positions are rescaled to the full council
+    size and models are ordered by a Bradley-Terry fit of the pairwise
+    outcomes, reported as 'strength' along with the number of pairwise
+    'comparisons' behind it.
+
     Args:
         stage2_results: Rankings from each model
         label_to_model: Mapping from anonymous labels to model names
@@ -294,37 +563,184 @@ def calculate_aggregate_rankings(
     """
     from collections import defaultdict
 
-    # Track positions for each model
-    model_positions = defaultdict(list)
+    # Track positions for each label
+    label_positions = defaultdict(list)
+    orders = []
+    sparse = any(ranking.get('subset') for ranking in stage2_results)
+    n = len(label_to_model)
 
     for ranking in stage2_results:
-        ranking_text = ranking['ranking']
+        order = _ranked_labels(ranking, label_to_model)
 
-        # Parse the ranking from the structured format
-        parsed_ranking = parse_ranking_from_text(ranking_text)
+        for position, label in enumerate(order, start=1):
+            if sparse and len(order) > 1:
+                # Position p of k maps onto the same relative place among all n
+                position = 1 + (position - 1) * (n - 1) / (len(order) - 1)
+            label_positions[label].append(position)
+        orders.append(order)
 
-        for position, label in enumerate(parsed_ranking, start=1):
-            if label in label_to_model:
-                model_name = label_to_model[label]
-                model_positions[model_name].append(position)
+    if sparse:
+        wins = pairwise_wins(orders)
+        strengths = bradley_terry(wins, list(label_positions))
 
     # Calculate average position for each model
     aggregate = []
-    for model, positions in model_positions.items():
-        if positions:
-            avg_rank = sum(positions) / len(positions)
-            aggregate.append({
+    for label, positions in label_positions.items():
+        if not positions:
+            continue
+        avg_rank = sum(positions) / len(positions)
+        for model in label_models(label_to_model[label]):
+            entry = {
                 "model": model,
                 "average_rank": round(avg_rank, 2),
                 "rankings_count": len(positions)
-            })
-
-    # Sort by average rank (lower is better)
-    aggregate.sort(key=lambda x: x['average_rank'])
+            }
+            if sparse:
+                entry["strength"] = round(strengths[label], 4)
+                entry["comparisons"] = sum(count for pair, count in wins.items() if label in pair)
+            aggregate.append(entry)
+
+    if sparse:
+        # Sort by strength (higher is better)
+        aggregate.sort(key=lambda x: (-x['strength'], x['average_rank']))
+    else:
+        # Sort by average rank (lower is better)
+        aggregate.sort(key=lambda x: x['average_rank'])
 
     return aggregate
 
 
+def _top_labels(
+    stage2_results: List[Dict[str, Any]],
+    label_to_model: Dict[str, str | List[str]],
+    k: int,
+) -> List[str]:
+    """Labels in the first k places of the aggregate ranking."""
+    label_of = {model: label for label, value in label_to_model.items() for model in label_models(value)}
+    top: List[str] = []
+    for entry in calculate_aggregate_rankings(stage2_results, label_to_model):
+        label = label_of[entry['model']]
+        if label not in top:
+            top.append(label)
+    return top[:k]
+
+
+def stage2_consensus(
+    stage2_results: List[Dict[str, Any]],
+    label_to_model: Dict[str, str | List[str]],
+    outstanding: int,
+) -> str | None:
+    """
+    Decide whether the chairman can start before the outstanding rankers answer.
+
+    Returns:
+        "settled" if no outstanding ranking can change the top
+        STAGE3_CONSENSUS_TOP_K places of the aggregate (full Stage 2 only),
+        "consensus" if the rankers agreeing with those places make up at
+        least STAGE3_CONSENSUS_THRESHOLD of all rankers, otherwise None
+    """
+    if not stage2_results:
+        return None
+    top = _top_labels(stage2_results, label_to_model, STAGE3_CONSENSUS_TOP_K)
+    orders = [_ranked_labels(ranking, label_to_model) for ranking in stage2_results]
+    sparse = any(ranking.get('subset') for ranking in stage2_results)
+
+    # Bounds on average positions only hold when every ranker sees every response
+    if not sparse and top_k_settled(orders, list(label_to_model), outstanding, STAGE3_CONSENSUS_TOP_K):
+        return "settled"
+
+    # A ranker agrees if the top labels it saw lead its order, in the same order
+    agreeing = 0
+    for order in orders:
+        seen = [label for label in top if label in order]
+        if seen and order[:len(seen)] == seen:
+            agreeing += 1
+    if agreeing >= STAGE3_CONSENSUS_THRESHOLD * (len(stage2_results) + outstanding):
+        return "consensus"
+    return None
+
+
+@tracing.traced("council.stage2_stage3")
+async def stage2_and_stage3(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    models_override: List[str] | None = None,
+    chairman_override: str | None = None,
+    on_chairman_start: Callable[[List[Dict[str, Any]], Dict[str, str | List[str]], Dict[str, Any]], None] | None = None,
+    on_chairman_complete: Callable[[Dict[str, Any]], None] | None = None,
+    history: List[Dict[str, str]] | None = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, str | List[str]], Dict[str, Any], Dict[str, Any]]:
+    """
+    Run Stage 2 and Stage 3, starting the chairman early when the rankings agree.
+
+    With STAGE3_SPECULATIVE, the chairman starts as soon as stage2_consensus
+    allows, with the rankings received so far; the remaining rankers keep
+    running alongside it and their rankings are still returned.
+
+    Args:
+        on_chairman_start: Optional callback receiving the rankings the
+            chairman was given, label_to_model and the speculation record
+            (empty unless the chairman started early)
+        on_chairman_complete: Optional callback receiving the Stage 3 result
+            as soon as it is ready
+        history: Optional earlier turns sent to rankers and the chairman
+
+    Returns:
+        Tuple of (stage2_results, label_to_model, stage3_result, speculation).
+        speculation is empty unless the chairman started early; otherwise it
+        has the 'trigger', the rankers whose rankings were used
+        ('rankings_used'), those that arrived later ('late_rankings') and
+        whether the late rankings changed the top places ('top_k_changed')
+    """
+    chairman: asyncio.Task | None = None
+    speculation: Dict[str, Any] = {}
+    partial_top: List[str] = []
+
+    async def synthesize(rankings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        result = await stage3_synthesize_final(user_query, stage1_results, rankings, chairman_override, history=history)
+        if on_chairman_complete is not None:
+            on_chairman_complete(result)
+        return result
+
+    def start_chairman(rankings: List[Dict[str, Any]], label_to_model: Dict[str, str | List[str]]) -> asyncio.Task:
+        if on_chairman_start is not None:
+            on_chairman_start(list(rankings), label_to_model, dict(speculation))
+        return asyncio.create_task(synthesize(list(rankings)))
+
+    def on_ranking(rankings: List[Dict[str, Any]], label_to_model: Dict[str, str | List[str]], outstanding: int):
+        nonlocal chairman, partial_top
+        if not STAGE3_SPECULATIVE or chairman is not None or outstanding == 0:
+            return
+        trigger = stage2_consensus(rankings, label_to_model, outstanding)
+        if trigger is None:
+            return
+        partial_top = _top_labels(rankings, label_to_model, STAGE3_CONSENSUS_TOP_K)
+        speculation.update({
+            "trigger": trigger,
+            "top_k": STAGE3_CONSENSUS_TOP_K,
+            "rankings_used": [ranking['model'] for ranking in rankings],
+        })
+        chairman = start_chairman(rankings, label_to_model)
+
+    try:
+        stage2_results, label_to_model = await stage2_collect_rankings(
+            user_query, stage1_results, models_override, on_ranking=on_ranking, history=history
+        )
+        if chairman is None:
+            chairman = start_chairman(stage2_results, label_to_model)
+        stage3_result = await chairman
+    finally:
+        if chairman is not None and not chairman.done():
+            chairman.cancel()
+
+    if speculation:
+        used = set(speculation["rankings_used"])
+        speculation["late_rankings"] = [r['model'] for r in stage2_results if r['model'] not in used]
+        speculation["top_k_changed"] = _top_labels(stage2_results, label_to_model, STAGE3_CONSENSUS_TOP_K) != partial_top
+    return stage2_results, label_to_model, stage3_result, speculation
+
+
+@_stage("title")
 async def generate_conversation_title(user_query: str) -> str:
     """
     Generate a short title for a conversation based on the first user message.
@@ -345,7 +761,8 @@ Title:"""
     messages = [{"role": "user", "content": title_prompt}]
 
     # Use gemini-2.5-flash for title generation (fast and cheap)
-    response = await query_model("google/gemini-2.5-flash", messages, timeout=30.0)
+    title_model = "google/gemini-2.5-flash"
+    response = await query_model(title_model, messages, timeout=30.0, params=generation.params("title", title_model), stage="title")
 
     if response is None:
         # Fallback to a generic title
@@ -363,18 +780,26 @@ Title:"""
     return title
 
 
-async def run_full_council(user_query: str, models_override: List[str] | None = None, chairman_override: str | None = None) -> Tuple[List, List, Dict, Dict]:
+@tracing.traced("council.run")
+async def run_full_council(
+    user_query: str,
+    models_override: List[str] | None = None,
+    chairman_override: str | None = None,
+    history: List[Dict[str, str]] | None = None,
+) -> Tuple[List, List, Dict, Dict]:
     """
     Run the complete 3-stage council process.
 
     Args:
         user_query: The user's question
+        history: Optional earlier turns of the conversation (see backend.history)
 
     Returns:
         Tuple of (stage1_results, stage2_results, stage3_result, metadata)
     """
     # Stage 1: Collect individual responses
-    stage1_results = await stage1_collect_responses(user_query, models_override)
+    selection: Dict[str, Any] = {}
+    stage1_results = await stage1_collect_responses(user_query, models_override, selection, history)
 
     # If no models responded successfully, return error
     if not stage1_results:
@@ -383,19 +808,23 @@ async def run_full_council(user_query: str, models_override: List[str] | None =
             "response": "All models failed to respond. Please try again."
         }, {}
 
-    # Stage 2: Collect rankings
-    stage2_results, label_to_model = await stage2_collect_rankings(user_query, stage1_results, models_override)
+    # Stage 2: Collect rankings; Stage 3: Synthesize final answer (possibly
+    # starting before the last rankings arrive, see STAGE3_SPECULATIVE)
+    stage2_results, label_to_model, stage3_result, speculation = await stage2_and_stage3(
+        user_query, stage1_results, models_override, chairman_override, history=history
+    )
 
     # Calculate aggregate rankings
     aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
 
-    # Stage 3: Synthesize final answer
-    stage3_result = await stage3_synthesize_final(user_query, stage1_results, stage2_results, chairman_override)
-
     # Prepare metadata
     metadata = {
         "label_to_model": label_to_model,
         "aggregate_rankings": aggregate_rankings
     }
+    if selection:
+        metadata["council_selection"] = selection
+    if speculation:
+        metadata["stage3_speculation"] = speculation
 
     return stage1_results, stage2_results, stage3_result, metadata
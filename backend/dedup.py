@@ -0,0 +1,64 @@
+"""Near-duplicate detection for Stage 1 responses.
+
+Texts are normalized to lowercase words and split into overlapping word
+shingles. Each text is summarized by a bottom-k MinHash sketch (the k
+smallest shingle hashes), from which the Jaccard similarity of two texts is
+estimated; texts with fewer than k shingles are compared exactly.
+"""
+
+import hashlib
+import heapq
+import re
+from typing import List, Sequence, Set
+
+SHINGLE_WORDS = 3
+SKETCH_SIZE = 128
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def sketch(text: str, k: int = SKETCH_SIZE) -> Set[int]:
+    """Bottom-k MinHash sketch of a text's word shingles (empty for empty text)."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return set()
+    if len(words) <= SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return set(heapq.nsmallest(k, {_shingle_hash(s) for s in shingles}))
+
+
+def similarity(a: Set[int], b: Set[int], k: int = SKETCH_SIZE) -> float:
+    """Estimated Jaccard similarity of the texts behind two sketches."""
+    if not a or not b:
+        return 0.0
+    # The k smallest hashes of the union are a uniform sample of it; the
+    # fraction present in both sketches estimates the Jaccard similarity
+    union = heapq.nsmallest(k, a | b)
+    return sum(1 for h in union if h in a and h in b) / len(union)
+
+
+def cluster(texts: Sequence[str], threshold: float) -> List[List[int]]:
+    """
+    Group near-duplicate texts.
+
+    Each text joins the first cluster whose leader (first member) it
+    resembles at `threshold` or more, so clusters never chain through
+    intermediate texts. Empty texts are never grouped.
+
+    Returns:
+        Clusters as lists of text indices, in order of their first member
+    """
+    sketches = [sketch(text) for text in texts]
+    clusters: List[List[int]] = []
+    for i, s in enumerate(sketches):
+        for members in clusters:
+            if similarity(sketches[members[0]], s) >= threshold:
+                members.append(i)
+                break
+        else:
+            clusters.append([i])
+    return clusters
@@ -0,0 +1,183 @@
+"""Priority-aware dispatch of upstream LLM calls.
+
+Every call to the OpenRouter client takes a slot from a shared dispatcher.
+Calls carry a priority class, taken from a contextvar set per request (see
+PriorityMiddleware) or around batch jobs (see `priority`). Interactive calls
+may use every slot and always go ahead of queued batch calls; batch calls are
+capped at their own share, so interactive traffic keeps headroom while
+batches run.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, Iterator
+
+from . import metrics
+from .config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_INTERACTIVE_MAX_CONCURRENCY,
+    LLM_BATCH_MAX_CONCURRENCY,
+)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Highest priority first
+PRIORITY_CLASSES = (INTERACTIVE, BATCH)
+
+_PRIORITY: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _PRIORITY.get()
+
+
+@contextmanager
+def priority(priority_class: str) -> Iterator[str]:
+    """
+    Run upstream calls made inside the block (and tasks it starts) at a priority class.
+
+    Args:
+        priority_class: One of PRIORITY_CLASSES
+    """
+    if priority_class not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority_class}")
+    token = _PRIORITY.set(priority_class)
+    try:
+        yield priority_class
+    finally:
+        _PRIORITY.reset(token)
+
+
+class Dispatcher:
+    """
+    Concurrency slots for upstream calls, shared between priority classes.
+
+    At most `max_concurrency` calls run at once, and at most `shares[cls]` of
+    them in each class. When a slot frees up, queued calls of a higher class
+    are started first; a lower-class call only starts from the queue when no
+    higher-class call is waiting. Calls already in flight are never interrupted.
+    """
+
+    def __init__(self, max_concurrency: int, shares: Dict[str, int]):
+        self.max_concurrency = max_concurrency
+        self.shares = {cls: min(shares.get(cls, max_concurrency), max_concurrency) for cls in PRIORITY_CLASSES}
+        self.running: Dict[str, int] = {cls: 0 for cls in PRIORITY_CLASSES}
+        self._waiting: Dict[str, Deque[asyncio.Future]] = {cls: deque() for cls in PRIORITY_CLASSES}
+
+    def _can_start(self, cls: str) -> bool:
+        return sum(self.running.values()) < self.max_concurrency and self.running[cls] < self.shares[cls]
+
+    def _higher_waiting(self, cls: str) -> bool:
+        for other in PRIORITY_CLASSES:
+            if other == cls:
+                return False
+            if self._waiting[other]:
+                return True
+        return False
+
+    def _start(self, cls: str):
+        self.running[cls] += 1
+        # Jumping ahead of queued lower-class calls preempts them
+        lower = PRIORITY_CLASSES[PRIORITY_CLASSES.index(cls) + 1:]
+        if any(self._waiting[other] for other in lower):
+            metrics.LLM_DISPATCH_PREEMPTIONS.inc(priority=cls)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        for cls in PRIORITY_CLASSES:
+            metrics.LLM_DISPATCH_RUNNING.set(self.running[cls], priority=cls)
+            metrics.LLM_DISPATCH_QUEUED.set(len(self._waiting[cls]), priority=cls)
+
+    async def acquire(self, cls: str):
+        """Wait for a slot in priority class `cls`."""
+        if not self._waiting[cls] and not self._higher_waiting(cls) and self._can_start(cls):
+            self._start(cls)
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting[cls].append(waiter)
+        self._update_gauges()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled: hand the slot on
+                self.release(cls)
+            else:
+                try:
+                    self._waiting[cls].remove(waiter)
+                except ValueError:
+                    pass
+                self._update_gauges()
+            raise
+
+    def release(self, cls: str):
+        self.running[cls] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start queued calls into free slots, highest priority class first."""
+        for cls in PRIORITY_CLASSES:
+            queue = self._waiting[cls]
+            while queue and self._can_start(cls):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._start(cls)
+                waiter.set_result(None)
+            if queue:
+                # Lower classes wait until this one is drained
+                break
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold a slot at the current priority class for the duration of the block.
+
+        Yields:
+            Seconds spent queued before the slot was granted
+        """
+        cls = current_priority()
+        start = time.perf_counter()
+        await self.acquire(cls)
+        waited = time.perf_counter() - start
+        metrics.LLM_DISPATCH_WAIT.observe(waited, priority=cls)
+        try:
+            yield waited
+        finally:
+            self.release(cls)
+
+
+dispatcher = Dispatcher(
+    LLM_MAX_CONCURRENCY,
+    {INTERACTIVE: LLM_INTERACTIVE_MAX_CONCURRENCY, BATCH: LLM_BATCH_MAX_CONCURRENCY},
+)
+
+
+class PriorityMiddleware:
+    """
+    ASGI middleware tagging each HTTP request or WebSocket with a priority class.
+
+    Requests are interactive unless they send `X-Council-Priority: batch`.
+    The class applies to every upstream call the request makes, including
+    those made while streaming the response.
+    """
+
+    header = b"x-council-priority"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        requested = dict(scope.get("headers") or []).get(self.header, b"").decode("latin-1").strip().lower()
+        with priority(requested if requested in PRIORITY_CLASSES else INTERACTIVE):
+            await self.app(scope, receive, send)
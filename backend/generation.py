@@ -0,0 +1,124 @@
+"""Per-stage and per-model generation settings.
+
+Settings are layered, later layers winning:
+
+    {"default": {...}, "stage1": {...}, "stage2": {...}, "stage3": {...}, "title": {...},
+     "models": {"<model id>": {..., "stage1": {...}}}}
+
+i.e. defaults, then the stage, then the model, then the model within the
+stage. GENERATION_PARAMS (config) is applied first and a conversation's
+'generation' config on top of it. Each layer may set max_tokens,
+temperature, reasoning_effort and stop.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import GENERATION_PARAMS
+
+STAGES = ("stage1", "stage2", "stage3", "title")
+REASONING_EFFORTS = ("minimal", "low", "medium", "high")
+
+# Conversation overrides for the innermost overrides() block, if any
+_OVERRIDES: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("generation_overrides", default=None)
+
+
+def _validate_params(params: Any, where: str, allow_stages: bool = False) -> Dict[str, Any]:
+    if not isinstance(params, dict):
+        raise ValueError(f"{where} must be an object")
+    for key, value in params.items():
+        if allow_stages and key in STAGES:
+            _validate_params(value, f"{where}.{key}")
+        elif key == "max_tokens":
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError(f"{where}.max_tokens must be a positive integer")
+        elif key == "temperature":
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 2:
+                raise ValueError(f"{where}.temperature must be between 0 and 2")
+        elif key == "reasoning_effort":
+            if value not in REASONING_EFFORTS:
+                raise ValueError(f"{where}.reasoning_effort must be one of {', '.join(REASONING_EFFORTS)}")
+        elif key == "stop":
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list) or not all(isinstance(s, str) and s for s in value) or len(value) > 4:
+                raise ValueError(f"{where}.stop must be a string or a list of up to 4 strings")
+        else:
+            raise ValueError(f"Unknown generation setting {where}.{key}")
+    return params
+
+
+def validate(settings: Any) -> Dict[str, Any]:
+    """
+    Check a settings document (see the module docstring).
+
+    Returns:
+        The settings, unchanged
+
+    Raises:
+        ValueError: Describing the first invalid entry
+    """
+    if not isinstance(settings, dict):
+        raise ValueError("generation settings must be an object")
+    for key, value in settings.items():
+        if key == "default" or key in STAGES:
+            _validate_params(value, key)
+        elif key == "models":
+            if not isinstance(value, dict):
+                raise ValueError("models must be an object")
+            for model, params in value.items():
+                _validate_params(params, f"models.{model}", allow_stages=True)
+        else:
+            raise ValueError(f"Unknown generation section {key}")
+    return settings
+
+
+# Fail at startup rather than on the first call
+validate(GENERATION_PARAMS)
+
+
+def _layers(settings: Optional[Dict[str, Any]], stage: str, model: str) -> List[Dict[str, Any]]:
+    if not settings:
+        return []
+    per_model = (settings.get("models") or {}).get(model) or {}
+    return [
+        settings.get("default") or {},
+        settings.get(stage) or {},
+        {k: v for k, v in per_model.items() if k not in STAGES},
+        per_model.get(stage) or {},
+    ]
+
+
+def params(stage: str, model: str) -> Dict[str, Any]:
+    """Resolved settings for one call: config layers, then the current conversation's."""
+    resolved: Dict[str, Any] = {}
+    for layer in _layers(GENERATION_PARAMS, stage, model) + _layers(_OVERRIDES.get(), stage, model):
+        resolved.update(layer)
+    return resolved
+
+
+def payload(settings: Optional[Dict[str, Any]], openrouter: bool = True) -> Dict[str, Any]:
+    """Request body fields for resolved settings (OpenRouter, or plain OpenAI-compatible chat completions)."""
+    if not settings:
+        return {}
+    body: Dict[str, Any] = {}
+    for key in ("max_tokens", "temperature", "stop"):
+        if key in settings:
+            body[key] = settings[key]
+    if "reasoning_effort" in settings:
+        if openrouter:
+            body["reasoning"] = {"effort": settings["reasoning_effort"]}
+        else:
+            body["reasoning_effort"] = settings["reasoning_effort"]
+    return body
+
+
+@contextmanager
+def overrides(settings: Optional[Dict[str, Any]]) -> Iterator[None]:
+    """Apply a conversation's generation settings to calls made inside the block (and tasks it starts)."""
+    token = _OVERRIDES.set(settings or None)
+    try:
+        yield
+    finally:
+        _OVERRIDES.reset(token)
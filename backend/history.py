@@ -0,0 +1,189 @@
+"""Multi-turn context for council prompts.
+
+Each new question is sent with the conversation so far: earlier questions and
+the council's final (Stage 3) answers as chat turns, newest first until
+HISTORY_TOKEN_BUDGET estimated tokens are used. Turns that no longer fit are
+folded into a rolling summary by HISTORY_SUMMARY_MODEL. The summary is
+extended in the background once a turn completes and cached in the
+conversation ('history_summary': its text and the message index it covers up
+to), so building the context for a call never queries a model. Rerunning or
+completing a turn the summary already covers drops it, to be rebuilt.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import storage
+from .config import HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY_MODEL
+from .dispatcher import BATCH, priority
+from .openrouter import query_model
+
+# Share of the budget the summary may take; the rest holds verbatim turns
+_SUMMARY_SHARE = 0.25
+
+# In-flight summary refreshes by conversation id
+_REFRESHES: Dict[str, asyncio.Task] = {}
+
+# Bumped when a conversation's summary is dropped, so a refresh started before
+# does not store a summary of the replaced turns
+_EPOCHS: Dict[str, int] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def completed_turns(messages: List[Dict[str, Any]], before: Optional[int] = None) -> List[Tuple[int, str, str]]:
+    """
+    Turns in messages[:before] that reached a final answer.
+
+    Returns:
+        List of (assistant message index, question, Stage 3 answer)
+    """
+    messages = messages[:before]
+    turns = []
+    for index in range(1, len(messages)):
+        question, answer = messages[index - 1], messages[index]
+        if not isinstance(question, dict) or question.get("role") != "user":
+            continue
+        if not isinstance(answer, dict) or answer.get("role") != "assistant":
+            continue
+        stage3 = answer.get("stage3")
+        if not isinstance(stage3, dict) or not stage3.get("response") or stage3.get("model") == "error":
+            continue
+        turns.append((index, question.get("content", ""), stage3["response"]))
+    return turns
+
+
+def _turn_tokens(turn: Tuple[int, str, str]) -> int:
+    return estimate_tokens(turn[1]) + estimate_tokens(turn[2])
+
+
+def _window_start(turns: List[Tuple[int, str, str]], budget: int) -> int:
+    """Index of the oldest turn in the newest run of turns that fits `budget`."""
+    start = len(turns)
+    while start > 0 and _turn_tokens(turns[start - 1]) <= budget:
+        budget -= _turn_tokens(turns[start - 1])
+        start -= 1
+    return start
+
+
+def build_context(conversation: Dict[str, Any], before: int) -> List[Dict[str, str]]:
+    """
+    Chat messages giving the context for the question at `before`.
+
+    Uses the cached summary when it covers only earlier messages (a rerun of
+    an old message must not see later turns); turns that are neither
+    summarized nor within the budget are left out.
+
+    Args:
+        conversation: Conversation dict
+        before: Index of the user message being answered
+
+    Returns:
+        An optional summary message followed by user/assistant turns
+    """
+    if HISTORY_TOKEN_BUDGET <= 0:
+        return []
+    turns = completed_turns(conversation.get("messages", []), before)
+    summary = conversation.get("history_summary") or {}
+    text = ""
+    if summary.get("text") and summary.get("through", 0) <= before:
+        text = summary["text"]
+        turns = [turn for turn in turns if turn[0] >= summary["through"]]
+
+    context: List[Dict[str, str]] = []
+    if text:
+        context.append({"role": "system", "content": f"Summary of the earlier conversation:\n{text}"})
+    for _, question, answer in turns[_window_start(turns, HISTORY_TOKEN_BUDGET - estimate_tokens(text)):]:
+        context.append({"role": "user", "content": question})
+        context.append({"role": "assistant", "content": answer})
+    return context
+
+
+async def get_context(conversation: Dict[str, Any], before: int) -> List[Dict[str, str]]:
+    """build_context, after waiting for a summary refresh still running for the conversation."""
+    task = _REFRESHES.get(conversation["id"])
+    if task is not None and not task.done():
+        # Shielded: a cancelled request must not abort the refresh
+        await asyncio.shield(task)
+        conversation = storage.get_conversation(conversation["id"]) or conversation
+    return build_context(conversation, before)
+
+
+async def _summarize(previous: str, turns: List[Tuple[int, str, str]], max_tokens: int) -> Optional[str]:
+    transcript = "\n\n".join(f"User: {question}\nAssistant: {answer}" for _, question, answer in turns)
+    earlier = f"Summary so far:\n{previous}\n\n" if previous else ""
+    prompt = f"""Summarize the conversation below for an assistant that will answer the user's next questions.
+Keep the facts, decisions, names, numbers and open questions the user may refer back to.
+Use at most {max(1, max_tokens * 3 // 4)} words.
+
+{earlier}New turns:
+{transcript}
+
+Summary:"""
+
+    response = await query_model(HISTORY_SUMMARY_MODEL, [{"role": "user", "content": prompt}], timeout=60.0, stage="history")
+    if response is None:
+        return None
+    text = (response.get("content") or "").strip()
+    # Keep within the share of the budget even if the model overshoots
+    return text[:max_tokens * 4] or None
+
+
+async def _refresh(conversation_id: str):
+    summary_budget = int(HISTORY_TOKEN_BUDGET * _SUMMARY_SHARE)
+    try:
+        with priority(BATCH):
+            # Loop so turns completed while a summary was being written are folded too
+            while True:
+                epoch = _EPOCHS.get(conversation_id, 0)
+                conversation = storage.get_conversation(conversation_id)
+                if conversation is None:
+                    return
+                summary = conversation.get("history_summary") or {}
+                through = summary.get("through", 0)
+                turns = [turn for turn in completed_turns(conversation.get("messages", [])) if turn[0] >= through]
+                fold = turns[:_window_start(turns, HISTORY_TOKEN_BUDGET - summary_budget)]
+                if not fold:
+                    return
+                text = await _summarize(summary.get("text", ""), fold, summary_budget)
+                if text is None:
+                    return
+                if _EPOCHS.get(conversation_id, 0) != epoch:
+                    # Dropped meanwhile: start over from the current turns
+                    continue
+                storage.update_history_summary(conversation_id, {"text": text, "through": fold[-1][0] + 1})
+    except Exception as e:
+        print(f"Error summarizing history of {conversation_id}: {e}")
+
+
+def _drop_stale_summary(conversation_id: str, changed_index: int):
+    """Drop the cached summary if it covers the message at `changed_index` (a summary cannot be trimmed)."""
+    conversation = storage.get_conversation(conversation_id)
+    summary = (conversation or {}).get("history_summary") or {}
+    if summary.get("through", 0) > changed_index:
+        _EPOCHS[conversation_id] = _EPOCHS.get(conversation_id, 0) + 1
+        storage.update_history_summary(conversation_id, None)
+
+
+def schedule_summary(conversation_id: str, changed_index: Optional[int] = None):
+    """
+    Fold turns that no longer fit the budget into the summary, in the background (single-flight).
+
+    Args:
+        conversation_id: Conversation identifier
+        changed_index: Index of an earlier assistant message whose answer was
+            just replaced or completed (rerun or continue); a summary covering
+            it is dropped first so its old answer stops reaching later turns
+    """
+    if HISTORY_TOKEN_BUDGET <= 0:
+        return
+    if changed_index is not None:
+        _drop_stale_summary(conversation_id, changed_index)
+    task = _REFRESHES.get(conversation_id)
+    if task is None or task.done():
+        task = asyncio.create_task(_refresh(conversation_id))
+        _REFRESHES[conversation_id] = task
+        task.add_done_callback(lambda t: _REFRESHES.pop(conversation_id, None) if _REFRESHES.get(conversation_id) is t else None)
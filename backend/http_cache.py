@@ -0,0 +1,56 @@
+"""Conditional GET support (ETag / Last-Modified) for conversation fetches."""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Tuple
+
+from starlette.datastructures import Headers
+
+
+def conversation_validators(version: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Build validators from a conversation's storage version.
+
+    The ETag is weak because the same revision may be sent with different
+    content encodings.
+
+    Args:
+        version: Dict with 'revision' and 'updated_at' (naive UTC ISO timestamp)
+
+    Returns:
+        Tuple of (ETag, Last-Modified HTTP date)
+    """
+    etag = f'W/"{version["revision"]}"'
+    updated_at = datetime.fromisoformat(version["updated_at"]).replace(tzinfo=timezone.utc)
+    return etag, format_datetime(updated_at, usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"1" matches "1" and W/"1"
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def is_not_modified(headers: Headers, etag: str, last_modified: str) -> bool:
+    """
+    Whether a GET can be answered with 304 Not Modified.
+
+    If-None-Match takes precedence; If-Modified-Since is only used without it.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return parsedate_to_datetime(last_modified) <= since
+    return False
@@ -0,0 +1,307 @@
+"""Cross-conversation model leaderboard built from Stage 2 peer rankings.
+
+Every assistant message with Stage 2 results contributes per-model rank sums
+and pairwise wins ("ranked above") to running totals kept in SQLite
+(LEADERBOARD_DB_PATH). The contribution of each message is stored with a
+digest of its rankings, so when a message's Stage 2 is rerun (or the
+conversation is deleted) the old contribution is subtracted before the new
+one is added. Reading the leaderboard never touches conversation files.
+
+Scores are fitted with Bradley-Terry on the pairwise win counts and also
+reported on an Elo-like scale (1500 = average model, +400 = 10:1 odds).
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import LEADERBOARD_DB_PATH
+from .council import label_models, parse_ranking_from_text, plain_label_to_model
+from .ranking import bradley_terry, pairwise_wins
+from .serialization import dumps, loads
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_stats (
+    model TEXT PRIMARY KEY,
+    rank_sum INTEGER NOT NULL,
+    rankings INTEGER NOT NULL,
+    first_places INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pairwise (
+    winner TEXT NOT NULL,
+    loser TEXT NOT NULL,
+    wins INTEGER NOT NULL,
+    PRIMARY KEY (winner, loser)
+);
+CREATE TABLE IF NOT EXISTS contributions (
+    conversation_id TEXT NOT NULL,
+    message_index INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, message_index)
+);
+CREATE TABLE IF NOT EXISTS recorded_conversations (
+    conversation_id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+"""
+
+_LOCK = threading.Lock()
+_CONN: Optional[sqlite3.Connection] = None
+
+# Bumped on every change; the fitted scores are cached per version
+_VERSION = 0
+_SCORES: Tuple[int, Dict[str, float]] = (-1, {})
+
+
+def _connect() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        directory = os.path.dirname(LEADERBOARD_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(LEADERBOARD_DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _CONN = conn
+    return _CONN
+
+
+def _label_to_model(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Labels used in Stage 2: stored with the message, or rebuilt from Stage 1 order (no grouping)."""
+    metadata = message.get("metadata")
+    if isinstance(metadata, dict) and isinstance(metadata.get("label_to_model"), dict):
+        return metadata["label_to_model"]
+    stage1 = [r for r in message.get("stage1") or [] if isinstance(r, dict) and "model" in r]
+    return plain_label_to_model(stage1)
+
+
+def message_contribution(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Compute what one assistant message adds to the leaderboard.
+
+    Returns:
+        Dict with 'ranks' ({model: [rank_sum, rankings, first_places]}) and
+        'wins' ([[winner, loser, count], ...]), or None if the message has no
+        usable Stage 2 rankings
+    """
+    if not isinstance(message, dict) or message.get("role") != "assistant":
+        return None
+    label_to_model = _label_to_model(message)
+    ranks: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+    orders: List[List[str]] = []
+
+    for entry in message.get("stage2") or []:
+        if not isinstance(entry, dict):
+            continue
+        labels = entry.get("parsed_ranking") or parse_ranking_from_text(entry.get("ranking") or "")
+        order: List[str] = []
+        for label in labels:
+            if label in label_to_model and label not in order:
+                order.append(label)
+        for position, label in enumerate(order, start=1):
+            # A label for near-duplicate responses credits all their models
+            for model in label_models(label_to_model[label]):
+                ranks[model][0] += position
+                ranks[model][1] += 1
+                ranks[model][2] += position == 1
+        orders.append(order)
+
+    if not ranks:
+        return None
+    wins: Dict[Tuple[str, str], int] = defaultdict(int)
+    for (winner, loser), count in pairwise_wins(orders).items():
+        for a in label_models(label_to_model[winner]):
+            for b in label_models(label_to_model[loser]):
+                wins[(a, b)] += count
+    return {
+        "ranks": dict(ranks),
+        "wins": [[winner, loser, count] for (winner, loser), count in sorted(wins.items())],
+    }
+
+
+def _apply(conn: sqlite3.Connection, contribution: Dict[str, Any], sign: int):
+    conn.executemany(
+        "INSERT INTO model_stats (model, rank_sum, rankings, first_places) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (model) DO UPDATE SET rank_sum = rank_sum + excluded.rank_sum, "
+        "rankings = rankings + excluded.rankings, first_places = first_places + excluded.first_places",
+        [(model, sign * s, sign * n, sign * f) for model, (s, n, f) in contribution["ranks"].items()],
+    )
+    conn.executemany(
+        "INSERT INTO pairwise (winner, loser, wins) VALUES (?, ?, ?) "
+        "ON CONFLICT (winner, loser) DO UPDATE SET wins = wins + excluded.wins",
+        [(winner, loser, sign * count) for winner, loser, count in contribution["wins"]],
+    )
+
+
+def _digest(message: Dict[str, Any]) -> str:
+    key = dumps([message.get("stage2"), _label_to_model(message)])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _record(conn: sqlite3.Connection, conversation: Dict[str, Any]) -> bool:
+    """Diff a conversation's contributions against the stored ones; returns whether totals changed."""
+    conversation_id = conversation["id"]
+    existing = {
+        index: (digest, payload)
+        for index, digest, payload in conn.execute(
+            "SELECT message_index, digest, payload FROM contributions WHERE conversation_id = ?",
+            (conversation_id,),
+        )
+    }
+    changed = False
+    messages = conversation.get("messages", [])
+    for index, message in enumerate(messages):
+        if not isinstance(message, dict) or message.get("role") != "assistant" or not message.get("stage2"):
+            continue
+        digest = _digest(message)
+        old = existing.pop(index, None)
+        if old is not None and old[0] == digest:
+            continue
+        if old is not None:
+            _apply(conn, loads(old[1]), -1)
+            conn.execute(
+                "DELETE FROM contributions WHERE conversation_id = ? AND message_index = ?",
+                (conversation_id, index),
+            )
+            changed = True
+        contribution = message_contribution(message)
+        if contribution is None:
+            continue
+        _apply(conn, contribution, 1)
+        conn.execute(
+            "INSERT INTO contributions (conversation_id, message_index, digest, payload) VALUES (?, ?, ?, ?)",
+            (conversation_id, index, digest, dumps(contribution)),
+        )
+        changed = True
+
+    # Messages whose Stage 2 was cleared or that no longer exist
+    for index, (_, payload) in existing.items():
+        _apply(conn, loads(payload), -1)
+        conn.execute(
+            "DELETE FROM contributions WHERE conversation_id = ? AND message_index = ?",
+            (conversation_id, index),
+        )
+        changed = True
+
+    conn.execute(
+        "INSERT OR REPLACE INTO recorded_conversations (conversation_id, revision) VALUES (?, ?)",
+        (conversation_id, conversation.get("revision", 0)),
+    )
+    return changed
+
+
+def _prune(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM model_stats WHERE rankings <= 0")
+    conn.execute("DELETE FROM pairwise WHERE wins <= 0")
+
+
+def record_conversation(conversation: Dict[str, Any]):
+    """Bring a conversation's contributions up to date (unchanged messages are skipped)."""
+    global _VERSION
+    with _LOCK:
+        conn = _connect()
+        with conn:
+            if _record(conn, conversation):
+                _prune(conn)
+                _VERSION += 1
+
+
+def remove_conversation(conversation_id: str):
+    """Subtract all contributions of a deleted conversation."""
+    global _VERSION
+    with _LOCK:
+        conn = _connect()
+        with conn:
+            rows = conn.execute(
+                "SELECT payload FROM contributions WHERE conversation_id = ?", (conversation_id,)
+            ).fetchall()
+            for (payload,) in rows:
+                _apply(conn, loads(payload), -1)
+            conn.execute("DELETE FROM contributions WHERE conversation_id = ?", (conversation_id,))
+            conn.execute("DELETE FROM recorded_conversations WHERE conversation_id = ?", (conversation_id,))
+            if rows:
+                _prune(conn)
+                _VERSION += 1
+
+
+def reconcile(revisions: Dict[str, int], load: Callable[[str], Optional[Dict[str, Any]]]) -> Dict[str, int]:
+    """
+    Sync the leaderboard with storage, e.g. after files were written by another process.
+
+    Args:
+        revisions: Current revision of every stored conversation, by id
+        load: Loads a conversation by id
+
+    Returns:
+        Counts of 'recorded' and 'removed' conversations
+    """
+    with _LOCK:
+        recorded = dict(_connect().execute("SELECT conversation_id, revision FROM recorded_conversations"))
+
+    stale = [cid for cid, revision in revisions.items() if recorded.get(cid) != revision]
+    removed = [cid for cid in recorded if cid not in revisions]
+    for conversation_id in stale:
+        conversation = load(conversation_id)
+        if conversation is not None:
+            record_conversation(conversation)
+    for conversation_id in removed:
+        remove_conversation(conversation_id)
+    return {"recorded": len(stale), "removed": len(removed)}
+
+
+def get_leaderboard(include_pairwise: bool = False) -> Dict[str, Any]:
+    """
+    Current standings, best first.
+
+    Reads only the running totals, so the cost depends on the number of
+    models, not on the number of stored conversations.
+    """
+    global _SCORES
+    with _LOCK:
+        conn = _connect()
+        stats = conn.execute("SELECT model, rank_sum, rankings, first_places FROM model_stats").fetchall()
+        pairwise = conn.execute("SELECT winner, loser, wins FROM pairwise").fetchall()
+        messages = conn.execute("SELECT COUNT(*) FROM contributions").fetchone()[0]
+        version = _VERSION
+
+    wins = {(winner, loser): count for winner, loser, count in pairwise}
+    models = [model for model, *_ in stats]
+    if _SCORES[0] != version or set(_SCORES[1]) != set(models):
+        _SCORES = (version, bradley_terry(wins, models))
+    strengths = _SCORES[1]
+
+    won: Dict[str, int] = defaultdict(int)
+    lost: Dict[str, int] = defaultdict(int)
+    for (winner, loser), count in wins.items():
+        won[winner] += count
+        lost[loser] += count
+
+    rows = []
+    for model, rank_sum, rankings, first_places in stats:
+        comparisons = won[model] + lost[model]
+        strength = strengths.get(model, 1.0)
+        rows.append({
+            "model": model,
+            "average_rank": round(rank_sum / rankings, 2),
+            "rankings_count": rankings,
+            "first_places": first_places,
+            "wins": won[model],
+            "losses": lost[model],
+            "win_rate": round(won[model] / comparisons, 4) if comparisons else None,
+            "bt_strength": round(strength, 4),
+            "elo": round(1500 + 400 * math.log10(strength), 1),
+        })
+    rows.sort(key=lambda r: (-r["elo"], r["average_rank"]))
+
+    leaderboard: Dict[str, Any] = {"models": rows, "messages": messages}
+    if include_pairwise:
+        leaderboard["pairwise"] = [
+            {"winner": winner, "loser": loser, "wins": count} for (winner, loser), count in sorted(wins.items())
+        ]
+    return leaderboard
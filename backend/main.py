@@ -1,35 +1,195 @@
 """FastAPI backend for LLM Council."""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Query, Path, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from fastapi.responses import StreamingResponse, Response, JSONResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Any, Literal
+from contextlib import asynccontextmanager, aclosing, suppress
 import uuid
-import json
 import asyncio
 
-from . import storage
-from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings, run_stage1_for_model, run_stage2_for_model
-from .openrouter import fetch_available_models
-
-app = FastAPI(title="LLM Council API")
+from . import storage, metrics, search, leaderboard, model_stats, history, generation
+from .tracing import TracingMiddleware
+from .dispatcher import PriorityMiddleware
+from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, stage2_and_stage3, calculate_aggregate_rankings, run_stage1_for_model, run_stage2_for_model, plain_label_to_model
+from .openrouter import fetch_available_models, get_model_info, close_http_client
+from .warmup import warm_up, WARMUP_STATE
+from .admission import council_admission, OverloadedError
+from .serialization import sse_event, dumps
+from .compression import add_compression
+from .http_cache import conversation_validators, is_not_modified
+from .config import HTTP_COMPRESSION_MIN_BYTES
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background so liveness is immediate and /ready flips when done."""
+    warmup_task = asyncio.create_task(warm_up())
+    yield
+    warmup_task.cancel()
+    await close_http_client()
+    model_stats.flush()
+
+
+app = FastAPI(title="LLM Council API", lifespan=lifespan)
+
+# Browser origins allowed to call the API (CORS) and to open the council WebSocket
+ALLOWED_ORIGINS = [
+    "http://localhost:5173",
+    "http://localhost:3000",
+    "http://localhost:5174",
+    "http://localhost:5175",
+]
+
+# Trace every request (no-op unless TRACE_EXPORTER is set)
+app.add_middleware(TracingMiddleware)
+
+# Tag upstream calls with the request's priority class (X-Council-Priority header)
+app.add_middleware(PriorityMiddleware)
+
+# Compress large JSON responses (SSE streams are left uncompressed)
+add_compression(app, HTTP_COMPRESSION_MIN_BYTES)
 
 # Enable CORS for local development
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173",
-        "http://localhost:3000",
-        "http://localhost:5174",
-        "http://localhost:5175",
-    ],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
 
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request, exc: OverloadedError):
+    """Shed load with a fast 503 telling the client when to retry."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+class _AdmittedStream:
+    """
+    An event generator run behind admission control.
+
+    The slot is requested on construction, so a full queue fails the request
+    with 503 (OverloadedError) before the stream starts. While waiting,
+    `queued` events report the run's position in the queue. The ticket is
+    released by release()/aclose(), which the owner must call even if the
+    stream was never iterated (client gone or run cancelled before it began).
+    """
+
+    def __init__(self, events):
+        self.ticket = council_admission.enter()
+        self._events = events
+        self._generator = self._run()
+
+    async def _run(self):
+        try:
+            async for position in council_admission.wait(self.ticket):
+                yield {'type': 'queued', 'position': position}
+            async with aclosing(self._events):
+                async for event in self._events:
+                    yield event
+        except OverloadedError as e:
+            yield {'type': 'error', 'message': str(e), 'retry_after': e.retry_after}
+        finally:
+            self.ticket.release()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self._generator.__anext__()
+
+    def release(self):
+        """Give up the admission slot (or queue place). Idempotent."""
+        self.ticket.release()
+
+    async def aclose(self):
+        """Release the slot, then stop the run."""
+        self.release()
+        await self._generator.aclose()
+
+
+@asynccontextmanager
+async def _council_run(conversation: Dict[str, Any]):
+    """Hold an admission slot and apply the conversation's generation settings."""
+    async with council_admission.admit():
+        with generation.overrides(conversation.get("generation")):
+            yield
+
+
+async def _generation_stream(events, settings: Dict[str, Any] | None):
+    """
+    Produce a stream's events under a conversation's generation settings.
+
+    The events come from a task started with the settings applied, one event
+    per request: this generator may be closed from another task than the one
+    iterating it (an SSE response closes it once its body task has ended), and
+    a context variable set here could not be reset there.
+    """
+    handoff: asyncio.Queue = asyncio.Queue()
+    end = object()
+
+    async def produce():
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    handoff.put_nowait(event)
+                    # Wait until the next event is asked for
+                    await handoff.join()
+        finally:
+            handoff.put_nowait(end)
+
+    with generation.overrides(settings):
+        producer = asyncio.create_task(produce())
+    try:
+        while (event := await handoff.get()) is not end:
+            yield event
+            handoff.task_done()
+        # Raise what ended the events, if anything
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.wait([producer])
+
+
+def _council_stream(conversation: Dict[str, Any], events) -> _AdmittedStream:
+    """Event stream for a council run: admitted, with the conversation's generation settings."""
+    return _AdmittedStream(_generation_stream(events, conversation.get("generation")))
+
+
+class _SSEResponse(StreamingResponse):
+    """Serves a council event stream as Server-Sent Events, closing it however the response ends."""
+
+    def __init__(self, events: _AdmittedStream):
+        self._events = events
+
+        async def body():
+            async for event in events:
+                yield sse_event(event)
+
+        super().__init__(
+            body(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+            }
+        )
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Also covers a client that left before the body was iterated
+            await self._events.aclose()
+
+
 class CreateConversationRequest(BaseModel):
     """Request to create a new conversation."""
     pass
@@ -62,6 +222,89 @@ class Conversation(BaseModel):
     messages: List[Dict[str, Any]]
     council_models: List[str] | None = None
     chairman_model: str | None = None
+    generation: Dict[str, Any] | None = None
+    revision: int | None = None
+    updated_at: str | None = None
+    message_count: int | None = None
+    next_cursor: int | None = None
+
+
+class MessageWindow(BaseModel):
+    """A window of messages from a conversation."""
+    messages: List[Dict[str, Any]]
+    cursor: int
+    next_cursor: int | None = None
+    message_count: int
+
+
+# "full" returns stage bodies; "summary" omits Stage 1 responses, Stage 2
+# critiques and the Stage 3 answer (fetch them per message or per stage)
+View = Literal["full", "summary"]
+
+# Stage text fields omitted by the summary view: stage -> body key
+_STAGE_BODIES = {"stage1": "response", "stage2": "ranking", "stage3": "response"}
+
+
+def _summarize_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a message without its stage bodies."""
+    if message.get("role") != "assistant":
+        return message
+    summary = dict(message)
+    for stage, body in _STAGE_BODIES.items():
+        value = summary.get(stage)
+        if isinstance(value, list):
+            summary[stage] = [{k: v for k, v in r.items() if k != body} for r in value if isinstance(r, dict)]
+        elif isinstance(value, dict):
+            summary[stage] = {k: v for k, v in value.items() if k != body}
+    return summary
+
+
+def _project(messages: List[Dict[str, Any]], view: str) -> List[Dict[str, Any]]:
+    return [_summarize_message(m) for m in messages] if view == "summary" else messages
+
+
+def _conditional(conversation_id: str, request: Request, response: Response) -> Response | None:
+    """
+    Validate a conditional GET against the conversation's revision.
+
+    Returns:
+        A 304 response if the client's copy is current, otherwise None (with
+        the validators set on `response`)
+    """
+    version = storage.get_conversation_version(conversation_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    etag, last_modified = conversation_validators(version)
+    # no-cache: clients may store the response but must revalidate every time
+    validators = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=validators)
+    response.headers.update(validators)
+    return None
+
+
+# Document kinds that can be searched
+SearchStage = Literal["title", "prompt", "stage1", "stage2", "stage3"]
+
+
+class SearchResult(BaseModel):
+    """A matching document with a highlighted snippet (HTML-escaped text, matches in <mark> tags)."""
+    conversation_id: str
+    conversation_title: str
+    message_index: int | None = None
+    stage: str
+    model: str | None = None
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    offset: int
+    limit: int
+    has_more: bool
 
 
 class RerunRequest(BaseModel):
@@ -69,9 +312,28 @@ class RerunRequest(BaseModel):
     content: str | None = None
 
 
+class SocketMessage(BaseModel):
+    """
+    A client message on the council WebSocket.
+
+    "run" sends `content` to a conversation (like message/stream, with `mode`),
+    "continue" continues the paused message at `message_index`, "rerun" reruns
+    it in full (with `content` as the new prompt, if given) and "cancel" stops
+    the run with `run_id`.
+    """
+    type: Literal["run", "continue", "rerun", "cancel"]
+    run_id: str = Field(min_length=1)
+    conversation_id: str | None = None
+    message_index: int | None = None
+    content: str | None = None
+    mode: str = Field(default="auto", pattern=r"^(auto|step)$")
+
+
 class UpdateConfigRequest(BaseModel):
     council_models: List[str] | None = None
     chairman_model: str | None = None
+    # Generation settings layered over GENERATION_PARAMS (see backend.generation)
+    generation: Dict[str, Any] | None = None
 
 
 @app.get("/")
@@ -80,6 +342,19 @@ async def root():
     return {"status": "ok", "service": "LLM Council API"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness check: 200 once startup warm-up has finished, 503 before."""
+    status_code = 200 if WARMUP_STATE["ready"] else 503
+    return JSONResponse(status_code=status_code, content=WARMUP_STATE)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics for upstream providers, council stages and storage."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/api/models")
 async def list_models():
     models, from_cache = await fetch_available_models()
@@ -92,6 +367,41 @@ async def list_conversations():
     return storage.list_conversations()
 
 
+@app.get("/api/search", response_model=SearchResponse)
+async def search_conversations(
+    q: str = Query(min_length=1, max_length=500),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    stage: List[SearchStage] | None = Query(default=None),
+    conversation_id: str | None = None,
+):
+    """
+    Full-text search over titles, prompts and stage outputs, best match first.
+    Repeat `stage` to restrict the document kinds searched.
+    """
+    if not search.is_available():
+        raise HTTPException(status_code=503, detail="Search is not available")
+
+    results, has_more = search.search(q, limit, offset, stage, conversation_id)
+    metadata = storage.get_conversation_metadata(list({r["conversation_id"] for r in results}))
+    # Skip hits for conversations deleted behind the index's back
+    results = [
+        {**r, "conversation_title": metadata[r["conversation_id"]]["title"]}
+        for r in results if r["conversation_id"] in metadata
+    ]
+    return {"query": q, "results": results, "offset": offset, "limit": limit, "has_more": has_more}
+
+
+@app.get("/api/leaderboard")
+async def get_leaderboard(include_pairwise: bool = False):
+    """
+    Model standings across all conversations, from Stage 2 peer rankings.
+    Served from running totals (updated on every save), not by rescanning
+    conversations.
+    """
+    return leaderboard.get_leaderboard(include_pairwise)
+
+
 @app.post("/api/conversations", response_model=Conversation)
 async def create_conversation(request: CreateConversationRequest):
     """Create a new conversation."""
@@ -101,13 +411,118 @@ async def create_conversation(request: CreateConversationRequest):
 
 
 @app.get("/api/conversations/{conversation_id}", response_model=Conversation)
-async def get_conversation(conversation_id: str):
-    """Get a specific conversation with all its messages."""
-    conversation = storage.get_conversation(conversation_id)
+async def get_conversation(
+    conversation_id: str,
+    request: Request,
+    response: Response,
+    view: View = "full",
+    cursor: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1, le=500),
+):
+    """
+    Get a specific conversation with its messages.
+    Optionally returns a window of `limit` messages starting at `cursor`, and
+    the "summary" view without stage bodies. Supports conditional GETs:
+    unchanged conversations get 304 Not Modified.
+    """
+    not_modified = _conditional(conversation_id, request, response)
+    if not_modified is not None:
+        return not_modified
+
+    if cursor == 0 and limit is None:
+        conversation = storage.get_conversation(conversation_id)
+        if conversation is not None:
+            conversation["message_count"] = len(conversation["messages"])
+    else:
+        conversation = storage.get_conversation_slice(conversation_id, cursor, None if limit is None else cursor + limit)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
+
+    end = cursor + len(conversation["messages"])
+    conversation["next_cursor"] = end if end < conversation["message_count"] else None
+    conversation["messages"] = _project(conversation["messages"], view)
     return conversation
 
+
+@app.get("/api/conversations/{conversation_id}/messages", response_model=MessageWindow)
+async def list_messages(
+    conversation_id: str,
+    request: Request,
+    response: Response,
+    view: View = "full",
+    cursor: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=500),
+):
+    """Get a window of `limit` messages starting at `cursor`."""
+    not_modified = _conditional(conversation_id, request, response)
+    if not_modified is not None:
+        return not_modified
+
+    conversation = storage.get_conversation_slice(conversation_id, cursor, cursor + limit)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    end = cursor + len(conversation["messages"])
+    return {
+        "messages": _project(conversation["messages"], view),
+        "cursor": cursor,
+        "next_cursor": end if end < conversation["message_count"] else None,
+        "message_count": conversation["message_count"],
+    }
+
+
+def _load_message(conversation_id: str, message_index: int) -> Dict[str, Any]:
+    msg = storage.get_message(conversation_id, message_index)
+    if msg is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return msg
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{message_index}")
+async def get_message(conversation_id: str, message_index: int, request: Request, response: Response, view: View = "full"):
+    """Get a single message."""
+    not_modified = _conditional(conversation_id, request, response)
+    if not_modified is not None:
+        return not_modified
+    return _project([_load_message(conversation_id, message_index)], view)[0]
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{message_index}/{stage}")
+async def get_message_stage(
+    conversation_id: str,
+    message_index: int,
+    request: Request,
+    response: Response,
+    stage: str = Path(pattern=r"^stage[123]$"),
+):
+    """Get one stage of an assistant message, with full bodies."""
+    not_modified = _conditional(conversation_id, request, response)
+    if not_modified is not None:
+        return not_modified
+    msg = _load_message(conversation_id, message_index)
+    if msg.get("role") != "assistant":
+        raise HTTPException(status_code=404, detail="Assistant message not found")
+    return {"stage": stage, "data": msg.get(stage)}
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{message_index}/{stage}/model/{model_name:path}")
+async def get_message_stage_model(
+    conversation_id: str,
+    message_index: int,
+    model_name: str,
+    request: Request,
+    response: Response,
+    stage: str = Path(pattern=r"^stage[12]$"),
+):
+    """Get a single model's Stage 1 response or Stage 2 critique."""
+    not_modified = _conditional(conversation_id, request, response)
+    if not_modified is not None:
+        return not_modified
+    msg = _load_message(conversation_id, message_index)
+    for entry in msg.get(stage) or []:
+        if entry.get("model") == model_name:
+            return entry
+    raise HTTPException(status_code=404, detail=f"No {stage} entry for model {model_name}")
+
 @app.patch("/api/conversations/{conversation_id}/title")
 async def update_conversation_title_endpoint(conversation_id: str, request: UpdateTitleRequest):
     import re
@@ -130,8 +545,8 @@ async def update_conversation_config_endpoint(conversation_id: str, request: Upd
     conversation = storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    models_payload, _ = await fetch_available_models()
-    available_ids = {m.get("id") for m in models_payload}
+    # Ensures the catalog is loaded; lookups below use its id index
+    await fetch_available_models()
     updates: Dict[str, Any] = {}
     if request.council_models is not None:
         cleaned = []
@@ -142,19 +557,28 @@ async def update_conversation_config_endpoint(conversation_id: str, request: Upd
             m = mid.strip()
             if not m or m in seen:
                 continue
-            if m not in available_ids:
+            if get_model_info(m) is None:
                 raise HTTPException(status_code=400, detail=f"Unknown model: {m}")
             seen.add(m)
             cleaned.append(m)
         updates["council_models"] = cleaned
     if request.chairman_model is not None:
         cm = request.chairman_model.strip()
-        if cm and cm not in available_ids:
+        if cm and get_model_info(cm) is None:
             raise HTTPException(status_code=400, detail="Unknown chairman model")
         updates["chairman_model"] = cm
+    if request.generation is not None:
+        try:
+            updates["generation"] = generation.validate(request.generation)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     storage.update_conversation_config(conversation_id, updates)
     updated = storage.get_conversation(conversation_id)
-    return {"ok": True, "config": {"council_models": updated.get("council_models"), "chairman_model": updated.get("chairman_model")}}
+    return {"ok": True, "config": {
+        "council_models": updated.get("council_models"),
+        "chairman_model": updated.get("chairman_model"),
+        "generation": updated.get("generation") or {},
+    }}
 
 @app.delete("/api/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
@@ -178,28 +602,35 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
     # Check if this is the first message
     is_first_message = len(conversation["messages"]) == 0
 
-    # Add user message
-    storage.add_user_message(conversation_id, request.content)
-
-    # If this is the first message, generate a title
-    if is_first_message:
-        title = await generate_conversation_title(request.content)
-        storage.update_conversation_title(conversation_id, title)
-
-    # Run the 3-stage council process
-    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
-        request.content,
-        conversation.get("council_models"),
-        conversation.get("chairman_model"),
-    )
-
-    # Add assistant message with all stages
-    storage.add_assistant_message(
-        conversation_id,
-        stage1_results,
-        stage2_results,
-        stage3_result
-    )
+    async with _council_run(conversation):
+        # Earlier turns (within the history budget) give follow-ups their context
+        context = await history.get_context(conversation, len(conversation["messages"]))
+
+        # Add user message
+        storage.add_user_message(conversation_id, request.content)
+
+        # If this is the first message, generate a title
+        if is_first_message:
+            title = await generate_conversation_title(request.content)
+            storage.update_conversation_title(conversation_id, title)
+
+        # Run the 3-stage council process
+        stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
+            request.content,
+            conversation.get("council_models"),
+            conversation.get("chairman_model"),
+            context,
+        )
+
+        # Add assistant message with all stages
+        storage.add_assistant_message(
+            conversation_id,
+            stage1_results,
+            stage2_results,
+            stage3_result,
+            metadata,
+        )
+        history.schedule_summary(conversation_id)
 
     # Return the complete response with metadata
     return {
@@ -210,113 +641,166 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
     }
 
 
-@app.post("/api/conversations/{conversation_id}/message/stream")
-async def send_message_stream(conversation_id: str, request: SendMessageRequest):
+async def _stage2_and_stage3_events(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    conversation: Dict[str, Any],
+    metadata: Dict[str, Any],
+    context: List[Dict[str, str]],
+    outcome: Dict[str, Any],
+):
     """
-    Send a message and stream the 3-stage council process.
-    Returns Server-Sent Events as each stage completes.
+    Stream Stages 2 and 3 of a full run. The chairman may start before the last
+    rankings arrive (STAGE3_SPECULATIVE).
+
+    `metadata` is updated in place; 'stage2' and 'stage3' are set in `outcome`.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    yield {'type': 'stage2_start'}
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def chairman_started(rankings, label_to_model, speculation):
+        partial = {
+            **metadata,
+            'label_to_model': label_to_model,
+            'aggregate_rankings': calculate_aggregate_rankings(rankings, label_to_model),
+        }
+        if speculation:
+            partial['stage3_speculation'] = speculation
+        queue.put_nowait({'type': 'stage2_complete', 'data': rankings, 'metadata': partial})
+        queue.put_nowait({'type': 'stage3_start'})
+
+    task = asyncio.create_task(stage2_and_stage3(
+        user_query,
+        stage1_results,
+        conversation.get("council_models"),
+        conversation.get("chairman_model"),
+        on_chairman_start=chairman_started,
+        on_chairman_complete=lambda result: queue.put_nowait({'type': 'stage3_complete', 'data': result}),
+        history=context,
+    ))
+    async for event in _stream_task_events(task, queue):
+        yield event
+    stage2_results, label_to_model, stage3_result, speculation = task.result()
+    aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+    metadata.update({'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings})
+    if speculation:
+        # Late rankings arrived after the chairman started
+        metadata['stage3_speculation'] = speculation
+        yield {'type': 'stage2_complete', 'data': stage2_results, 'metadata': metadata}
+    outcome.update({'stage2': stage2_results, 'stage3': stage3_result})
+
+
+async def _message_events(conversation: Dict[str, Any], request: SendMessageRequest):
+    """Events of a new message's council run (see send_message_stream)."""
+    conversation_id = conversation["id"]
 
     # Check if this is the first message
     is_first_message = len(conversation["messages"]) == 0
 
-    async def event_generator():
-        try:
-            # Add user message
-            storage.add_user_message(conversation_id, request.content)
-
-            # Start title generation in parallel (don't await yet)
-            title_task = None
-            if is_first_message:
-                title_task = asyncio.create_task(generate_conversation_title(request.content))
-
-            # Stage 1: Collect responses
-            yield f"data: {json.dumps({'type': 'stage1_start'})}\n\n"
-            stage1_results = await stage1_collect_responses(request.content, conversation.get("council_models"))
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
-
-            # If step mode, persist partial result and pause
-            if request.mode == "step":
-                # Title generation completion
-                if title_task:
-                    title = await title_task
-                    storage.update_conversation_title(conversation_id, title)
-                    yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
-
-                # Save partial assistant message (Stage 1 only)
-                storage.add_assistant_message(
-                    conversation_id,
-                    stage1_results,
-                    None,
-                    None,
-                )
-
-                # Persist paused state so UI can show Continue across sessions
-                try:
-                    conv = storage.get_conversation(conversation_id)
-                    if conv and isinstance(conv.get("messages"), list) and len(conv["messages"]) > 0:
-                        last_index = len(conv["messages"]) - 1
-                        storage.update_message(conversation_id, last_index, {
-                            "paused": True,
-                            "pausedStage": "stage1",
-                        })
-                except Exception:
-                    # Non-fatal; continue streaming paused event
-                    pass
-
-                # Emit paused event and stop stream
-                yield f"data: {json.dumps({'type': 'paused', 'stage': 'stage1'})}\n\n"
-                return
-
-            # Stage 2: Collect rankings
-            yield f"data: {json.dumps({'type': 'stage2_start'})}\n\n"
-            stage2_results, label_to_model = await stage2_collect_rankings(request.content, stage1_results, conversation.get("council_models"))
-            aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
-            yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})}\n\n"
-
-            # Stage 3: Synthesize final answer
-            yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
-            stage3_result = await stage3_synthesize_final(request.content, stage1_results, stage2_results, conversation.get("chairman_model"))
-            yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
-
-            # Wait for title generation if it was started
+    try:
+        # Earlier turns (within the history budget) give follow-ups their context
+        context = await history.get_context(conversation, len(conversation["messages"]))
+
+        # Add user message
+        storage.add_user_message(conversation_id, request.content)
+
+        # Start title generation in parallel (don't await yet)
+        title_task = None
+        if is_first_message:
+            title_task = asyncio.create_task(generate_conversation_title(request.content))
+
+        # Stage 1: Collect responses
+        yield {'type': 'stage1_start'}
+        selection: Dict[str, Any] = {}
+        stage1_results = await stage1_collect_responses(request.content, conversation.get("council_models"), selection, context)
+        # Adaptive mode: which members were queried or skipped, and why
+        metadata = {"council_selection": selection} if selection else {}
+        yield {'type': 'stage1_complete', 'data': stage1_results, **({'metadata': metadata} if metadata else {})}
+
+        # If step mode, persist partial result and pause
+        if request.mode == "step":
+            # Title generation completion
             if title_task:
                 title = await title_task
                 storage.update_conversation_title(conversation_id, title)
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
+                yield {'type': 'title_complete', 'data': {'title': title}}
 
-            # Save complete assistant message
+            # Save partial assistant message (Stage 1 only)
             storage.add_assistant_message(
                 conversation_id,
                 stage1_results,
-                stage2_results,
-                stage3_result
+                None,
+                None,
+                metadata,
             )
 
-            # Send completion event
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            # Persist paused state so UI can show Continue across sessions
+            try:
+                conv = storage.get_conversation(conversation_id)
+                if conv and isinstance(conv.get("messages"), list) and len(conv["messages"]) > 0:
+                    last_index = len(conv["messages"]) - 1
+                    storage.update_message(conversation_id, last_index, {
+                        "paused": True,
+                        "pausedStage": "stage1",
+                    })
+            except Exception:
+                # Non-fatal; continue streaming paused event
+                pass
+
+            # Emit paused event and stop stream
+            yield {'type': 'paused', 'stage': 'stage1'}
+            return
+
+        # Stage 2: Collect rankings; Stage 3: Synthesize final answer
+        outcome: Dict[str, Any] = {}
+        async for event in _stage2_and_stage3_events(request.content, stage1_results, conversation, metadata, context, outcome):
+            yield event
+
+        # Wait for title generation if it was started
+        if title_task:
+            title = await title_task
+            storage.update_conversation_title(conversation_id, title)
+            yield {'type': 'title_complete', 'data': {'title': title}}
+
+        # Save complete assistant message
+        storage.add_assistant_message(
+            conversation_id,
+            stage1_results,
+            outcome['stage2'],
+            outcome['stage3'],
+            metadata,
+        )
+        history.schedule_summary(conversation_id)
+
+        # Send completion event
+        yield {'type': 'complete'}
+
+    except Exception as e:
+        # Send error event
+        yield {'type': 'error', 'message': str(e)}
 
-        except Exception as e:
-            # Send error event
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        }
-    )
 
-@app.post("/api/conversations/{conversation_id}/messages/{message_index}/continue")
-async def continue_to_next_stage(conversation_id: str, message_index: int):
+@app.post("/api/conversations/{conversation_id}/message/stream")
+async def send_message_stream(conversation_id: str, request: SendMessageRequest):
     """
-    Continue step-by-step execution to the next stage for a specific assistant message.
+    Send a message and stream the 3-stage council process.
+    Returns Server-Sent Events as each stage completes.
+    """
+    # Check if conversation exists
+    conversation = storage.get_conversation(conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    return _SSEResponse(_council_stream(conversation, _message_events(conversation, request)))
+
+
+def _load_step_context(conversation_id: str, message_index: int):
+    """
+    Load the conversation, assistant message and user prompt for a message-level run
+    (step-mode continue or rerun).
+
+    Returns:
+        Tuple of (conversation, assistant message, user query)
     """
     conversation = storage.get_conversation(conversation_id)
     if conversation is None:
@@ -333,39 +817,79 @@ async def continue_to_next_stage(conversation_id: str, message_index: int):
     if user_msg is None or user_msg.get("role") != "user":
         raise HTTPException(status_code=400, detail="Previous user message not found")
 
-    user_query = user_msg.get("content", "")
+    return conversation, msg, user_msg.get("content", "")
+
+
+async def _stream_task_events(task: asyncio.Task, queue: asyncio.Queue):
+    """
+    Yield events queued by `task` until it finishes.
+
+    The task's result is left on the task; remaining queued events are flushed
+    once it completes. The task is cancelled if the stream is closed early
+    (client gone or run cancelled).
+    """
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            try:
+                done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if not getter.done():
+                    getter.cancel()
+            if getter in done:
+                yield getter.result()
+                continue
+            break
+        while not queue.empty():
+            yield queue.get_nowait()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+@app.post("/api/conversations/{conversation_id}/messages/{message_index}/continue")
+async def continue_to_next_stage(conversation_id: str, message_index: int):
+    """
+    Continue step-by-step execution to the next stage for a specific assistant message.
+    """
+    conversation, msg, user_query = _load_step_context(conversation_id, message_index)
 
     # Decide which stage to run next
     if msg.get("stage1") is not None and msg.get("stage2") is None:
         # Run Stage 2
-        stage2_results, label_to_model = await stage2_collect_rankings(user_query, msg["stage1"])
+        async with _council_run(conversation):
+            context = await history.get_context(conversation, message_index - 1)
+            stage2_results, label_to_model = await stage2_collect_rankings(user_query, msg["stage1"], conversation.get("council_models"), history=context)
         aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+        # Keep what Stage 1 recorded (e.g. the council selection)
+        metadata = {
+            **(msg.get("metadata") or {}),
+            "label_to_model": label_to_model,
+            "aggregate_rankings": aggregate_rankings,
+        }
         storage.update_message(conversation_id, message_index, {
             "stage2": stage2_results,
-            "metadata": {
-                "label_to_model": label_to_model,
-                "aggregate_rankings": aggregate_rankings,
-            },
+            "metadata": metadata,
             "paused": True,
             "pausedStage": "stage2",
         })
         return {
             "stage": "stage2",
             "data": stage2_results,
-            "metadata": {
-                "label_to_model": label_to_model,
-                "aggregate_rankings": aggregate_rankings,
-            }
+            "metadata": metadata,
         }
 
     if msg.get("stage2") is not None and msg.get("stage3") is None:
         # Run Stage 3
-        stage3_result = await stage3_synthesize_final(user_query, msg["stage1"], msg["stage2"], conversation.get("chairman_model"))
+        async with _council_run(conversation):
+            context = await history.get_context(conversation, message_index - 1)
+            stage3_result = await stage3_synthesize_final(user_query, msg["stage1"], msg["stage2"], conversation.get("chairman_model"), history=context)
         storage.update_message(conversation_id, message_index, {
             "stage3": stage3_result,
             "paused": False,
             "pausedStage": None,
         })
+        history.schedule_summary(conversation_id, message_index)
         return {
             "stage": "stage3",
             "data": stage3_result
@@ -375,43 +899,155 @@ async def continue_to_next_stage(conversation_id: str, message_index: int):
     return {"stage": "complete"}
 
 
+async def _continue_events(conversation: Dict[str, Any], msg: Dict[str, Any], user_query: str, message_index: int):
+    """Events of a step-mode continue (see continue_to_next_stage_stream)."""
+    conversation_id = conversation["id"]
+    queue: asyncio.Queue = asyncio.Queue()
+    try:
+        context = await history.get_context(conversation, message_index - 1)
+        if msg.get("stage1") is not None and msg.get("stage2") is None:
+            # Stage 2: stream each ranker's critique
+            yield {'type': 'stage2_start'}
+            task = asyncio.create_task(stage2_collect_rankings(
+                user_query,
+                msg["stage1"],
+                conversation.get("council_models"),
+                on_event=queue.put_nowait,
+                history=context,
+            ))
+            async for event in _stream_task_events(task, queue):
+                yield event
+            stage2_results, label_to_model = task.result()
+            aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+            metadata = {
+                **(msg.get("metadata") or {}),
+                "label_to_model": label_to_model,
+                "aggregate_rankings": aggregate_rankings,
+            }
+            storage.update_message(conversation_id, message_index, {
+                "stage2": stage2_results,
+                "metadata": metadata,
+                "paused": True,
+                "pausedStage": "stage2",
+            })
+            yield {'type': 'stage2_complete', 'data': stage2_results, 'metadata': metadata}
+            yield {'type': 'paused', 'stage': 'stage2'}
+            return
+
+        if msg.get("stage2") is not None and msg.get("stage3") is None:
+            # Stage 3: stream the chairman's synthesis
+            yield {'type': 'stage3_start'}
+            task = asyncio.create_task(stage3_synthesize_final(
+                user_query,
+                msg["stage1"],
+                msg["stage2"],
+                conversation.get("chairman_model"),
+                on_event=queue.put_nowait,
+                history=context,
+            ))
+            async for event in _stream_task_events(task, queue):
+                yield event
+            stage3_result = task.result()
+            storage.update_message(conversation_id, message_index, {
+                "stage3": stage3_result,
+                "paused": False,
+                "pausedStage": None,
+            })
+            history.schedule_summary(conversation_id, message_index)
+            yield {'type': 'stage3_complete', 'data': stage3_result}
+
+        # Nothing (more) to do
+        yield {'type': 'complete'}
+
+    except Exception as e:
+        # Send error event
+        yield {'type': 'error', 'message': str(e)}
+
+
+@app.post("/api/conversations/{conversation_id}/messages/{message_index}/continue/stream")
+async def continue_to_next_stage_stream(conversation_id: str, message_index: int):
+    """
+    Continue step-by-step execution and stream the next stage.
+    Returns Server-Sent Events with per-model progress and token deltas.
+    """
+    conversation, msg, user_query = _load_step_context(conversation_id, message_index)
+
+    return _SSEResponse(_council_stream(conversation, _continue_events(conversation, msg, user_query, message_index)))
+
+
+def _new_prompt(content: str | None) -> str | None:
+    """The replacement prompt of a full rerun, if one was given."""
+    if content is None or content.strip() == "":
+        return None
+    return content
+
+
+def _save_rerun(conversation_id: str, message_index: int, results: Dict[str, Any], content: str | None):
+    """
+    Store a full rerun's results, and its new prompt (if any) over the user
+    message, in one write once the run has completed, so a shed or failed run
+    leaves prompt and answer matching.
+    """
+    updates = {message_index: results}
+    if _new_prompt(content) is not None:
+        updates[message_index - 1] = {"content": content}
+    storage.update_messages(conversation_id, updates)
+
+
+async def _rerun_events(conversation: Dict[str, Any], message_index: int, user_query: str, content: str | None = None):
+    """Events of a full rerun of an assistant message (with `content` as the new prompt, if given), in the send_message_stream schema."""
+    conversation_id = conversation["id"]
+    user_query = _new_prompt(content) or user_query
+    try:
+        context = await history.get_context(conversation, message_index - 1)
+
+        yield {'type': 'stage1_start'}
+        selection: Dict[str, Any] = {}
+        stage1_results = await stage1_collect_responses(user_query, conversation.get("council_models"), selection, context)
+        metadata = {"council_selection": selection} if selection else {}
+        yield {'type': 'stage1_complete', 'data': stage1_results, **({'metadata': metadata} if metadata else {})}
+
+        outcome: Dict[str, Any] = {}
+        async for event in _stage2_and_stage3_events(user_query, stage1_results, conversation, metadata, context, outcome):
+            yield event
+
+        _save_rerun(conversation_id, message_index, {
+            "stage1": stage1_results,
+            "stage2": outcome['stage2'],
+            "stage3": outcome['stage3'],
+            "metadata": metadata,
+        }, content)
+        history.schedule_summary(conversation_id, message_index)
+        yield {'type': 'complete'}
+
+    except Exception as e:
+        yield {'type': 'error', 'message': str(e)}
+
+
 @app.post("/api/conversations/{conversation_id}/messages/{message_index}/rerun")
 async def rerun_full(conversation_id: str, message_index: int, request: RerunRequest):
     """
     Full rerun of all stages for a specific assistant message.
     Optionally replace the preceding user message content.
     """
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    conversation, _, user_query = _load_step_context(conversation_id, message_index)
 
-    # Validate assistant message index
-    msg = storage.get_message(conversation_id, message_index)
-    if msg is None or msg.get("role") != "assistant":
-        raise HTTPException(status_code=404, detail="Assistant message not found")
-
-    # Get the preceding user message
-    if message_index - 1 < 0:
-        raise HTTPException(status_code=400, detail="Invalid message index")
-    user_msg = storage.get_message(conversation_id, message_index - 1)
-    if user_msg is None or user_msg.get("role") != "user":
-        raise HTTPException(status_code=400, detail="Previous user message not found")
-
-    # Override prompt if provided
-    user_query = request.content if (request.content is not None and request.content.strip() != "") else user_msg.get("content", "")
-    if request.content is not None and request.content.strip() != "":
-        storage.update_message(conversation_id, message_index - 1, {"content": request.content})
+    # Override prompt if provided (stored with the results)
+    user_query = _new_prompt(request.content) or user_query
 
     # Run full council
-    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(user_query, conversation.get("council_models"), conversation.get("chairman_model"))
+    async with _council_run(conversation):
+        context = await history.get_context(conversation, message_index - 1)
+        stage1_results, stage2_results, stage3_result, metadata = await run_full_council(user_query, conversation.get("council_models"), conversation.get("chairman_model"), context)
 
-    # Update assistant message
-    storage.update_message(conversation_id, message_index, {
+    # Update assistant message (and the prompt)
+    _save_rerun(conversation_id, message_index, {
         "stage1": stage1_results,
         "stage2": stage2_results,
         "stage3": stage3_result,
         "metadata": metadata,
-    })
+    }, request.content)
+    history.schedule_summary(conversation_id, message_index)
 
     return {
         "stage1": stage1_results,
@@ -427,17 +1063,11 @@ async def rerun_stage1_model(conversation_id: str, message_index: int, model_nam
     Rerun Stage 1 for a specific model and update the assistant message.
     """
     # Validate
-    msg = storage.get_message(conversation_id, message_index)
-    if msg is None or msg.get("role") != "assistant":
-        raise HTTPException(status_code=404, detail="Assistant message not found")
-    user_msg = storage.get_message(conversation_id, message_index - 1)
-    if user_msg is None or user_msg.get("role") != "user":
-        raise HTTPException(status_code=400, detail="Previous user message not found")
-
-    user_query = user_msg.get("content", "")
+    conversation, msg, user_query = _load_step_context(conversation_id, message_index)
 
     # Run single model
-    entry = await run_stage1_for_model(user_query, model_name)
+    async with _council_run(conversation):
+        entry = await run_stage1_for_model(user_query, model_name, await history.get_context(conversation, message_index - 1))
 
     # Replace or append in stage1
     stage1 = msg.get("stage1") or []
@@ -460,18 +1090,22 @@ async def rerun_stage2_model(conversation_id: str, message_index: int, model_nam
     Rerun Stage 2 for a specific model and update the assistant message.
     Also recalculates aggregate rankings.
     """
-    msg = storage.get_message(conversation_id, message_index)
-    if msg is None or msg.get("role") != "assistant":
-        raise HTTPException(status_code=404, detail="Assistant message not found")
-    user_msg = storage.get_message(conversation_id, message_index - 1)
-    if user_msg is None or user_msg.get("role") != "user":
-        raise HTTPException(status_code=400, detail="Previous user message not found")
-
-    user_query = user_msg.get("content", "")
+    conversation, msg, user_query = _load_step_context(conversation_id, message_index)
     stage1_results = msg.get("stage1") or []
 
     # Run single ranking
-    entry, label_to_model = await run_stage2_for_model(user_query, stage1_results, model_name)
+    async with _council_run(conversation):
+        # A sparse-mode ranker reranks the same subset of responses
+        subset = next((r.get("subset") for r in msg.get("stage2") or [] if r.get("model") == model_name), None)
+        # Keep the labels the other rankings were made under (messages stored
+        # without them were ranked one label per response)
+        labels = (msg.get("metadata") or {}).get("label_to_model")
+        if not labels and msg.get("stage2"):
+            labels = plain_label_to_model(stage1_results)
+        entry, label_to_model = await run_stage2_for_model(
+            user_query, stage1_results, model_name, subset, await history.get_context(conversation, message_index - 1),
+            label_to_model=labels,
+        )
 
     # Replace or append in stage2
     stage2 = msg.get("stage2") or []
@@ -485,21 +1119,20 @@ async def rerun_stage2_model(conversation_id: str, message_index: int, model_nam
         stage2.append(entry)
 
     aggregate_rankings = calculate_aggregate_rankings(stage2, label_to_model)
+    metadata = {
+        **(msg.get("metadata") or {}),
+        "label_to_model": label_to_model,
+        "aggregate_rankings": aggregate_rankings,
+    }
 
     storage.update_message(conversation_id, message_index, {
         "stage2": stage2,
-        "metadata": {
-            "label_to_model": label_to_model,
-            "aggregate_rankings": aggregate_rankings,
-        }
+        "metadata": metadata,
     })
 
     return {
         "stage2": stage2,
-        "metadata": {
-            "label_to_model": label_to_model,
-            "aggregate_rankings": aggregate_rankings,
-        }
+        "metadata": metadata,
     }
 
 
@@ -508,20 +1141,133 @@ async def rerun_stage3(conversation_id: str, message_index: int):
     """
     Rerun Stage 3 (final verdict) and update the assistant message.
     """
-    msg = storage.get_message(conversation_id, message_index)
-    if msg is None or msg.get("role") != "assistant":
-        raise HTTPException(status_code=404, detail="Assistant message not found")
-    user_msg = storage.get_message(conversation_id, message_index - 1)
-    if user_msg is None or user_msg.get("role") != "user":
-        raise HTTPException(status_code=400, detail="Previous user message not found")
-
-    user_query = user_msg.get("content", "")
+    conversation, msg, user_query = _load_step_context(conversation_id, message_index)
 
-    stage3_result = await stage3_synthesize_final(user_query, msg.get("stage1") or [], msg.get("stage2") or [])
+    async with _council_run(conversation):
+        stage3_result = await stage3_synthesize_final(
+            user_query, msg.get("stage1") or [], msg.get("stage2") or [], history=await history.get_context(conversation, message_index - 1)
+        )
     storage.update_message(conversation_id, message_index, {"stage3": stage3_result})
+    history.schedule_summary(conversation_id, message_index)
     return {"stage3": stage3_result}
 
 
+def _socket_run_events(message: SocketMessage):
+    """
+    Event generator for a "run", "continue" or "rerun" socket message.
+
+    Raises:
+        HTTPException: Missing fields, or unknown conversation or message
+        OverloadedError: The run was shed by admission control
+    """
+    if message.conversation_id is None:
+        raise HTTPException(status_code=400, detail="conversation_id is required")
+
+    if message.type == "run":
+        conversation = storage.get_conversation(message.conversation_id)
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        if message.content is None:
+            raise HTTPException(status_code=400, detail="content is required")
+        request = SendMessageRequest(content=message.content, mode=message.mode)
+        return _council_stream(conversation, _message_events(conversation, request))
+
+    if message.message_index is None:
+        raise HTTPException(status_code=400, detail="message_index is required")
+    conversation, msg, user_query = _load_step_context(message.conversation_id, message.message_index)
+    if message.type == "continue":
+        return _council_stream(conversation, _continue_events(conversation, msg, user_query, message.message_index))
+    return _council_stream(conversation, _rerun_events(conversation, message.message_index, user_query, message.content))
+
+
+@app.websocket("/api/ws")
+async def council_socket(websocket: WebSocket):
+    """
+    Multiplex council runs, continues and reruns over one WebSocket.
+
+    The client sends SocketMessage JSON, naming each run with a `run_id` of its
+    choosing. Events are those of the matching SSE endpoint, tagged with their
+    'run_id'; a run ends with 'complete', 'paused', 'error' or 'cancelled'.
+    Runs still going when the connection closes are cancelled.
+
+    CORS does not cover WebSockets, so connections from browser origins
+    outside ALLOWED_ORIGINS are refused (1008); clients sending no Origin
+    (not a browser) are accepted, as on the HTTP endpoints.
+    """
+    origin = websocket.headers.get("origin")
+    if origin is not None and origin not in ALLOWED_ORIGINS:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    runs: Dict[str, asyncio.Task] = {}
+    send_lock = asyncio.Lock()
+
+    async def send(event: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_text(dumps(event))
+
+    async def send_cancelled(run_id: str):
+        # The connection may already be gone
+        with suppress(Exception):
+            await send({'run_id': run_id, 'type': 'cancelled'})
+
+    async def pump(run_id: str, events: _AdmittedStream):
+        try:
+            async for event in events:
+                await send({'run_id': run_id, **event})
+        except asyncio.CancelledError:
+            await send_cancelled(run_id)
+        except Exception as e:
+            print(f"Error streaming run {run_id}: {e}")
+        finally:
+            await events.aclose()
+
+    def finished(task: asyncio.Task, run_id: str, events: _AdmittedStream):
+        if runs.get(run_id) is task:
+            del runs[run_id]
+        if task.cancelled():
+            # Cancelled before its first step: pump's cleanup never ran
+            events.release()
+            asyncio.create_task(send_cancelled(run_id))
+
+    try:
+        while True:
+            try:
+                message = SocketMessage.model_validate_json(await websocket.receive_text())
+            except ValidationError as e:
+                await send({'type': 'error', 'message': f"Invalid message: {e.errors()[0]['msg']}"})
+                continue
+
+            if message.type == "cancel":
+                task = runs.get(message.run_id)
+                if task is None:
+                    await send({'run_id': message.run_id, 'type': 'error', 'message': "Unknown run"})
+                else:
+                    task.cancel()
+                continue
+
+            if message.run_id in runs:
+                await send({'run_id': message.run_id, 'type': 'error', 'message': "run_id is already in use"})
+                continue
+            try:
+                events = _socket_run_events(message)
+            except HTTPException as e:
+                await send({'run_id': message.run_id, 'type': 'error', 'message': e.detail})
+                continue
+            except OverloadedError as e:
+                await send({'run_id': message.run_id, 'type': 'error', 'message': str(e), 'retry_after': e.retry_after})
+                continue
+
+            task = asyncio.create_task(pump(message.run_id, events))
+            runs[message.run_id] = task
+            task.add_done_callback(lambda t, run_id=message.run_id, events=events: finished(t, run_id, events))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in list(runs.values()):
+            task.cancel()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
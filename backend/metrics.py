@@ -0,0 +1,265 @@
+"""Prometheus-compatible metrics for council and provider health.
+
+A small in-process registry rendering the Prometheus text exposition format
+(served at `/metrics`), so no client library is required.
+"""
+
+import functools
+import inspect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upstream calls and stages run from sub-second to the 120 s request timeout
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# Storage operations are local file I/O
+STORAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_LOCK = threading.Lock()
+_REGISTRY: List["_Metric"] = []
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Linear-interpolated percentile of a list of values.
+
+    Args:
+        values: Sample values (any order)
+        pct: Percentile in [0, 100]
+
+    Returns:
+        The percentile value, or None for an empty sample
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] | None = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        with _LOCK:
+            _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with _LOCK:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed observations per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            state = self._values.get(key)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> float:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, state in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, state):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    with _LOCK:
+        metrics = list(_REGISTRY)
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Provider (upstream LLM) metrics, recorded in backend.openrouter
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "Upstream LLM request latency.", ["model"])
+LLM_TIME_TO_FIRST_BYTE = Histogram(
+    "llm_time_to_first_byte_seconds", "Time until the upstream response starts.", ["model"])
+LLM_REQUESTS = Counter(
+    "llm_requests_total", "Upstream LLM requests by outcome (HTTP status, 'timeout' or 'error').", ["model", "status"])
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported by the upstream usage accounting.", ["model", "type"])
+LLM_COST = Counter(
+    "llm_cost_usd_total", "Upstream cost in USD reported by usage accounting.", ["model"])
+LLM_IN_FLIGHT = Gauge(
+    "llm_requests_in_flight", "Upstream LLM requests currently in progress.", ["model"])
+
+# Upstream dispatch metrics, recorded in backend.dispatcher
+LLM_DISPATCH_WAIT = Histogram(
+    "llm_dispatch_wait_seconds", "Time upstream calls waited for a dispatcher slot.", ["priority"])
+LLM_DISPATCH_RUNNING = Gauge(
+    "llm_dispatch_running", "Upstream calls holding a dispatcher slot.", ["priority"])
+LLM_DISPATCH_QUEUED = Gauge(
+    "llm_dispatch_queued", "Upstream calls waiting for a dispatcher slot.", ["priority"])
+LLM_DISPATCH_PREEMPTIONS = Counter(
+    "llm_dispatch_preemptions_total", "Calls started ahead of queued lower-priority calls.", ["priority"])
+
+# Council pipeline metrics, recorded in backend.council
+STAGE_DURATION = Histogram(
+    "council_stage_duration_seconds", "Duration of council stage functions.", ["stage"])
+
+# Admission control metrics, recorded in backend.admission
+COUNCILS_RUNNING = Gauge(
+    "council_runs_active", "Council runs currently holding an admission slot.")
+COUNCILS_QUEUED = Gauge(
+    "council_runs_queued", "Council runs waiting for an admission slot.")
+COUNCILS_REJECTED = Counter(
+    "council_runs_rejected_total", "Council runs shed by admission control.", ["reason"])
+COUNCIL_QUEUE_WAIT = Histogram(
+    "council_queue_wait_seconds", "Time council runs spent queued before admission.")
+
+# Storage metrics, recorded in backend.storage
+STORAGE_DURATION = Histogram(
+    "storage_operation_duration_seconds", "Duration of storage operations.", ["operation"], buckets=STORAGE_BUCKETS)
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """
+    Decorator observing the wall time of a sync or async function.
+
+    Args:
+        histogram: Histogram to record into
+        **labels: Label values for the observation
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, **labels)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
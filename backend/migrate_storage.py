@@ -0,0 +1,80 @@
+"""Rewrite stored conversations in the current serialization format.
+
+Usage:
+    python -m backend.migrate_storage [--compression zstd] [--dry-run]
+
+Converts every conversation in DATA_DIR (indented or compact, plain or
+compressed) to compact JSON, compressing long stage texts with the given
+codec (STORAGE_COMPRESSION by default; "none" expands them again). Each file
+is written to a temporary file first and swapped in atomically.
+"""
+
+import argparse
+import os
+import sys
+from typing import Optional, Tuple
+
+from .config import DATA_DIR, STORAGE_COMPRESSION
+from .serialization import decode_conversation, encode_conversation
+
+
+def migrate_file(path: str, compression: str, dry_run: bool = False) -> Optional[Tuple[int, int]]:
+    """
+    Re-encode one conversation file.
+
+    Returns:
+        Tuple of (bytes before, bytes after), or None if the file is not a conversation
+    """
+    with open(path, 'rb') as f:
+        original = f.read()
+    conversation = decode_conversation(original)
+    # Other JSON files kept in DATA_DIR (e.g. model stats) are left alone
+    if not isinstance(conversation, dict) or "messages" not in conversation:
+        return None
+    encoded = encode_conversation(conversation, compression)
+    if not dry_run and encoded != original:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encoded)
+        os.replace(tmp_path, path)
+    return len(original), len(encoded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate stored conversations to the current format")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--compression", default=STORAGE_COMPRESSION, choices=["none", "gzip", "zstd"],
+                        help="Codec for long stage texts")
+    parser.add_argument("--dry-run", action="store_true", help="Report sizes without rewriting files")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_dir):
+        parser.error(f"no such directory: {args.data_dir}")
+
+    files = sorted(name for name in os.listdir(args.data_dir) if name.endswith('.json'))
+    before_total = after_total = failed = skipped = 0
+    for name in files:
+        path = os.path.join(args.data_dir, name)
+        try:
+            sizes = migrate_file(path, args.compression, args.dry_run)
+        except (OSError, ValueError, RuntimeError) as e:
+            failed += 1
+            print(f"Error migrating {path}: {e}", file=sys.stderr)
+            continue
+        if sizes is None:
+            skipped += 1
+            continue
+        before, after = sizes
+        before_total += before
+        after_total += after
+
+    ratio = after_total / before_total if before_total else 1.0
+    action = "Would migrate" if args.dry_run else "Migrated"
+    print(f"{action} {len(files) - failed - skipped} conversations: {before_total} -> {after_total} bytes ({ratio:.1%})"
+          + (f", {failed} failed" if failed else ""))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Local mock of the OpenRouter API for offline load tests and benchmarks.
+
+Serves the OpenAI-compatible `/api/v1/chat/completions` (plain and streaming)
+and `/api/v1/models` endpoints with per-model latency distributions, token
+streaming speed, 429/5xx injection and hangs. Point the backend at it with:
+
+    OPENROUTER_API_URL=http://127.0.0.1:8099/api/v1/chat/completions
+
+or use it as an additional provider (model ids "local/<model>"):
+
+    PROVIDERS='{"local": {"base_url": "http://127.0.0.1:8099/api/v1"}}'
+
+Run with:
+
+    python -m backend.mock_openrouter --port 8099 --profile profile.json
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
+
+# Behaviour applied to every model unless overridden in the profile's "models" section.
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "seed": 1234,
+    "default": {
+        # Time before the first byte of the answer (seconds)
+        "latency": {"dist": "lognormal", "median": 0.8, "sigma": 0.4},
+        # Generation speed once the answer has started
+        "tokens_per_second": 80.0,
+        # Completion length in tokens (words)
+        "response_tokens": {"dist": "uniform", "low": 150, "high": 400},
+        # Tokens sent per SSE chunk when streaming
+        "chunk_tokens": 1,
+        # Probability of answering with the given HTTP status instead of a completion
+        "error_rates": {"429": 0.0, "500": 0.0, "502": 0.0, "503": 0.0},
+        # Probability of never answering (the client times out)
+        "hang_rate": 0.0,
+        "hang_seconds": 3600.0,
+        # USD per token, reported in `usage.cost` and on /models
+        "pricing": {"prompt": 0.000001, "completion": 0.000002},
+        "context_length": 128000,
+    },
+    "models": {},
+}
+
+_WORDS = (
+    "the council considers evidence reasoning model answer question detail context "
+    "accuracy insight summary argument example result approach tradeoff latency data "
+    "analysis perspective claim support source method overall clear useful"
+).split()
+
+
+def load_profile(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a mock profile, merging it over DEFAULT_PROFILE.
+
+    Args:
+        path: Path to a JSON profile file (None for the defaults)
+
+    Returns:
+        Profile dict with 'seed', 'default' and 'models' keys
+    """
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    if not path:
+        return profile
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if "seed" in data:
+        profile["seed"] = data["seed"]
+    profile["default"].update(data.get("default") or {})
+    profile["models"].update(data.get("models") or {})
+    return profile
+
+
+def sample(spec: Any, rng: random.Random) -> float:
+    """
+    Draw a value from a distribution spec.
+
+    Supported specs are plain numbers and dicts with 'dist' set to
+    'constant' (value), 'uniform' (low, high), 'normal' (mean, stddev),
+    'lognormal' (median, sigma) or 'exponential' (mean). Results are
+    clamped at zero.
+    """
+    if isinstance(spec, (int, float)):
+        return float(spec)
+    dist = spec.get("dist", "constant")
+    if dist == "constant":
+        value = spec.get("value", 0.0)
+    elif dist == "uniform":
+        value = rng.uniform(spec.get("low", 0.0), spec.get("high", 1.0))
+    elif dist == "normal":
+        value = rng.gauss(spec.get("mean", 0.0), spec.get("stddev", 0.0))
+    elif dist == "lognormal":
+        value = rng.lognormvariate(math.log(spec.get("median", 1.0)), spec.get("sigma", 0.0))
+    elif dist == "exponential":
+        value = rng.expovariate(1.0 / spec.get("mean", 1.0))
+    else:
+        raise ValueError(f"Unknown distribution: {dist}")
+    return max(0.0, float(value))
+
+
+class MockBehaviour:
+    """Per-model settings and seeded random state for the mock server."""
+
+    def __init__(self, profile: Dict[str, Any]):
+        self.profile = profile
+        self._rngs: Dict[str, random.Random] = {}
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def settings(self, model: str) -> Dict[str, Any]:
+        merged = dict(self.profile["default"])
+        merged.update(self.profile["models"].get(model) or {})
+        return merged
+
+    def rng(self, model: str) -> random.Random:
+        # One stream per model keeps draws reproducible regardless of interleaving across models
+        if model not in self._rngs:
+            self._rngs[model] = random.Random(f"{self.profile['seed']}:{model}")
+        return self._rngs[model]
+
+    def model_ids(self) -> List[str]:
+        # Advertise the configured council so config validation accepts it out of the box
+        ids = list(self.profile["models"].keys())
+        for model in COUNCIL_MODELS + [CHAIRMAN_MODEL, "google/gemini-2.5-flash"]:
+            if model and model not in ids:
+                ids.append(model)
+        return ids
+
+
+def _count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+def _build_completion(prompt: str, n_tokens: int, rng: random.Random) -> str:
+    """Generate a completion that the council's parsers accept."""
+    if "Your final ranking MUST be formatted" in prompt:
+        labels = sorted(set(re.findall(r'Response [A-Z](?=:)', prompt)))
+        rng.shuffle(labels)
+        critique = " ".join(rng.choice(_WORDS) for _ in range(max(1, n_tokens - 3 * len(labels))))
+        ranking = "\n".join(f"{i}. {label}" for i, label in enumerate(labels, start=1))
+        return f"{critique}\n\nFINAL RANKING:\n{ranking}"
+    if prompt.startswith("Generate a very short title"):
+        return " ".join(rng.choice(_WORDS).capitalize() for _ in range(3))
+    return " ".join(rng.choice(_WORDS) for _ in range(max(1, n_tokens)))
+
+
+def _split_chunks(text: str, chunk_tokens: int) -> List[str]:
+    tokens = re.findall(r'\S+\s*', text)
+    size = max(1, int(chunk_tokens))
+    return ["".join(tokens[i:i + size]) for i in range(0, len(tokens), size)]
+
+
+def create_app(profile: Optional[Dict[str, Any]] = None) -> FastAPI:
+    """
+    Create the mock OpenRouter FastAPI app.
+
+    Args:
+        profile: Profile dict as returned by load_profile (defaults if None)
+
+    Returns:
+        FastAPI application
+    """
+    behaviour = MockBehaviour(profile or load_profile())
+    app = FastAPI(title="Mock OpenRouter")
+    app.state.behaviour = behaviour
+
+    @app.get("/api/v1/models")
+    async def list_models():
+        data = []
+        for model in behaviour.model_ids():
+            s = behaviour.settings(model)
+            data.append({
+                "id": model,
+                "name": model,
+                "context_length": s.get("context_length"),
+                "pricing": {k: format(float(v), "f") for k, v in (s.get("pricing") or {}).items()},
+            })
+        return {"data": data}
+
+    @app.get("/mock/stats")
+    async def stats():
+        """Request counts per model and outcome."""
+        return {model: dict(outcomes) for model, outcomes in behaviour.stats.items()}
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model") or ""
+        messages = body.get("messages") or []
+        stream = bool(body.get("stream"))
+        s = behaviour.settings(model)
+        rng = behaviour.rng(model)
+
+        # Decide the outcome up front so every random draw happens in request order
+        roll = rng.random()
+        outcome = "ok"
+        cumulative = 0.0
+        for status, rate in (s.get("error_rates") or {}).items():
+            cumulative += float(rate)
+            if roll < cumulative:
+                outcome = str(status)
+                break
+        if outcome == "ok" and rng.random() < float(s.get("hang_rate", 0.0)):
+            outcome = "hang"
+        latency = sample(s.get("latency", 0.0), rng)
+        n_tokens = int(sample(s.get("response_tokens", 100), rng))
+        # Honour max_tokens like a real upstream: cut the completion off and say so
+        finish_reason = "stop"
+        max_tokens = body.get("max_tokens")
+        if isinstance(max_tokens, int) and 0 < max_tokens < n_tokens:
+            n_tokens = max_tokens
+            finish_reason = "length"
+        behaviour.stats[model][outcome] += 1
+
+        if outcome == "hang":
+            await asyncio.sleep(float(s.get("hang_seconds", 3600.0)))
+            return JSONResponse(status_code=504, content={"error": {"message": "mock hang elapsed"}})
+
+        await asyncio.sleep(latency)
+        if outcome != "ok":
+            headers = {"Retry-After": "1"} if outcome == "429" else {}
+            return JSONResponse(
+                status_code=int(outcome),
+                content={"error": {"code": int(outcome), "message": f"mock {outcome}"}},
+                headers=headers,
+            )
+
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        content = _build_completion(prompt, n_tokens, rng)
+        pricing = s.get("pricing") or {}
+        prompt_tokens = _count_tokens(prompt)
+        completion_tokens = _count_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost": prompt_tokens * float(pricing.get("prompt", 0)) + completion_tokens * float(pricing.get("completion", 0)),
+        }
+        tps = float(s.get("tokens_per_second") or 0)
+        completion_id = f"gen-{uuid.uuid4().hex[:16]}"
+        created = int(time.time())
+
+        if not stream:
+            if tps > 0:
+                await asyncio.sleep(completion_tokens / tps)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            }
+
+        chunks = _split_chunks(content, s.get("chunk_tokens", 1))
+
+        async def event_stream():
+            for chunk in chunks:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+                if tps > 0:
+                    await asyncio.sleep(_count_tokens(chunk) / tps)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                "usage": usage,
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter server for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--profile", default=os.getenv("MOCK_OPENROUTER_PROFILE"),
+                        help="JSON profile with per-model latency/failure settings")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(load_profile(args.profile)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Persisted per-model call statistics for adaptive council selection.
+
+With COUNCIL_SELECTION=adaptive, every upstream call updates exponentially
+weighted averages of the model's latency, failure rate and cost for the stage
+it was made in ("stage1", "stage2", "stage3", "title", ...), since a model's
+Stage 2 calls carry far longer prompts than its Stage 1 answers. In static
+mode nothing is recorded or written. The averages are kept in memory and written
+to MODEL_STATS_PATH at most every MODEL_STATS_FLUSH_INTERVAL seconds (and
+on shutdown), so they survive restarts without a file write per call.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import COUNCIL_SELECTION, MODEL_STATS_PATH, MODEL_STATS_FLUSH_INTERVAL
+
+# Only adaptive selection reads the stats
+_ENABLED = COUNCIL_SELECTION == "adaptive"
+
+# Weight of the newest observation in the running averages
+_ALPHA = 0.2
+
+_LOCK = threading.Lock()
+# Averages by model, then stage
+_STATS: Dict[str, Dict[str, Dict[str, float]]] = {}
+_LOADED = False
+_DIRTY = False
+_LAST_FLUSH = 0.0
+
+
+def _load():
+    global _LOADED
+    _LOADED = True
+    if not os.path.exists(MODEL_STATS_PATH):
+        return
+    try:
+        with open(MODEL_STATS_PATH, 'r') as f:
+            data = json.load(f)
+        for model, stages in data.get("models", {}).items():
+            # Entries without stages (written before stats were split) mix every stage: drop them
+            if isinstance(stages, dict) and "calls" not in stages:
+                _STATS[model] = {stage: stats for stage, stats in stages.items() if isinstance(stats, dict)}
+    except (OSError, ValueError) as e:
+        print(f"Error loading model stats {MODEL_STATS_PATH}: {e}")
+
+
+def _ewma(previous: Optional[float], value: float) -> float:
+    return value if previous is None else previous + _ALPHA * (value - previous)
+
+
+def record(model: str, latency: float, ok: bool, cost: Optional[float] = None, stage: str = "other"):
+    """
+    Fold one upstream call into the model's averages for its stage.
+
+    Args:
+        model: Model identifier
+        latency: Call duration in seconds (excluding dispatcher queueing)
+        ok: Whether the call succeeded
+        cost: USD cost of the call, if known
+        stage: Stage the call was made in
+    """
+    global _DIRTY
+    if not _ENABLED:
+        return
+    with _LOCK:
+        if not _LOADED:
+            _load()
+        stats = _STATS.setdefault(model, {}).setdefault(stage, {"calls": 0})
+        stats["calls"] = stats.get("calls", 0) + 1
+        stats["latency"] = _ewma(stats.get("latency"), latency)
+        stats["failure_rate"] = _ewma(stats.get("failure_rate"), 0.0 if ok else 1.0)
+        if cost is not None and ok:
+            stats["cost"] = _ewma(stats.get("cost"), cost)
+        stats["updated_at"] = time.time()
+        _DIRTY = True
+        due = time.monotonic() - _LAST_FLUSH >= MODEL_STATS_FLUSH_INTERVAL
+    if due:
+        flush()
+
+
+def get_stats(stage: str) -> Dict[str, Dict[str, float]]:
+    """Snapshot of the models' averages for one stage: calls, latency (s), failure_rate, cost (USD)."""
+    with _LOCK:
+        if not _LOADED:
+            _load()
+        return {model: dict(stages[stage]) for model, stages in _STATS.items() if stage in stages}
+
+
+def flush():
+    """Write the averages to MODEL_STATS_PATH if they changed."""
+    global _DIRTY, _LAST_FLUSH
+    with _LOCK:
+        if not _DIRTY:
+            return
+        snapshot = {model: {stage: dict(stats) for stage, stats in stages.items()} for model, stages in _STATS.items()}
+        _DIRTY = False
+        _LAST_FLUSH = time.monotonic()
+    try:
+        directory = os.path.dirname(MODEL_STATS_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{MODEL_STATS_PATH}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"models": snapshot}, f)
+        os.replace(tmp_path, MODEL_STATS_PATH)
+    except Exception as e:
+        print(f"Error persisting model stats {MODEL_STATS_PATH}: {e}")
@@ -1,65 +1,491 @@
-"""OpenRouter API client for making LLM requests."""
+"""OpenRouter (and other OpenAI-compatible provider) API client for making LLM requests."""
 
+import asyncio
+import contextvars
+import json
+import os
 import time
 import httpx
-from typing import List, Dict, Any, Optional, Tuple
-from .config import OPENROUTER_API_KEY, OPENROUTER_API_URL
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from .config import (
+    OPENROUTER_API_KEY,
+    OPENROUTER_API_URL,
+    OPENROUTER_MODELS_URL,
+    MODEL_CATALOG_PATH,
+    MODEL_CATALOG_TTL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    PROVIDERS,
+)
+from . import generation, metrics, model_stats, serialization, tracing
+from .cassette import wrap_transport
+from .dispatcher import dispatcher, current_priority
 
-_MODEL_CACHE: Dict[str, Any] = {"data": None, "ts": 0}
-_MODEL_CACHE_TTL = 24 * 60 * 60
+# Model catalog: list as returned by the API, plus an id index for O(1) lookups
+_MODEL_CACHE: Dict[str, Any] = {"data": None, "ts": 0, "index": {}}
+_MODEL_CACHE_TTL = MODEL_CATALOG_TTL
+_MODEL_REFRESH: Optional[asyncio.Task] = None
+
+# Usage totals for the innermost track_usage() block, if any
+_USAGE_TOTALS: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("usage_totals", default=None)
+
+class Provider:
+    """
+    An OpenAI-compatible upstream serving the model ids that start with `prefix`.
+
+    Each provider has its own credentials and pooled client (bound to the event
+    loop it was created in, and recording to or replaying from a cassette when
+    CASSETTE_MODE is set).
+
+    Attributes:
+        name: Provider name, also tagged on its catalog entries
+        prefix: Model-id prefix routed here ("" for the default OpenRouter provider)
+        chat_url: Chat completions endpoint
+        models_url: Model catalog endpoint
+        api_key: Bearer token, or None to send no Authorization header
+        strip_prefix: Send model ids upstream without the prefix
+        openrouter: Speaks OpenRouter's extensions (usage accounting, reasoning object)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prefix: str,
+        chat_url: str,
+        models_url: str,
+        api_key: Optional[str] = None,
+        strip_prefix: bool = True,
+        openrouter: bool = False,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    ):
+        self.name = name
+        self.prefix = prefix
+        self.chat_url = chat_url
+        self.models_url = models_url
+        self.api_key = api_key
+        self.strip_prefix = strip_prefix
+        self.openrouter = openrouter
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def upstream_model(self, model: str) -> str:
+        """The model id as the upstream knows it."""
+        if self.strip_prefix and self.prefix and model.startswith(self.prefix):
+            return model[len(self.prefix):]
+        return model
+
+    def catalog_id(self, upstream_id: str) -> str:
+        """The model id the council uses for an id listed by the upstream."""
+        return upstream_id if upstream_id.startswith(self.prefix) else self.prefix + upstream_id
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def client(self) -> httpx.AsyncClient:
+        """Get the provider's pooled HTTP client, creating it on first use (or for a new event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits)
+            self._client = httpx.AsyncClient(timeout=120.0, transport=wrap_transport(transport))
+            self._client_loop = loop
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+
+def _provider_from_config(name: str, entry: Dict[str, Any]) -> Provider:
+    """Build a provider from a PROVIDERS entry (see backend.config)."""
+    if not isinstance(entry, dict) or not entry.get("base_url"):
+        raise ValueError(f"PROVIDERS.{name} needs a base_url")
+    base_url = entry["base_url"].rstrip("/")
+    api_key = entry.get("api_key")
+    if api_key is None and entry.get("api_key_env"):
+        api_key = os.getenv(entry["api_key_env"])
+    return Provider(
+        name=name,
+        prefix=entry.get("prefix", f"{name}/"),
+        chat_url=entry.get("chat_url") or f"{base_url}/chat/completions",
+        models_url=entry.get("models_url") or f"{base_url}/models",
+        api_key=api_key,
+        strip_prefix=entry.get("strip_prefix", True),
+        openrouter=entry.get("openrouter", False),
+        max_connections=int(entry.get("max_connections", HTTP_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(entry.get("max_keepalive_connections", HTTP_MAX_KEEPALIVE_CONNECTIONS)),
+    )
+
+
+# Providers by model-id prefix; OpenRouter takes every id no other prefix matches
+_PROVIDERS: Dict[str, Provider] = {}
+
+
+def register_provider(provider: Provider):
+    """Route model ids starting with `provider.prefix` to `provider` (replacing any provider with that prefix)."""
+    _PROVIDERS[provider.prefix] = provider
+
+
+def get_providers() -> List[Provider]:
+    """Registered providers, the default (OpenRouter) one first."""
+    return sorted(_PROVIDERS.values(), key=lambda p: len(p.prefix))
+
+
+def provider_for(model: str) -> Provider:
+    """The provider serving `model`: the one with the longest matching prefix."""
+    best = _PROVIDERS[""]
+    for prefix, provider in _PROVIDERS.items():
+        if len(prefix) > len(best.prefix) and model.startswith(prefix):
+            best = provider
+    return best
+
+
+register_provider(Provider(
+    name="openrouter",
+    prefix="",
+    chat_url=OPENROUTER_API_URL,
+    models_url=OPENROUTER_MODELS_URL,
+    api_key=OPENROUTER_API_KEY,
+    openrouter=True,
+))
+# Fail at startup rather than on the first call
+for _name, _entry in PROVIDERS.items():
+    register_provider(_provider_from_config(_name, _entry))
+
+
+def get_http_client(model: str = "") -> httpx.AsyncClient:
+    """
+    Get the pooled HTTP client for the provider serving `model` (OpenRouter by default).
+
+    Clients are shared by all calls to a provider, so TLS connections are reused.
+    """
+    return provider_for(model).client()
+
+
+async def close_http_client():
+    """Close every provider's HTTP client (on application shutdown)."""
+    for provider in get_providers():
+        await provider.close()
+
+
+async def warm_up_connections(count: int) -> int:
+    """
+    Pre-open pooled connections to each provider's endpoint.
+
+    Sends lightweight HEAD requests concurrently; the response status does not
+    matter, only that DNS, TCP and TLS setup happen before real traffic.
+
+    Args:
+        count: Number of connections to open per provider
+
+    Returns:
+        Number of requests that reached a server
+    """
+    async def touch(provider: Provider) -> bool:
+        try:
+            await provider.client().head(provider.chat_url, timeout=10.0)
+            return True
+        except Exception:
+            return False
+
+    results = await asyncio.gather(*[touch(p) for p in get_providers() for _ in range(count)])
+    return sum(results)
+
+
+def _request_body(
+    provider: Provider,
+    model: str,
+    messages: List[Dict[str, str]],
+    params: Optional[Dict[str, Any]],
+    stream: bool,
+) -> Dict[str, Any]:
+    """Chat completions body, asking for usage in the provider's dialect."""
+    payload: Dict[str, Any] = {
+        "model": provider.upstream_model(model),
+        "messages": messages,
+    }
+    if stream:
+        payload["stream"] = True
+    if provider.openrouter:
+        payload["usage"] = {"include": True}
+    elif stream:
+        payload["stream_options"] = {"include_usage": True}
+    payload.update(generation.payload(params, openrouter=provider.openrouter))
+    return payload
+
+
+def _status_label(error: BaseException | None) -> str:
+    """Outcome label for request metrics: HTTP status, 'timeout', 'cancelled' or 'error'."""
+    if error is None:
+        return "200"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(error, httpx.HTTPStatusError):
+        return str(error.response.status_code)
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    return "error"
+
+
+class _CallRecorder:
+    """Metrics and trace span bookkeeping for one upstream request."""
+
+    def __init__(self, model: str, span):
+        self.model = model
+        self.span = span
+        self.start = time.perf_counter()
+        self.error: BaseException | None = None
+        self.cost: float | None = None
+        self._first_byte = False
+
+    def first_byte(self):
+        if not self._first_byte:
+            self._first_byte = True
+            metrics.LLM_TIME_TO_FIRST_BYTE.observe(time.perf_counter() - self.start, model=self.model)
+
+    def record_usage(self, usage: Dict[str, Any] | None):
+        """Add OpenRouter usage accounting (tokens and cost) to the metrics and span."""
+        if not usage:
+            return
+        self.span.set_attributes({
+            "llm.prompt_tokens": usage.get("prompt_tokens"),
+            "llm.completion_tokens": usage.get("completion_tokens"),
+            "llm.cost": usage.get("cost"),
+        })
+        metrics.LLM_TOKENS.inc(usage.get("prompt_tokens") or 0, model=self.model, type="prompt")
+        metrics.LLM_TOKENS.inc(usage.get("completion_tokens") or 0, model=self.model, type="completion")
+        if usage.get("cost") is not None:
+            metrics.LLM_COST.inc(float(usage["cost"]), model=self.model)
+
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        cost = usage.get("cost")
+        if cost is None:
+            cost = estimate_cost(self.model, prompt_tokens, completion_tokens)
+        self.cost = float(cost) if cost is not None else None
+
+        totals = _USAGE_TOTALS.get()
+        if totals is not None:
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost"] += self.cost or 0.0
+
+    def fail(self, error: BaseException):
+        self.error = error
+        self.span.record_error(error)
+
+
+@contextmanager
+def track_usage():
+    """
+    Total the usage of upstream calls made inside the block, including from tasks it starts.
+
+    Cost comes from OpenRouter usage accounting, or is estimated from catalog
+    pricing when the upstream does not report it.
+
+    Yields:
+        Dict with 'calls', 'prompt_tokens', 'completion_tokens' and 'cost' (USD), updated live
+    """
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+    token = _USAGE_TOTALS.set(totals)
+    try:
+        yield totals
+    finally:
+        _USAGE_TOTALS.reset(token)
+
+
+@contextmanager
+def _record_call(
+    model: str,
+    messages: List[Dict[str, str]],
+    stream: bool,
+    queue_wait: float = 0.0,
+    stage: Optional[str] = None,
+):
+    """Instrument an upstream request with metrics, per-stage model stats and an 'llm.query' span."""
+    attributes = {
+        "llm.model": model,
+        "llm.stage": stage,
+        "llm.provider": provider_for(model).name,
+        "llm.stream": stream,
+        "llm.priority": current_priority(),
+        "llm.queue_wait_ms": round(queue_wait * 1000, 1),
+        "llm.prompt_messages": len(messages),
+        "llm.prompt_chars": sum(len(str(m.get("content") or "")) for m in messages),
+    }
+    with tracing.span("llm.query", **attributes) as sp:
+        call = _CallRecorder(model, sp)
+        metrics.LLM_IN_FLIGHT.inc(model=model)
+        try:
+            yield call
+        except BaseException as e:
+            # Cancellation (a dropped client, a cancelled run or speculative
+            # chairman) is not caught by the query functions
+            if call.error is None:
+                call.fail(e)
+            raise
+        finally:
+            status = _status_label(call.error)
+            sp.set_attribute("llm.status", status)
+            duration = time.perf_counter() - call.start
+            metrics.LLM_IN_FLIGHT.dec(model=model)
+            metrics.LLM_REQUEST_DURATION.observe(duration, model=model)
+            metrics.LLM_REQUESTS.inc(model=model, status=status)
+            # A cancelled call says nothing about the model's latency or reliability
+            if not isinstance(call.error, asyncio.CancelledError):
+                model_stats.record(model, duration, call.error is None, call.cost, stage=stage or "other")
 
 
 async def query_model(
     model: str,
     messages: List[Dict[str, str]],
-    timeout: float = 120.0
+    timeout: float = 120.0,
+    params: Optional[Dict[str, Any]] = None,
+    stage: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
     """
-    Query a single model via OpenRouter API.
+    Query a single model via its provider (OpenRouter unless a PROVIDERS prefix matches).
 
     Args:
         model: OpenRouter model identifier (e.g., "openai/gpt-4o")
         messages: List of message dicts with 'role' and 'content'
         timeout: Request timeout in seconds
+        params: Optional generation settings (see backend.generation)
+        stage: Stage the call belongs to (for per-stage model stats)
 
     Returns:
-        Response dict with 'content' and optional 'reasoning_details', or None if failed
+        Response dict with 'content', optional 'reasoning_details', 'usage'
+        and 'finish_reason' ("length" if cut off by max_tokens), or None if failed
     """
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
+    provider = provider_for(model)
+    payload = _request_body(provider, model, messages, params, stream=False)
 
-    payload = {
-        "model": model,
-        "messages": messages,
-    }
+    async with dispatcher.slot() as queue_wait:
+        with _record_call(model, messages, stream=False, queue_wait=queue_wait, stage=stage) as call:
+            try:
+                async with provider.client().stream(
+                    "POST",
+                    provider.chat_url,
+                    headers=provider.headers(),
+                    json=payload,
+                    timeout=timeout
+                ) as response:
+                    call.first_byte()
+                    response.raise_for_status()
+                    await response.aread()
 
-    try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                OPENROUTER_API_URL,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            message = data['choices'][0]['message']
-
-            return {
-                'content': message.get('content'),
-                'reasoning_details': message.get('reasoning_details')
-            }
+                data = response.json()
+                choice = data['choices'][0]
+                message = choice['message']
+                call.record_usage(data.get('usage'))
 
-    except Exception as e:
-        print(f"Error querying model {model}: {e}")
-        return None
+                return {
+                    'content': message.get('content'),
+                    'reasoning_details': message.get('reasoning_details'),
+                    'usage': data.get('usage'),
+                    'finish_reason': choice.get('finish_reason'),
+                }
+
+            except Exception as e:
+                call.fail(e)
+                print(f"Error querying model {model}: {e}")
+                return None
+
+
+async def query_model_stream(
+    model: str,
+    messages: List[Dict[str, str]],
+    on_delta: Callable[[str], None],
+    timeout: float = 120.0,
+    params: Optional[Dict[str, Any]] = None,
+    stage: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Query a single model with token streaming enabled.
+
+    Content deltas are passed to `on_delta` as they arrive; the accumulated
+    result is returned in the same shape as `query_model`.
+
+    Args:
+        model: OpenRouter model identifier (e.g., "openai/gpt-4o")
+        messages: List of message dicts with 'role' and 'content'
+        on_delta: Callback invoked with each content fragment
+        timeout: Request timeout in seconds
+        params: Optional generation settings (see backend.generation)
+        stage: Stage the call belongs to (for per-stage model stats)
+
+    Returns:
+        Response dict with 'content', optional 'reasoning_details' and 'usage', or None if failed
+    """
+    provider = provider_for(model)
+    payload = _request_body(provider, model, messages, params, stream=True)
+
+    parts: List[str] = []
+    usage: Dict[str, Any] | None = None
+    finish_reason: str | None = None
+    async with dispatcher.slot() as queue_wait:
+        with _record_call(model, messages, stream=True, queue_wait=queue_wait, stage=stage) as call:
+            try:
+                async with provider.client().stream(
+                    "POST",
+                    provider.chat_url,
+                    headers=provider.headers(),
+                    json=payload,
+                    timeout=timeout
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        # SSE comments (": OPENROUTER PROCESSING") and blank lines are keep-alives
+                        if not line.startswith("data: "):
+                            continue
+                        call.first_byte()
+                        data = line[6:].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = serialization.loads(data)
+                        if chunk.get("error"):
+                            raise RuntimeError(chunk["error"].get("message", "stream error"))
+                        if chunk.get("usage"):
+                            usage = chunk["usage"]
+                        choices = chunk.get("choices") or []
+                        if not choices:
+                            continue
+                        finish_reason = choices[0].get("finish_reason") or finish_reason
+                        delta = (choices[0].get("delta") or {}).get("content")
+                        if delta:
+                            parts.append(delta)
+                            on_delta(delta)
+
+                call.record_usage(usage)
+                return {
+                    'content': "".join(parts),
+                    'reasoning_details': None,
+                    'usage': usage,
+                    'finish_reason': finish_reason,
+                }
+
+            except Exception as e:
+                call.fail(e)
+                print(f"Error streaming model {model}: {e}")
+                return None
 
 
 async def query_models_parallel(
     models: List[str],
-    messages: List[Dict[str, str]]
+    messages: List[Dict[str, str]],
+    params: Optional[Dict[str, Dict[str, Any]]] = None,
+    stage: Optional[str] = None,
 ) -> Dict[str, Optional[Dict[str, Any]]]:
     """
     Query multiple models in parallel.
@@ -67,14 +493,14 @@ async def query_models_parallel(
     Args:
         models: List of OpenRouter model identifiers
         messages: List of message dicts to send to each model
+        params: Optional generation settings per model
+        stage: Stage the calls belong to (for per-stage model stats)
 
     Returns:
         Dict mapping model identifier to response dict (or None if failed)
     """
-    import asyncio
-
     # Create tasks for all models
-    tasks = [query_model(model, messages) for model in models]
+    tasks = [query_model(model, messages, params=(params or {}).get(model), stage=stage) for model in models]
 
     # Wait for all to complete
     responses = await asyncio.gather(*tasks)
@@ -83,31 +509,158 @@ async def query_models_parallel(
     return {model: response for model, response in zip(models, responses)}
 
 
-async def fetch_available_models(force: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
-    now = int(time.time())
-    if not force and _MODEL_CACHE.get("data") and now - int(_MODEL_CACHE.get("ts", 0)) < _MODEL_CACHE_TTL:
-        return _MODEL_CACHE["data"], True
-    url = "https://openrouter.ai/api/v1/models"
+def _parse_price(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _set_model_catalog(models: List[Dict[str, Any]], ts: int):
+    """Install a catalog and rebuild the id index."""
+    _MODEL_CACHE["data"] = models
+    _MODEL_CACHE["ts"] = ts
+    _MODEL_CACHE["index"] = {m["id"]: m for m in models}
+
+
+def _load_persisted_catalog():
+    """Warm the in-memory catalog from MODEL_CATALOG_PATH if it is empty."""
+    if _MODEL_CACHE.get("data") or not os.path.exists(MODEL_CATALOG_PATH):
+        return
+    try:
+        with open(MODEL_CATALOG_PATH, 'r') as f:
+            data = json.load(f)
+        if data.get("models"):
+            _set_model_catalog(data["models"], int(data.get("ts", 0)))
+    except Exception as e:
+        print(f"Error loading model catalog {MODEL_CATALOG_PATH}: {e}")
+
+
+def _persist_catalog(models: List[Dict[str, Any]], ts: int):
+    """Atomically write the catalog so the next start is warm."""
+    try:
+        directory = os.path.dirname(MODEL_CATALOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{MODEL_CATALOG_PATH}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"ts": ts, "models": models}, f)
+        os.replace(tmp_path, MODEL_CATALOG_PATH)
+    except Exception as e:
+        print(f"Error persisting model catalog {MODEL_CATALOG_PATH}: {e}")
+
+
+async def _download_provider_models(provider: Provider) -> Optional[List[Dict[str, Any]]]:
+    """Fetch one provider's catalog, with ids as routed by the council. Returns None on failure."""
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            items = data.get("data") or []
-            models = []
-            for it in items:
-                mid = it.get("id") or it.get("name") or ""
-                if not mid:
-                    continue
-                models.append({
-                    "id": mid,
-                    "context_length": it.get("context_length") or it.get("context_length_tokens") or None,
-                    "pricing": it.get("pricing") or {},
-                })
-            if models:
-                _MODEL_CACHE["data"] = models
-                _MODEL_CACHE["ts"] = now
-            return models, False
+        resp = await provider.client().get(provider.models_url, headers=provider.headers(), timeout=60.0)
+        resp.raise_for_status()
+        data = resp.json()
+        items = data.get("data") or []
+        models = []
+        for it in items:
+            mid = it.get("id") or it.get("name") or ""
+            if not mid:
+                continue
+            models.append({
+                "id": provider.catalog_id(mid),
+                "context_length": it.get("context_length") or it.get("context_length_tokens") or None,
+                "pricing": it.get("pricing") or {},
+                "provider": provider.name,
+            })
+        return models
     except Exception as e:
-        cached = _MODEL_CACHE.get("data") or []
+        print(f"Error fetching model catalog from {provider.name}: {e}")
+        return None
+
+
+async def _download_models() -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch and merge every provider's catalog, install and persist it.
+
+    A provider whose download fails keeps its entries from the previous
+    catalog. Returns None if every download failed.
+    """
+    providers = get_providers()
+    results = await asyncio.gather(*[_download_provider_models(p) for p in providers])
+    if all(result is None for result in results):
+        return None
+
+    previous = _MODEL_CACHE.get("data") or []
+    merged: Dict[str, Dict[str, Any]] = {}
+    for provider, result in zip(providers, results):
+        if result is None:
+            result = [m for m in previous if m.get("provider", "openrouter") == provider.name]
+        # Providers come shortest prefix first, so the one routing an id wins a clash
+        for model in result:
+            merged[model["id"]] = model
+    models = list(merged.values())
+    if models:
+        ts = int(time.time())
+        _set_model_catalog(models, ts)
+        await asyncio.to_thread(_persist_catalog, models, ts)
+    return models
+
+
+def _refresh_models() -> asyncio.Task:
+    """Start a catalog download unless one is already running (single-flight)."""
+    global _MODEL_REFRESH
+    if _MODEL_REFRESH is None or _MODEL_REFRESH.done():
+        _MODEL_REFRESH = asyncio.create_task(_download_models())
+    return _MODEL_REFRESH
+
+
+async def fetch_available_models(force: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Get the model catalog, merged across providers.
+
+    Serves the in-memory (or persisted) catalog when available. Once it is older
+    than the TTL, the stale copy is still returned while a single background
+    refresh runs. Callers only wait for the network when there is no catalog
+    at all or when `force` is set, and concurrent callers share one download.
+
+    Args:
+        force: Wait for a fresh download instead of serving the cache
+
+    Returns:
+        Tuple of (list of model dicts with 'id', 'context_length', 'pricing', 'provider', from_cache flag)
+    """
+    _load_persisted_catalog()
+    cached = _MODEL_CACHE.get("data")
+    if cached and not force:
+        if int(time.time()) - int(_MODEL_CACHE.get("ts", 0)) >= _MODEL_CACHE_TTL:
+            _refresh_models()
         return cached, True
+
+    # Shield so a cancelled caller does not abort the download others are waiting on
+    models = await asyncio.shield(_refresh_models())
+    if models is None:
+        return _MODEL_CACHE.get("data") or [], True
+    return models, False
+
+
+def get_model_info(model_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a model in the loaded catalog by id.
+
+    Args:
+        model_id: Model identifier (prefixed for non-OpenRouter providers)
+
+    Returns:
+        Model dict with 'id', 'context_length', 'pricing' and 'provider', or None if unknown
+    """
+    return _MODEL_CACHE["index"].get(model_id)
+
+
+def estimate_cost(model_id: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """
+    Estimate the USD cost of a call from catalog pricing (per-token prices).
+
+    Returns:
+        Cost in USD, or None if the model is not in the catalog
+    """
+    info = get_model_info(model_id)
+    if info is None:
+        return None
+    pricing = info.get("pricing") or {}
+    return prompt_tokens * _parse_price(pricing.get("prompt")) + completion_tokens * _parse_price(pricing.get("completion"))
@@ -0,0 +1,165 @@
+"""Rank aggregation helpers shared by Stage 2 and the leaderboard.
+
+Partial rankings (each ranker ordering only some of the responses) are
+turned into pairwise win counts and combined with a Bradley-Terry fit, which
+puts every response on one scale even though no ranker saw them all.
+"""
+
+import math
+import random
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bradley-Terry fit: iterations and the pseudo-count of wins added between
+# every pair of compared items (keeps undefeated items finite)
+_BT_ITERATIONS = 200
+_BT_PRIOR = 0.5
+
+
+def pairwise_wins(orders: Iterable[Sequence[str]]) -> Dict[Tuple[str, str], int]:
+    """Count how often each item was ranked above each other item."""
+    wins: Dict[Tuple[str, str], int] = defaultdict(int)
+    for order in orders:
+        for i, winner in enumerate(order):
+            for loser in order[i + 1:]:
+                wins[(winner, loser)] += 1
+    return dict(wins)
+
+
+def bradley_terry(wins: Dict[Tuple[str, str], float], items: List[str]) -> Dict[str, float]:
+    """
+    Fit Bradley-Terry strengths with the MM algorithm (Hunter, 2004).
+
+    Args:
+        wins: Win counts by (winner, loser)
+        items: Items to score (items never compared get strength 1)
+
+    Returns:
+        Strength per item, normalized to a geometric mean of 1
+    """
+    # Spread a small prior over every compared pair so the fit stays finite
+    counts: Dict[Tuple[str, str], float] = defaultdict(float, wins)
+    pairs = {tuple(sorted(pair)) for pair in wins}
+    for a, b in pairs:
+        counts[(a, b)] += _BT_PRIOR
+        counts[(b, a)] += _BT_PRIOR
+
+    opponents: Dict[str, List[str]] = defaultdict(list)
+    for a, b in pairs:
+        opponents[a].append(b)
+        opponents[b].append(a)
+    total_wins = {m: sum(counts[(m, o)] for o in opponents[m]) for m in items}
+
+    strength = {m: 1.0 for m in items}
+    for _ in range(_BT_ITERATIONS):
+        updated = {}
+        for m in items:
+            denominator = sum(
+                (counts[(m, o)] + counts[(o, m)]) / (strength[m] + strength[o]) for o in opponents[m]
+            )
+            updated[m] = total_wins[m] / denominator if denominator else strength[m]
+        scale = math.exp(sum(math.log(v) for v in updated.values()) / len(updated)) if updated else 1.0
+        converged = all(abs(updated[m] / scale - strength[m]) < 1e-9 for m in items)
+        strength = {m: v / scale for m, v in updated.items()}
+        if converged:
+            break
+    return strength
+
+
+def sparse_design(
+    n_items: int,
+    rankers: List[str],
+    subset_size: int,
+    own_item: Optional[Dict[str, int]] = None,
+    seed: str = "",
+) -> Dict[str, List[int]]:
+    """
+    Assign each ranker a subset of items to rank.
+
+    A greedy approximation of a balanced incomplete block design: every
+    subset takes the items shown least often so far, preferring pairs that
+    were compared least, so appearances and pair coverage stay even. Rankers
+    are not shown their own item when there are enough others.
+
+    Args:
+        n_items: Number of items (responses)
+        rankers: Ranker identifiers, in assignment order
+        subset_size: Items per ranker
+        own_item: Index of each ranker's own item, if any
+        seed: Tie-break seed, so the same input gives the same design
+
+    Returns:
+        Sorted item indices per ranker
+    """
+    own_item = own_item or {}
+    rng = random.Random(seed)
+    appearances = [0] * n_items
+    compared: Dict[Tuple[int, int], int] = defaultdict(int)
+    design: Dict[str, List[int]] = {}
+    for ranker in rankers:
+        candidates = [i for i in range(n_items) if i != own_item.get(ranker)]
+        if len(candidates) < subset_size:
+            candidates = list(range(n_items))
+        size = min(subset_size, len(candidates))
+        block: List[int] = []
+        while len(block) < size:
+            choice = min(
+                (c for c in candidates if c not in block),
+                key=lambda c: (
+                    appearances[c],
+                    sum(compared[(min(c, b), max(c, b))] for b in block),
+                    rng.random(),
+                ),
+            )
+            block.append(choice)
+        for i, a in enumerate(block):
+            appearances[a] += 1
+            for b in block[i + 1:]:
+                compared[(min(a, b), max(a, b))] += 1
+        design[ranker] = sorted(block)
+    return design
+
+
+def top_k_settled(orders: Iterable[Sequence[str]], items: Sequence[str], remaining: int, k: int) -> bool:
+    """
+    Whether `remaining` further rankings can no longer change the top-k order.
+
+    Items are ordered by average position, as in a full Stage 2. After r
+    further rankings an item's average can at best drop to what ranking it
+    first every time would give, and at worst rise to what ranking it last
+    would give. Rankings parsed from text may be partial: one that leaves an
+    item out keeps its average, which both bounds only move away from as r
+    grows, so partial and missing rankings stay within the bounds for the
+    full `remaining`.
+
+    Args:
+        orders: Rankings received so far, best first
+        items: All items that can be ranked
+        remaining: Rankings still outstanding
+        k: Number of leading positions that must be settled
+    """
+    n = len(items)
+    totals = {item: [0, 0] for item in items}
+    for order in orders:
+        for position, item in enumerate(order, start=1):
+            if item in totals:
+                totals[item][0] += position
+                totals[item][1] += 1
+    ranked = sorted((i for i in items if totals[i][1]), key=lambda i: totals[i][0] / totals[i][1])
+    k = min(k, n - 1)
+    if remaining <= 0 or k <= 0:
+        return True
+    if len(ranked) <= k:
+        return False
+    unranked = [i for i in items if not totals[i][1]]
+
+    for r in range(remaining + 1):
+        for i in range(k):
+            s, c = totals[ranked[i]]
+            worst = (s + r * n) / (c + r)
+            # Unranked items only enter the order once a further ranking arrives
+            rivals = ranked[i + 1:] + (unranked if r else [])
+            best = min((totals[j][0] + r) / (totals[j][1] + r) for j in rivals)
+            if worst >= best:
+                return False
+    return True
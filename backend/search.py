@@ -0,0 +1,277 @@
+"""Full-text search over conversations (SQLite FTS5).
+
+Each conversation is indexed as separate documents: its title, every user
+prompt, and every Stage 1 response, Stage 2 critique and Stage 3 answer. The
+index lives in SEARCH_DB_PATH next to the conversation files.
+Storage write paths call index_conversation, which only rewrites documents
+whose text changed; remove_conversation drops a deleted conversation.
+Documents are ranked with BM25 and returned with highlighted snippets: the
+stored text HTML-escaped, with matches wrapped in <mark> tags.
+"""
+
+import hashlib
+import html
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import SEARCH_ENABLED, SEARCH_DB_PATH
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    body, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS doc_keys (
+    rowid INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    message_index INTEGER,
+    stage TEXT NOT NULL,
+    model TEXT,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS doc_keys_conversation ON doc_keys (conversation_id);
+CREATE TABLE IF NOT EXISTS indexed_conversations (
+    conversation_id TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+"""
+
+# Document key: (message index or None for the title, stage, model)
+DocKey = Tuple[Optional[int], str, Optional[str]]
+
+# Match delimiters asked of snippet(), replaced by <mark> tags once the text is escaped
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+
+_LOCK = threading.Lock()
+_CONN: Optional[sqlite3.Connection] = None
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Open (once) the index database, or return None if search is disabled or unavailable."""
+    global _CONN, SEARCH_ENABLED
+    if not SEARCH_ENABLED:
+        return None
+    if _CONN is not None:
+        return _CONN
+    directory = os.path.dirname(SEARCH_DB_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(SEARCH_DB_PATH, check_same_thread=False)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5
+        print(f"Search disabled: {e}")
+        conn.close()
+        SEARCH_ENABLED = False
+        return None
+    _CONN = conn
+    return conn
+
+
+def is_available() -> bool:
+    with _LOCK:
+        return _connect() is not None
+
+
+def _documents(conversation: Dict[str, Any]) -> Dict[DocKey, str]:
+    """Extract the searchable texts of a conversation, keyed by document."""
+    docs: Dict[DocKey, str] = {}
+    title = conversation.get("title")
+    if title:
+        docs[(None, "title", None)] = title
+    for index, message in enumerate(conversation.get("messages", [])):
+        if not isinstance(message, dict):
+            continue
+        if message.get("role") == "user":
+            if message.get("content"):
+                docs[(index, "prompt", None)] = message["content"]
+            continue
+        for entry in message.get("stage1") or []:
+            if isinstance(entry, dict) and entry.get("response"):
+                docs[(index, "stage1", entry.get("model"))] = entry["response"]
+        for entry in message.get("stage2") or []:
+            if isinstance(entry, dict) and entry.get("ranking"):
+                docs[(index, "stage2", entry.get("model"))] = entry["ranking"]
+        stage3 = message.get("stage3")
+        if isinstance(stage3, dict) and stage3.get("response"):
+            docs[(index, "stage3", stage3.get("model"))] = stage3["response"]
+    return docs
+
+
+def _digest(body: str) -> str:
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _index(conn: sqlite3.Connection, conversation: Dict[str, Any]):
+    conversation_id = conversation["id"]
+    wanted = {key: (body, _digest(body)) for key, body in _documents(conversation).items()}
+
+    existing: Dict[DocKey, Tuple[int, str]] = {}
+    for rowid, message_index, stage, model, digest in conn.execute(
+        "SELECT rowid, message_index, stage, model, digest FROM doc_keys WHERE conversation_id = ?",
+        (conversation_id,),
+    ):
+        existing[(message_index, stage, model)] = (rowid, digest)
+
+    stale = [rowid for key, (rowid, digest) in existing.items() if key not in wanted or wanted[key][1] != digest]
+    if stale:
+        conn.executemany("DELETE FROM docs WHERE rowid = ?", [(r,) for r in stale])
+        conn.executemany("DELETE FROM doc_keys WHERE rowid = ?", [(r,) for r in stale])
+
+    for key, (body, digest) in wanted.items():
+        current = existing.get(key)
+        if current is not None and current[1] == digest:
+            continue
+        message_index, stage, model = key
+        cursor = conn.execute(
+            "INSERT INTO doc_keys (conversation_id, message_index, stage, model, digest) VALUES (?, ?, ?, ?, ?)",
+            (conversation_id, message_index, stage, model, digest),
+        )
+        conn.execute("INSERT INTO docs (rowid, body) VALUES (?, ?)", (cursor.lastrowid, body))
+
+    conn.execute(
+        "INSERT OR REPLACE INTO indexed_conversations (conversation_id, revision) VALUES (?, ?)",
+        (conversation_id, conversation.get("revision", 0)),
+    )
+
+
+def _remove(conn: sqlite3.Connection, conversation_id: str):
+    conn.execute(
+        "DELETE FROM docs WHERE rowid IN (SELECT rowid FROM doc_keys WHERE conversation_id = ?)",
+        (conversation_id,),
+    )
+    conn.execute("DELETE FROM doc_keys WHERE conversation_id = ?", (conversation_id,))
+    conn.execute("DELETE FROM indexed_conversations WHERE conversation_id = ?", (conversation_id,))
+
+
+def index_conversation(conversation: Dict[str, Any]):
+    """Bring a conversation's documents up to date (only changed texts are rewritten)."""
+    with _LOCK:
+        conn = _connect()
+        if conn is None:
+            return
+        with conn:
+            _index(conn, conversation)
+
+
+def remove_conversation(conversation_id: str):
+    """Drop all documents of a conversation."""
+    with _LOCK:
+        conn = _connect()
+        if conn is None:
+            return
+        with conn:
+            _remove(conn, conversation_id)
+
+
+def reconcile(revisions: Dict[str, int], load: Callable[[str], Optional[Dict[str, Any]]]) -> Dict[str, int]:
+    """
+    Sync the index with storage, e.g. after files were written by another process.
+
+    Args:
+        revisions: Current revision of every stored conversation, by id
+        load: Loads a conversation by id
+
+    Returns:
+        Counts of 'indexed' and 'removed' conversations
+    """
+    with _LOCK:
+        conn = _connect()
+        if conn is None:
+            return {"indexed": 0, "removed": 0}
+        indexed = dict(conn.execute("SELECT conversation_id, revision FROM indexed_conversations"))
+
+    stale = [cid for cid, revision in revisions.items() if indexed.get(cid) != revision]
+    removed = [cid for cid in indexed if cid not in revisions]
+    for conversation_id in stale:
+        conversation = load(conversation_id)
+        if conversation is not None:
+            index_conversation(conversation)
+    for conversation_id in removed:
+        remove_conversation(conversation_id)
+    return {"indexed": len(stale), "removed": len(removed)}
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match (AND).
+
+    Words are quoted so FTS5 operators in user input are taken literally; a
+    trailing '*' on a word keeps prefix matching.
+    """
+    terms = []
+    for word, star in re.findall(r"(\w+)(\*?)", query):
+        terms.append(f'"{word}"' + ("*" if star else ""))
+    return " ".join(terms) or None
+
+
+def _highlight(snippet: str) -> str:
+    """HTML-escape a snippet and mark its matches (stray delimiters in stored text only add <mark> tags)."""
+    return html.escape(snippet).replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
+
+
+def search(
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    stages: Optional[Iterable[str]] = None,
+    conversation_id: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Search prompts, stage outputs and titles.
+
+    Args:
+        query: Free-text query
+        limit: Page size
+        offset: Number of results to skip
+        stages: Restrict to these document kinds ("title", "prompt", "stage1", "stage2", "stage3")
+        conversation_id: Restrict to one conversation
+
+    Returns:
+        Tuple of (results best first, whether more results follow)
+    """
+    expression = _match_expression(query)
+    if expression is None:
+        return [], False
+
+    sql = (
+        "SELECT k.conversation_id, k.message_index, k.stage, k.model, "
+        f"snippet(docs, 0, '{_MATCH_START}', '{_MATCH_END}', '…', 16), bm25(docs) AS score "
+        "FROM docs JOIN doc_keys AS k ON k.rowid = docs.rowid WHERE docs MATCH ?"
+    )
+    params: List[Any] = [expression]
+    if stages:
+        stages = list(stages)
+        sql += f" AND k.stage IN ({', '.join('?' for _ in stages)})"
+        params.extend(stages)
+    if conversation_id is not None:
+        sql += " AND k.conversation_id = ?"
+        params.append(conversation_id)
+    sql += " ORDER BY score LIMIT ? OFFSET ?"
+    params.extend([limit + 1, offset])
+
+    with _LOCK:
+        conn = _connect()
+        if conn is None:
+            raise RuntimeError("Search is not available")
+        rows = conn.execute(sql, params).fetchall()
+
+    results = [
+        {
+            "conversation_id": cid,
+            "message_index": message_index,
+            "stage": stage,
+            "model": model,
+            "snippet": _highlight(snippet),
+            # bm25() is lower-is-better; flip it so higher scores rank first
+            "score": round(-score, 4),
+        }
+        for cid, message_index, stage, model, snippet, score in rows[:limit]
+    ]
+    return results, len(rows) > limit
@@ -0,0 +1,144 @@
+"""Adaptive council member selection (COUNCIL_SELECTION=adaptive).
+
+Before Stage 1, each configured member is checked against its recorded Stage 1
+call statistics (backend.model_stats) and its leaderboard rating:
+
+- members with too few recorded calls are always queried, so their stats
+  stay current;
+- members failing more often than COUNCIL_MAX_FAILURE_RATE, slower on
+  average than COUNCIL_LATENCY_BUDGET, or rated more than COUNCIL_ELO_MARGIN
+  below the average are held in reserve;
+- the remaining members are added best-rated first while their expected
+  cost fits COUNCIL_COST_BUDGET; the rest go to the reserve.
+
+Reserve members are queried only if fewer than COUNCIL_QUORUM members
+answer. The plan and its outcome are recorded in the message metadata.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from . import model_stats
+from .config import (
+    COUNCIL_SELECTION,
+    COUNCIL_QUORUM,
+    COUNCIL_LATENCY_BUDGET,
+    COUNCIL_COST_BUDGET,
+    COUNCIL_MAX_FAILURE_RATE,
+    COUNCIL_ELO_MARGIN,
+    COUNCIL_MIN_CALLS,
+)
+
+
+def _ratings() -> Dict[str, float]:
+    # Imported here: the leaderboard depends on backend.council, which uses this module
+    from . import leaderboard
+
+    try:
+        return {row["model"]: row["elo"] for row in leaderboard.get_leaderboard()["models"]}
+    except Exception as e:
+        print(f"Leaderboard unavailable for council selection: {e}")
+        return {}
+
+
+class CouncilPlan:
+    """
+    Which members to query first and which to hold in reserve.
+
+    Attributes:
+        primary: Members queried up front
+        reserve: Held-back members, in the order they would be called in
+        reasons: Why each reserve member was held back
+        quorum: Answers wanted before the reserve is left alone
+    """
+
+    def __init__(self, primary: List[str], reserve: List[str], reasons: Dict[str, str], quorum: int,
+                 stats: Dict[str, Dict[str, Any]]):
+        self.primary = primary
+        self.reserve = reserve
+        self.reasons = reasons
+        self.quorum = quorum
+        self.stats = stats
+        self.reserve_used: List[str] = []
+
+    def record(self) -> Dict[str, Any]:
+        """Metadata describing the plan and how it played out."""
+        return {
+            "mode": "adaptive",
+            "quorum": self.quorum,
+            "latency_budget_s": COUNCIL_LATENCY_BUDGET,
+            "cost_budget_usd": COUNCIL_COST_BUDGET or None,
+            "queried": self.primary + self.reserve_used,
+            "reserve_used": list(self.reserve_used),
+            "skipped": [
+                {"model": model, "reason": self.reasons[model]}
+                for model in self.reserve if model not in self.reserve_used
+            ],
+            "stats": self.stats,
+        }
+
+
+def plan_council(models: List[str]) -> Optional[CouncilPlan]:
+    """
+    Plan which members to query for one request.
+
+    Returns:
+        A plan, or None unless COUNCIL_SELECTION is "adaptive"
+    """
+    if COUNCIL_SELECTION != "adaptive" or not models:
+        return None
+
+    stats = model_stats.get_stats("stage1")
+    ratings = _ratings()
+    rated = [ratings[m] for m in models if m in ratings]
+    average_rating = sum(rated) / len(rated) if rated else None
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    reasons: Dict[str, str] = {}
+    candidates: List[str] = []
+    primary: List[str] = []
+    for model in models:
+        s = stats.get(model) or {}
+        summary[model] = {
+            "calls": int(s.get("calls", 0)),
+            "latency_ms": round(s["latency"] * 1000) if "latency" in s else None,
+            "failure_rate": round(s["failure_rate"], 3) if "failure_rate" in s else None,
+            "cost_usd": s.get("cost"),
+            "elo": ratings.get(model),
+        }
+        if s.get("calls", 0) < COUNCIL_MIN_CALLS:
+            primary.append(model)
+        elif s.get("failure_rate", 0.0) > COUNCIL_MAX_FAILURE_RATE:
+            reasons[model] = "unreliable"
+        elif s.get("latency", 0.0) > COUNCIL_LATENCY_BUDGET:
+            reasons[model] = "slow"
+        elif average_rating is not None and model in ratings and ratings[model] < average_rating - COUNCIL_ELO_MARGIN:
+            reasons[model] = "low_rated"
+        else:
+            candidates.append(model)
+
+    # Best rated first (unrated members count as average), then fastest
+    def preference(model: str):
+        return (-ratings.get(model, average_rating or 0.0), (stats.get(model) or {}).get("latency", 0.0))
+
+    spent = sum((stats.get(m) or {}).get("cost") or 0.0 for m in primary)
+    for model in sorted(candidates, key=preference):
+        cost = (stats.get(model) or {}).get("cost") or 0.0
+        if COUNCIL_COST_BUDGET and spent + cost > COUNCIL_COST_BUDGET and primary:
+            reasons[model] = "over_cost_budget"
+            continue
+        primary.append(model)
+        spent += cost
+
+    # Keep configuration order among the members queried up front
+    primary = [m for m in models if m in primary]
+    # Reserve members are called to rescue a quorum: most reliable first
+    reserve = sorted(reasons, key=lambda m: ((stats.get(m) or {}).get("failure_rate", 0.0), preference(m)))
+
+    # Never plan below quorum: promote the best held-back members
+    quorum = max(1, min(COUNCIL_QUORUM, len(models)))
+    while len(primary) < quorum and reserve:
+        model = reserve.pop(0)
+        del reasons[model]
+        primary.append(model)
+
+    return CouncilPlan(primary, reserve, reasons, quorum, summary)
@@ -0,0 +1,204 @@
+"""JSON serialization for storage and SSE payloads.
+
+Uses orjson when it is installed and falls back to the stdlib encoder with
+compact separators, so output is compact either way. Stored stage texts can
+additionally be compressed (STORAGE_COMPRESSION = "gzip" or "zstd"; zstd
+needs the `zstandard` package). Compressed texts are stored inline as
+{"$codec": ..., "$data": <base64>} and decoded transparently on read, so
+plain and compressed files can coexist.
+"""
+
+import base64
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import STORAGE_COMPRESSION, STORAGE_COMPRESSION_MIN_BYTES
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder handles them
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a compact JSON string."""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON from a string or UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def sse_event(event: Dict[str, Any]) -> str:
+    """Format an event dict as a Server-Sent Events `data:` frame."""
+    return f"data: {dumps(event)}\n\n"
+
+
+# Stage text fields that may be stored compressed: (message key, text key)
+_STAGE_TEXT_FIELDS = (("stage1", "response"), ("stage2", "ranking"), ("stage3", "response"))
+
+
+def _resolve_codec(codec: Optional[str]) -> Optional[str]:
+    codec = (codec or "none").strip().lower()
+    if codec == "none":
+        return None
+    if codec == "zstd" and zstandard is None:
+        print("STORAGE_COMPRESSION=zstd but zstandard is not installed; using gzip")
+        return "gzip"
+    if codec not in ("gzip", "zstd"):
+        raise ValueError(f"Unknown STORAGE_COMPRESSION: {codec}")
+    return codec
+
+
+_CODEC = _resolve_codec(STORAGE_COMPRESSION)
+
+
+def compress_text(text: str, codec: str) -> Dict[str, str]:
+    raw = text.encode("utf-8")
+    if codec == "zstd":
+        packed = zstandard.ZstdCompressor().compress(raw)
+    else:
+        packed = gzip.compress(raw, mtime=0)
+    return {"$codec": codec, "$data": base64.b64encode(packed).decode("ascii")}
+
+
+def decompress_text(value: Dict[str, str]) -> str:
+    codec = value["$codec"]
+    packed = base64.b64decode(value["$data"])
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Conversation contains zstd-compressed text but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(packed).decode("utf-8")
+    if codec == "gzip":
+        return gzip.decompress(packed).decode("utf-8")
+    raise ValueError(f"Unknown text codec: {codec}")
+
+
+def _is_compressed(value: Any) -> bool:
+    return isinstance(value, dict) and "$codec" in value and "$data" in value
+
+
+def _map_stage_texts(messages: List[Dict[str, Any]], fn) -> List[Dict[str, Any]]:
+    """Copy messages, applying `fn` to each stage text (originals are not mutated)."""
+    out = []
+    for message in messages:
+        if not isinstance(message, dict) or message.get("role") != "assistant":
+            out.append(message)
+            continue
+        message = dict(message)
+        for stage, key in _STAGE_TEXT_FIELDS:
+            value = message.get(stage)
+            if isinstance(value, list):
+                message[stage] = [
+                    {**item, key: fn(item[key])} if isinstance(item, dict) and key in item else item
+                    for item in value
+                ]
+            elif isinstance(value, dict) and key in value:
+                message[stage] = {**value, key: fn(value[key])}
+        out.append(message)
+    return out
+
+
+class ConversationLayout:
+    """
+    Byte ranges within an encoded conversation.
+
+    Attributes:
+        header_end: Offset where the header fields end (the document minus
+            its messages is `data[:header_end] + b"}"`)
+        messages: (start, end) offsets of each encoded message
+    """
+
+    __slots__ = ("header_end", "messages")
+
+    def __init__(self, header_end: int, messages: List[Tuple[int, int]]):
+        self.header_end = header_end
+        self.messages = messages
+
+
+def encode_conversation_layout(conversation: Dict[str, Any], codec: Optional[str] = None) -> Tuple[bytes, ConversationLayout]:
+    """
+    Serialize a conversation for storage, compressing long stage texts.
+
+    Messages are encoded one by one and written last, so the returned layout
+    lets single messages be read back without parsing the whole document.
+
+    Args:
+        conversation: Conversation dict (not modified)
+        codec: "gzip", "zstd" or "none"; defaults to STORAGE_COMPRESSION
+
+    Returns:
+        Tuple of (encoded bytes, layout)
+    """
+    codec = _CODEC if codec is None else _resolve_codec(codec)
+    messages = conversation.get("messages", [])
+    if codec is not None:
+        def pack(text):
+            if isinstance(text, str) and len(text) >= STORAGE_COMPRESSION_MIN_BYTES:
+                return compress_text(text, codec)
+            return text
+
+        messages = _map_stage_texts(messages, pack)
+
+    header = dumps_bytes({k: v for k, v in conversation.items() if k != "messages"})
+    header_end = len(header) - 1
+    parts = [header[:-1], b',"messages":[' if header_end > 1 else b'"messages":[']
+    position = sum(len(p) for p in parts)
+    offsets: List[Tuple[int, int]] = []
+    for i, message in enumerate(messages):
+        if i:
+            parts.append(b",")
+            position += 1
+        encoded = dumps_bytes(message)
+        parts.append(encoded)
+        offsets.append((position, position + len(encoded)))
+        position += len(encoded)
+    parts.append(b"]}")
+    return b"".join(parts), ConversationLayout(header_end, offsets)
+
+
+def encode_conversation(conversation: Dict[str, Any], codec: Optional[str] = None) -> bytes:
+    """Serialize a conversation for storage (see encode_conversation_layout)."""
+    return encode_conversation_layout(conversation, codec)[0]
+
+
+def _expand(value: Any) -> Any:
+    return decompress_text(value) if _is_compressed(value) else value
+
+
+def decode_messages(data: List[str | bytes]) -> List[Dict[str, Any]]:
+    """Parse individually stored messages, expanding any compressed stage texts."""
+    messages = [loads(item) for item in data]
+    if any((b'"$codec"' if isinstance(item, bytes) else '"$codec"') in item for item in data):
+        messages = _map_stage_texts(messages, _expand)
+    return messages
+
+
+def decode_conversation(data: str | bytes) -> Dict[str, Any]:
+    """Parse a stored conversation, expanding any compressed stage texts."""
+    conversation = loads(data)
+    marker = '"$codec"' if isinstance(data, str) else b'"$codec"'
+    messages = conversation.get("messages")
+    if marker in data and isinstance(messages, list):
+        conversation["messages"] = _map_stage_texts(messages, _expand)
+    return conversation
@@ -1,11 +1,189 @@
 """JSON-based storage for conversations."""
 
-import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from .config import DATA_DIR, COUNCIL_MODELS, CHAIRMAN_MODEL
+from . import leaderboard, metrics, search, tracing
+from .serialization import ConversationLayout, encode_conversation_layout, decode_conversation, decode_messages, loads
+
+
+def _instrumented(operation: str):
+    """Record a duration metric and a 'storage.<operation>' trace span."""
+    def decorator(fn):
+        return metrics.timed(metrics.STORAGE_DURATION, operation=operation)(tracing.traced(f"storage.{operation}")(fn))
+    return decorator
+
+
+# In-memory conversation metadata for list_conversations, keyed by id.
+# Write paths keep it current; it is built by scanning DATA_DIR once.
+_INDEX: Dict[str, Dict[str, Any]] = {}
+_INDEX_BUILT = False
+_INDEX_LOCK = threading.Lock()
+
+# Byte layouts of conversation files written (or verified) by this process,
+# with the (size, mtime_ns) they are valid for. Guarded by _INDEX_LOCK.
+_LAYOUTS: Dict[str, Tuple[int, int, ConversationLayout]] = {}
+
+# (size, mtime_ns) of conversation files found not to match the compact encoding
+# (e.g. the older indented format), so reads skip re-checking them. Guarded by _INDEX_LOCK.
+_UNSLICEABLE: Dict[str, Tuple[int, int]] = {}
+
+
+def _conversation_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": data["id"],
+        "created_at": data["created_at"],
+        "title": data.get("title", "New Conversation"),
+        "message_count": len(data["messages"]),
+        # Files written before revisions were tracked count as revision 0
+        "revision": data.get("revision", 0),
+        "updated_at": data.get("updated_at") or data["created_at"],
+    }
+
+
+def _index_put(conversation: Dict[str, Any]):
+    with _INDEX_LOCK:
+        _INDEX[conversation["id"]] = _conversation_metadata(conversation)
+
+
+def _layout_put(conversation_id: str, path: str, layout: ConversationLayout):
+    st = os.stat(path)
+    with _INDEX_LOCK:
+        _LAYOUTS[conversation_id] = (st.st_size, st.st_mtime_ns, layout)
+
+
+def _current_layout(conversation_id: str, path: str) -> Optional[ConversationLayout]:
+    """The recorded layout of a conversation file, if the file has not changed since."""
+    with _INDEX_LOCK:
+        entry = _LAYOUTS.get(conversation_id)
+    if entry is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    size, mtime_ns, layout = entry
+    if st.st_size != size or st.st_mtime_ns != mtime_ns:
+        return None
+    return layout
+
+
+def _write_conversation(conversation: Dict[str, Any]):
+    """Write a conversation file and record its metadata and byte layout."""
+    path = get_conversation_path(conversation["id"])
+    data, layout = encode_conversation_layout(conversation)
+    with open(path, 'wb') as f:
+        f.write(data)
+    _index_put(conversation)
+    _layout_put(conversation["id"], path, layout)
+    _update_derived(conversation)
+
+
+# Data derived from conversations, kept current by the write paths
+_DERIVED = (
+    ("search index", search.index_conversation, search.remove_conversation),
+    ("leaderboard", leaderboard.record_conversation, leaderboard.remove_conversation),
+)
+
+
+def _update_derived(conversation: Dict[str, Any]):
+    # A failure must not fail the write; the sync_* functions repair it on the next start
+    for name, update, _ in _DERIVED:
+        try:
+            update(conversation)
+        except sqlite3.Error as e:
+            print(f"Error updating {name} for {conversation['id']}: {e}")
+
+
+def _remove_derived(conversation_id: str):
+    for name, _, remove in _DERIVED:
+        try:
+            remove(conversation_id)
+        except sqlite3.Error as e:
+            print(f"Error removing {conversation_id} from {name}: {e}")
+
+
+def _apply_defaults(data: Dict[str, Any]) -> Dict[str, Any]:
+    if "council_models" not in data:
+        data["council_models"] = COUNCIL_MODELS
+    if "chairman_model" not in data:
+        data["chairman_model"] = CHAIRMAN_MODEL
+    return data
+
+
+@_instrumented("build_index")
+def build_index() -> int:
+    """
+    Build the conversation metadata index by scanning DATA_DIR.
+
+    Safe to run in a worker thread while requests are served: entries
+    written meanwhile take precedence over what the scan read.
+
+    Returns:
+        Number of indexed conversations
+    """
+    global _INDEX_BUILT
+    ensure_data_dir()
+
+    scanned = {}
+    for filename in os.listdir(DATA_DIR):
+        if filename.endswith('.json'):
+            path = os.path.join(DATA_DIR, filename)
+            try:
+                # Metadata only: compressed stage texts need not be expanded
+                with open(path, 'rb') as f:
+                    data = loads(f.read())
+            except (OSError, ValueError) as e:
+                print(f"Error indexing {path}: {e}")
+                continue
+            # Other JSON files kept in DATA_DIR (e.g. model stats) are not conversations
+            if not isinstance(data, dict) or "id" not in data or "messages" not in data:
+                continue
+            scanned[data["id"]] = _conversation_metadata(data)
+
+    with _INDEX_LOCK:
+        for conversation_id, metadata in scanned.items():
+            if conversation_id not in _INDEX and os.path.exists(get_conversation_path(conversation_id)):
+                _INDEX[conversation_id] = metadata
+        _INDEX_BUILT = True
+        return len(_INDEX)
+
+
+@_instrumented("sync_search_index")
+def sync_search_index() -> Dict[str, int]:
+    """
+    Bring the search index in line with DATA_DIR.
+
+    Conversations whose revision differs from the indexed one are reindexed
+    and deleted ones are dropped, so files written while the server was down
+    (or by another process) become searchable.
+
+    Returns:
+        Counts of 'indexed' and 'removed' conversations
+    """
+    return search.reconcile(_revisions(), get_conversation)
+
+
+@_instrumented("sync_leaderboard")
+def sync_leaderboard() -> Dict[str, int]:
+    """
+    Bring the leaderboard in line with DATA_DIR (see sync_search_index).
+
+    Returns:
+        Counts of 'recorded' and 'removed' conversations
+    """
+    return leaderboard.reconcile(_revisions(), get_conversation)
+
+
+def _revisions() -> Dict[str, int]:
+    if not _INDEX_BUILT:
+        build_index()
+    with _INDEX_LOCK:
+        return {conversation_id: m["revision"] for conversation_id, m in _INDEX.items()}
 
 
 def ensure_data_dir():
@@ -18,6 +196,7 @@ def get_conversation_path(conversation_id: str) -> str:
     return os.path.join(DATA_DIR, f"{conversation_id}.json")
 
 
+@_instrumented("create_conversation")
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
     """
     Create a new conversation.
@@ -30,9 +209,12 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     """
     ensure_data_dir()
 
+    created_at = datetime.utcnow().isoformat()
     conversation = {
         "id": conversation_id,
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": created_at,
+        "updated_at": created_at,
+        "revision": 1,
         "title": "New Conversation",
         "messages": [],
         "council_models": COUNCIL_MODELS,
@@ -40,13 +222,12 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     }
 
     # Save to file
-    path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    _write_conversation(conversation)
 
     return conversation
 
 
+@_instrumented("get_conversation")
 def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     """
     Load a conversation from storage.
@@ -62,29 +243,133 @@ def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     if not os.path.exists(path):
         return None
 
-    with open(path, 'r') as f:
-        data = json.load(f)
-        if "council_models" not in data:
-            data["council_models"] = COUNCIL_MODELS
-        if "chairman_model" not in data:
-            data["chairman_model"] = CHAIRMAN_MODEL
-        return data
+    with open(path, 'rb') as f:
+        data = decode_conversation(f.read())
+    return _apply_defaults(data)
+
+
+def _read_slice(conversation_id: str, start: int, stop: Optional[int], with_header: bool) -> Optional[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], int]]:
+    """
+    Read a window of messages (and optionally the header fields) of a conversation.
 
+    Uses the recorded byte layout to read only the requested messages. Files
+    without a valid layout (written by another process or an older format)
+    are parsed in full; if re-encoding them reproduces the file exactly, the
+    layout is recorded so later reads are sliced, otherwise the mismatch is
+    remembered so unchanged files are not re-encoded on every read.
 
+    Returns:
+        Tuple of (header dict or None, messages in [start, stop), total message count),
+        or None if the conversation does not exist
+    """
+    path = get_conversation_path(conversation_id)
+    layout = _current_layout(conversation_id, path)
+
+    if layout is None:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            raw = f.read()
+        conversation = decode_conversation(raw)
+        version = (st.st_size, st.st_mtime_ns)
+        with _INDEX_LOCK:
+            known_mismatch = _UNSLICEABLE.get(conversation_id) == version
+        if not known_mismatch:
+            encoded, layout = encode_conversation_layout(conversation)
+            if encoded == raw:
+                _layout_put(conversation_id, path, layout)
+            else:
+                with _INDEX_LOCK:
+                    _UNSLICEABLE[conversation_id] = version
+        messages = conversation.pop("messages", [])
+        header = _apply_defaults(conversation) if with_header else None
+        return header, messages[start:stop], len(messages)
+
+    offsets = layout.messages
+    total = len(offsets)
+    stop = total if stop is None else min(stop, total)
+    header = None
+    messages: List[Dict[str, Any]] = []
+    with open(path, 'rb') as f:
+        if with_header:
+            header = _apply_defaults(loads(f.read(layout.header_end) + b"}"))
+        if 0 <= start < stop:
+            base = offsets[start][0]
+            f.seek(base)
+            span = f.read(offsets[stop - 1][1] - base)
+            messages = decode_messages([span[s - base:e - base] for s, e in offsets[start:stop]])
+    return header, messages, total
+
+
+@_instrumented("get_conversation_slice")
+def get_conversation_slice(conversation_id: str, start: int = 0, stop: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Load a conversation with only a window of its messages.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        start: Index of the first message to include
+        stop: Index after the last message to include (None for all remaining)
+
+    Returns:
+        Conversation dict whose 'messages' holds the window, plus 'message_count'
+        with the total number of messages, or None if not found
+    """
+    result = _read_slice(conversation_id, start, stop, with_header=True)
+    if result is None:
+        return None
+    header, messages, total = result
+    header["messages"] = messages
+    header["message_count"] = total
+    return header
+
+
+@_instrumented("save_conversation")
 def save_conversation(conversation: Dict[str, Any]):
     """
     Save a conversation to storage.
 
+    Bumps the conversation's revision and updated_at, which back the
+    ETag / Last-Modified validators of the conversation endpoint.
+
     Args:
         conversation: Conversation dict to save
     """
     ensure_data_dir()
 
-    path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    conversation["revision"] = conversation.get("revision", 0) + 1
+    conversation["updated_at"] = datetime.utcnow().isoformat()
+    _write_conversation(conversation)
+
 
+@_instrumented("get_conversation_version")
+def get_conversation_version(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a conversation's revision and last update time without loading it.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
 
+    Returns:
+        Dict with 'revision' and 'updated_at', or None if not found
+    """
+    if not _INDEX_BUILT:
+        build_index()
+
+    with _INDEX_LOCK:
+        metadata = _INDEX.get(conversation_id)
+    if metadata is None:
+        # Not written by this process (or removed): fall back to the file
+        conversation = get_conversation(conversation_id)
+        if conversation is None:
+            return None
+        _index_put(conversation)
+        metadata = _conversation_metadata(conversation)
+    return {"revision": metadata["revision"], "updated_at": metadata["updated_at"]}
+
+
+@_instrumented("list_conversations")
 def list_conversations() -> List[Dict[str, Any]]:
     """
     List all conversations (metadata only).
@@ -92,21 +377,11 @@ def list_conversations() -> List[Dict[str, Any]]:
     Returns:
         List of conversation metadata dicts
     """
-    ensure_data_dir()
+    if not _INDEX_BUILT:
+        build_index()
 
-    conversations = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
+    with _INDEX_LOCK:
+        conversations = [dict(m) for m in _INDEX.values()]
 
     # Sort by creation time, newest first
     conversations.sort(key=lambda x: x["created_at"], reverse=True)
@@ -114,6 +389,20 @@ def list_conversations() -> List[Dict[str, Any]]:
     return conversations
 
 
+def get_conversation_metadata(conversation_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up metadata of several conversations in the index.
+
+    Returns:
+        Metadata by id; unknown ids are omitted
+    """
+    if not _INDEX_BUILT:
+        build_index()
+    with _INDEX_LOCK:
+        return {cid: dict(_INDEX[cid]) for cid in conversation_ids if cid in _INDEX}
+
+
+@_instrumented("add_user_message")
 def add_user_message(conversation_id: str, content: str):
     """
     Add a user message to a conversation.
@@ -134,11 +423,13 @@ def add_user_message(conversation_id: str, content: str):
     save_conversation(conversation)
 
 
+@_instrumented("add_assistant_message")
 def add_assistant_message(
     conversation_id: str,
     stage1: List[Dict[str, Any]],
     stage2: List[Dict[str, Any]],
-    stage3: Dict[str, Any]
+    stage3: Dict[str, Any],
+    metadata: Optional[Dict[str, Any]] = None,
 ):
     """
     Add an assistant message with all 3 stages to a conversation.
@@ -148,21 +439,27 @@ def add_assistant_message(
         stage1: List of individual model responses
         stage2: List of model rankings
         stage3: Final synthesized response
+        metadata: Optional run metadata (label mapping, aggregate rankings,
+            council selection)
     """
     conversation = get_conversation(conversation_id)
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["messages"].append({
+    message = {
         "role": "assistant",
         "stage1": stage1,
         "stage2": stage2,
         "stage3": stage3
-    })
+    }
+    if metadata:
+        message["metadata"] = metadata
+    conversation["messages"].append(message)
 
     save_conversation(conversation)
 
 
+@_instrumented("get_message")
 def get_message(conversation_id: str, message_index: int) -> Optional[Dict[str, Any]]:
     """
     Get a specific message by index within a conversation.
@@ -174,16 +471,15 @@ def get_message(conversation_id: str, message_index: int) -> Optional[Dict[str,
     Returns:
         The message dict if found, otherwise None
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
+    if message_index < 0:
         return None
-
-    messages = conversation.get("messages", [])
-    if message_index < 0 or message_index >= len(messages):
+    result = _read_slice(conversation_id, message_index, message_index + 1, with_header=False)
+    if result is None or not result[1]:
         return None
-    return messages[message_index]
+    return result[1][0]
 
 
+@_instrumented("update_message")
 def update_message(conversation_id: str, message_index: int, updates: Dict[str, Any]) -> bool:
     """
     Update an existing message in a conversation.
@@ -198,25 +494,39 @@ def update_message(conversation_id: str, message_index: int, updates: Dict[str,
     Returns:
         True if updated successfully, False if not found
     """
+    return update_messages(conversation_id, {message_index: updates})
+
+
+@_instrumented("update_messages")
+def update_messages(conversation_id: str, updates: Dict[int, Dict[str, Any]]) -> bool:
+    """
+    Update several messages of a conversation in one write.
+
+    Args:
+        conversation_id: Conversation identifier
+        updates: Fields to merge into each message, by zero-based message index
+
+    Returns:
+        True if updated successfully, False if the conversation or any message was not found
+    """
     conversation = get_conversation(conversation_id)
     if conversation is None:
         return False
 
     messages = conversation.get("messages", [])
-    if message_index < 0 or message_index >= len(messages):
-        return False
+    for message_index in updates:
+        if message_index < 0 or message_index >= len(messages) or not isinstance(messages[message_index], dict):
+            return False
 
-    # Merge updates into the message
-    current = messages[message_index]
-    if not isinstance(current, dict):
-        return False
-
-    current.update(updates)
+    # Merge updates into the messages
+    for message_index, fields in updates.items():
+        messages[message_index].update(fields)
 
     save_conversation(conversation)
     return True
 
 
+@_instrumented("update_conversation_title")
 def update_conversation_title(conversation_id: str, title: str):
     """
     Update the title of a conversation.
@@ -233,6 +543,25 @@ def update_conversation_title(conversation_id: str, title: str):
     save_conversation(conversation)
 
 
+@_instrumented("update_history_summary")
+def update_history_summary(conversation_id: str, summary: Optional[Dict[str, Any]]):
+    """
+    Store the rolling summary of a conversation's earlier turns.
+
+    Args:
+        conversation_id: Conversation identifier
+        summary: Dict with 'text' and 'through' (index of the first message
+            not covered by the summary), or None to drop it
+    """
+    conversation = get_conversation(conversation_id)
+    if conversation is None:
+        raise ValueError(f"Conversation {conversation_id} not found")
+
+    conversation["history_summary"] = summary
+    save_conversation(conversation)
+
+
+@_instrumented("delete_conversation")
 def delete_conversation(conversation_id: str) -> bool:
     """
     Delete a conversation file.
@@ -248,9 +577,15 @@ def delete_conversation(conversation_id: str) -> bool:
     if not os.path.exists(path):
         return False
     os.remove(path)
+    with _INDEX_LOCK:
+        _INDEX.pop(conversation_id, None)
+        _LAYOUTS.pop(conversation_id, None)
+        _UNSLICEABLE.pop(conversation_id, None)
+    _remove_derived(conversation_id)
     return True
 
 
+@_instrumented("update_conversation_config")
 def update_conversation_config(conversation_id: str, updates: Dict[str, Any]):
     conversation = get_conversation(conversation_id)
     if conversation is None:
@@ -259,4 +594,6 @@ def update_conversation_config(conversation_id: str, updates: Dict[str, Any]):
         conversation["council_models"] = updates["council_models"]
     if "chairman_model" in updates and isinstance(updates["chairman_model"], str):
         conversation["chairman_model"] = updates["chairman_model"]
+    if "generation" in updates and isinstance(updates["generation"], dict):
+        conversation["generation"] = updates["generation"]
     save_conversation(conversation)
@@ -0,0 +1,256 @@
+"""OpenTelemetry-style tracing spans across the council pipeline.
+
+Spans are propagated with contextvars, so upstream calls started from a
+stage (including parallel asyncio tasks) are parented to it. Finished spans
+go to a pluggable exporter; set TRACE_EXPORTER to "memory" or "jsonl"
+(writing to TRACE_FILE) to enable one, or install any object with an
+`export(span)` method via set_exporter. Without an exporter, spans are no-ops.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .config import TRACE_EXPORTER, TRACE_FILE
+
+
+class Span:
+    """A timed operation with attributes, parented to the span active when it started."""
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes)
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_time_unix_nano is None:
+            self.end_time_unix_nano = time.time_ns()
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.end_time_unix_nano or time.time_ns()
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": end,
+            "duration_ms": (end - self.start_time_unix_nano) / 1e6,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded when tracing is disabled."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans in memory (for tests and benchmarks)."""
+
+    def __init__(self, max_spans: int = 10000):
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self._spans.append(span.to_dict())
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._spans)
+        if trace_id is not None:
+            items = [s for s in items if s["trace_id"] == trace_id]
+        return items
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+class JsonFileExporter:
+    """Appends finished spans to a JSON Lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + "\n")
+
+
+_EXPORTER: Optional[Any] = None
+_CURRENT_SPAN: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def set_exporter(exporter: Optional[Any]):
+    """
+    Install the exporter receiving finished spans.
+
+    Args:
+        exporter: Any object with an `export(span)` method, or None to disable tracing
+    """
+    global _EXPORTER
+    _EXPORTER = exporter
+
+
+def get_exporter() -> Optional[Any]:
+    return _EXPORTER
+
+
+def current_span() -> Optional[Span]:
+    return _CURRENT_SPAN.get()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """
+    Context manager recording a span around a block.
+
+    Args:
+        name: Span name (e.g. "llm.query", "storage.get_conversation")
+        **attributes: Initial span attributes
+
+    Yields:
+        The span, for adding attributes while it is active
+    """
+    if _EXPORTER is None:
+        yield _NOOP_SPAN
+        return
+    parent = _CURRENT_SPAN.get()
+    sp = Span(name, parent.trace_id if parent else secrets.token_hex(16), parent.span_id if parent else None, attributes)
+    token = _CURRENT_SPAN.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.record_error(e)
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        sp.end()
+        _export(sp)
+
+
+def _export(sp: Span):
+    exporter = _EXPORTER
+    if exporter is None:
+        return
+    try:
+        exporter.export(sp)
+    except Exception as e:
+        print(f"Error exporting span {sp.name}: {e}")
+
+
+def traced(name: str) -> Callable:
+    """Decorator wrapping a sync or async function in a span."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a span per HTTP request.
+
+    The span stays open until the last body chunk is sent, so streamed
+    (SSE) endpoints are timed end to end and stage spans nest under them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _EXPORTER is None:
+            await self.app(scope, receive, send)
+            return
+
+        with span(f"HTTP {scope['method']}", **{"http.method": scope["method"], "http.target": scope["path"]}) as sp:
+            async def traced_send(message):
+                if message["type"] == "http.response.start":
+                    sp.set_attribute("http.status_code", message["status"])
+                    route = scope.get("route")
+                    if route is not None and getattr(route, "path", None):
+                        sp.name = f"{scope['method']} {route.path}"
+                        sp.set_attribute("http.route", route.path)
+                await send(message)
+
+            await self.app(scope, receive, traced_send)
+
+
+def configure(kind: str = TRACE_EXPORTER, path: str = TRACE_FILE):
+    """
+    Install one of the bundled exporters.
+
+    Args:
+        kind: "none", "memory" or "jsonl"
+        path: Output file for the "jsonl" exporter
+    """
+    kind = (kind or "none").strip().lower()
+    if kind == "memory":
+        set_exporter(InMemoryExporter())
+    elif kind == "jsonl":
+        set_exporter(JsonFileExporter(path))
+    elif kind == "none":
+        set_exporter(None)
+    else:
+        raise ValueError(f"Unknown TRACE_EXPORTER: {kind}")
+
+
+configure()
@@ -0,0 +1,62 @@
+"""Startup warm-up: preload the model catalog, connections and storage index, and sync derived data."""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from . import storage
+from .config import WARMUP_CONNECTIONS
+from .openrouter import fetch_available_models, warm_up_connections
+
+# Readiness state reported by /ready
+WARMUP_STATE: Dict[str, Any] = {
+    "ready": False,
+    "started_at": None,
+    "completed_at": None,
+    "steps": {},
+}
+
+
+async def _run_step(name: str, coro) -> None:
+    """Run one warm-up step, recording its duration, result and any error."""
+    start = time.perf_counter()
+    step: Dict[str, Any] = {"ok": False}
+    try:
+        step["result"] = await coro
+        step["ok"] = True
+    except Exception as e:
+        step["error"] = str(e)
+        print(f"Warm-up step {name} failed: {e}")
+    step["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    WARMUP_STATE["steps"][name] = step
+
+
+async def _load_catalog() -> int:
+    models, _ = await fetch_available_models()
+    return len(models)
+
+
+async def warm_up() -> Dict[str, Any]:
+    """
+    Run all warm-up steps concurrently and mark the instance ready.
+
+    Failed steps are reported but do not block readiness: the instance then
+    pays the cost lazily on the first request, as it would without warm-up.
+
+    Returns:
+        The final warm-up state
+    """
+    WARMUP_STATE["started_at"] = time.time()
+    await asyncio.gather(
+        _run_step("model_catalog", _load_catalog()),
+        _run_step("connections", warm_up_connections(WARMUP_CONNECTIONS)),
+        _run_step("storage_index", asyncio.to_thread(storage.build_index)),
+    )
+    # These need the storage index; they run after it rather than rebuilding it
+    await asyncio.gather(
+        _run_step("search_index", asyncio.to_thread(storage.sync_search_index)),
+        _run_step("leaderboard", asyncio.to_thread(storage.sync_leaderboard)),
+    )
+    WARMUP_STATE["completed_at"] = time.time()
+    WARMUP_STATE["ready"] = True
+    return WARMUP_STATE
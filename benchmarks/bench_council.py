@@ -0,0 +1,365 @@
+"""End-to-end council benchmark.
+
+Drives the FastAPI app in-process (directly over ASGI, so streamed events are
+timestamped as they are produced) against the mock OpenRouter server, and
+reports latency percentiles, time to first SSE event, per-stage durations,
+throughput and event-loop lag as JSON.
+
+    python -m benchmarks.bench_council --iterations 50 --concurrency 8 \\
+        --profile benchmarks/profiles/fast.json --output bench.json
+
+Pass --baseline with an earlier result file to fail on p95 regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .common import LoopLagMonitor, compare_results, environment_info, now, summarize, write_results
+
+SCENARIOS = [
+    "message",
+    "message_stream",
+    "continue",
+    "continue_stream",
+    "rerun_full",
+    "rerun_stage1_model",
+    "rerun_stage2_model",
+    "rerun_stage3",
+]
+
+Chunks = List[Tuple[float, bytes]]
+
+
+async def call_app(app, method: str, path: str, body: Any = None) -> Tuple[int, float, Chunks]:
+    """
+    Call an ASGI app directly and timestamp every response body chunk.
+
+    Returns:
+        Tuple of (status code, request start time, [(time, chunk), ...])
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+    disconnected = asyncio.Event()
+    status = 0
+    chunks: Chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if message.get("body"):
+                chunks.append((now(), message["body"]))
+            if not message.get("more_body", False):
+                disconnected.set()
+
+    start = now()
+    await app(scope, receive, send)
+    return status, start, chunks
+
+
+def json_body(chunks: Chunks) -> Any:
+    return json.loads(b"".join(c for _, c in chunks) or b"null")
+
+
+def sse_events(chunks: Chunks) -> List[Tuple[float, Dict[str, Any]]]:
+    """Parse timestamped SSE chunks into (time, event) pairs."""
+    events = []
+    buffer = ""
+    for t, chunk in chunks:
+        buffer += chunk.decode()
+        while "\n\n" in buffer:
+            block, buffer = buffer.split("\n\n", 1)
+            for line in block.splitlines():
+                if line.startswith("data: "):
+                    events.append((t, json.loads(line[6:])))
+    return events
+
+
+def stage_durations(events: List[Tuple[float, Dict[str, Any]]]) -> Dict[str, float]:
+    """Durations between each stageN_start and stageN_complete event."""
+    starts: Dict[str, float] = {}
+    durations: Dict[str, float] = {}
+    for t, event in events:
+        kind = event.get("type", "")
+        if kind.endswith("_start") and kind.startswith("stage") and "_model_" not in kind:
+            starts[kind[:-len("_start")]] = t
+        elif kind.endswith("_complete") and "_model_" not in kind:
+            stage = kind[:-len("_complete")]
+            if stage in starts:
+                durations[stage] = t - starts[stage]
+    return durations
+
+
+class Bench:
+    """Scenario implementations bound to an app instance."""
+
+    def __init__(self, app, rerun_model: str):
+        self.app = app
+        self.rerun_model = rerun_model
+        self.prompt = "Compare the trade-offs of optimistic and pessimistic locking."
+
+    async def new_conversation(self) -> str:
+        status, _, chunks = await call_app(self.app, "POST", "/api/conversations", {})
+        if status != 200:
+            raise RuntimeError(f"create conversation failed: {status}")
+        return json_body(chunks)["id"]
+
+    async def completed_conversation(self) -> str:
+        cid = await self.new_conversation()
+        status, _, _ = await call_app(self.app, "POST", f"/api/conversations/{cid}/message", {"content": self.prompt})
+        if status != 200:
+            raise RuntimeError(f"setup message failed: {status}")
+        return cid
+
+    async def message(self, _ctx) -> Dict[str, Any]:
+        cid = await self.new_conversation()
+        status, start, chunks = await call_app(self.app, "POST", f"/api/conversations/{cid}/message", {"content": self.prompt})
+        end = chunks[-1][0] if chunks else now()
+        return {"ok": status == 200, "latency": end - start, "ttfe": None, "stages": {}}
+
+    async def message_stream(self, _ctx) -> Dict[str, Any]:
+        cid = await self.new_conversation()
+        status, start, chunks = await call_app(
+            self.app, "POST", f"/api/conversations/{cid}/message/stream", {"content": self.prompt, "mode": "auto"}
+        )
+        events = sse_events(chunks)
+        ok = status == 200 and any(e.get("type") == "complete" for _, e in events)
+        end = events[-1][0] if events else now()
+        return {
+            "ok": ok,
+            "latency": end - start,
+            "ttfe": events[0][0] - start if events else None,
+            "stages": stage_durations(events),
+        }
+
+    async def _continue(self, streaming: bool) -> Dict[str, Any]:
+        cid = await self.new_conversation()
+        status, start, chunks = await call_app(
+            self.app, "POST", f"/api/conversations/{cid}/message/stream", {"content": self.prompt, "mode": "step"}
+        )
+        events = sse_events(chunks)
+        ok = status == 200 and any(e.get("type") == "paused" for _, e in events)
+        stages = stage_durations(events)
+        ttfe = events[0][0] - start if events else None
+        suffix = "continue/stream" if streaming else "continue"
+        for stage in ("stage2", "stage3"):
+            status, t0, chunks = await call_app(self.app, "POST", f"/api/conversations/{cid}/messages/1/{suffix}")
+            ok = ok and status == 200
+            stages[stage] = (chunks[-1][0] if chunks else now()) - t0
+            if streaming:
+                stage_events = sse_events(chunks)
+                ok = ok and not any(e.get("type") == "error" for _, e in stage_events)
+                if stage_events:
+                    stages[f"{stage}_ttfe"] = stage_events[0][0] - t0
+        return {"ok": ok, "latency": now() - start, "ttfe": ttfe, "stages": stages}
+
+    async def continue_(self, _ctx) -> Dict[str, Any]:
+        return await self._continue(streaming=False)
+
+    async def continue_stream(self, _ctx) -> Dict[str, Any]:
+        return await self._continue(streaming=True)
+
+    async def _rerun(self, cid: str, path: str, body: Any = None) -> Dict[str, Any]:
+        status, start, chunks = await call_app(self.app, "POST", f"/api/conversations/{cid}/messages/1/{path}", body)
+        end = chunks[-1][0] if chunks else now()
+        return {"ok": status == 200, "latency": end - start, "ttfe": None, "stages": {}}
+
+    async def rerun_full(self, cid) -> Dict[str, Any]:
+        return await self._rerun(cid, "rerun", {"content": None})
+
+    async def rerun_stage1_model(self, cid) -> Dict[str, Any]:
+        return await self._rerun(cid, f"stage1/model/{self.rerun_model}")
+
+    async def rerun_stage2_model(self, cid) -> Dict[str, Any]:
+        return await self._rerun(cid, f"stage2/model/{self.rerun_model}")
+
+    async def rerun_stage3(self, cid) -> Dict[str, Any]:
+        return await self._rerun(cid, "stage3")
+
+    def scenario(self, name: str) -> Tuple[Callable, Optional[Callable]]:
+        """Return (run, prepare) for a scenario; prepare builds untimed fixtures."""
+        run = getattr(self, "continue_" if name == "continue" else name)
+        prepare = self.completed_conversation if name.startswith("rerun") else None
+        return run, prepare
+
+
+async def run_scenario(bench: Bench, name: str, iterations: int, concurrency: int) -> Dict[str, Any]:
+    """Run one scenario `iterations` times with `concurrency` workers and aggregate."""
+    run, prepare = bench.scenario(name)
+
+    contexts: List[Any] = [None] * iterations
+    if prepare is not None:
+        sem = asyncio.Semaphore(concurrency)
+
+        async def build(i: int):
+            async with sem:
+                contexts[i] = await prepare()
+
+        await asyncio.gather(*[build(i) for i in range(iterations)])
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for ctx in contexts:
+        queue.put_nowait(ctx)
+    records: List[Dict[str, Any]] = []
+
+    async def worker():
+        while not queue.empty():
+            ctx = queue.get_nowait()
+            try:
+                records.append(await run(ctx))
+            except Exception as e:
+                records.append({"ok": False, "latency": None, "ttfe": None, "stages": {}, "error": str(e)})
+
+    async with LoopLagMonitor() as lag:
+        start = now()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        wall = now() - start
+
+    ok = [r for r in records if r["ok"]]
+    stage_names = sorted({s for r in ok for s in r["stages"]})
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": len(records) - len(ok),
+        "wall_seconds": wall,
+        "throughput_per_sec": len(ok) / wall if wall > 0 else None,
+        "latency": summarize([r["latency"] for r in ok]),
+        "time_to_first_event": summarize([r["ttfe"] for r in ok if r["ttfe"] is not None]),
+        "stages": {s: summarize([r["stages"][s] for r in ok if s in r["stages"]]) for s in stage_names},
+        "event_loop_lag": summarize(lag.samples),
+    }
+
+
+def start_mock(port: int, profile: Optional[str]) -> subprocess.Popen:
+    """Start backend.mock_openrouter in a subprocess and wait until it answers."""
+    cmd = [sys.executable, "-m", "backend.mock_openrouter", "--port", str(port)]
+    if profile:
+        cmd += ["--profile", profile]
+    proc = subprocess.Popen(cmd)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/v1/models", timeout=1.0)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("mock OpenRouter server did not start")
+
+
+async def run_all(args) -> Dict[str, Any]:
+    # Import after the environment is configured: backend.config reads it at import time
+    from backend.main import app
+    from backend.config import COUNCIL_MODELS
+
+    rerun_model = next(m for m in COUNCIL_MODELS if m)
+    bench = Bench(app, rerun_model)
+    scenarios = {}
+    for name in args.scenarios:
+        print(f"Running {name} ({args.iterations} x {args.concurrency})...", file=sys.stderr)
+        scenarios[name] = await run_scenario(bench, name, args.iterations, args.concurrency)
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end LLM Council benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--profile", help="Mock OpenRouter profile (JSON)")
+    parser.add_argument("--llm-url", help="Use an already running OpenAI-compatible endpoint instead of spawning the mock")
+    parser.add_argument("--mock-port", type=int, default=8099)
+    parser.add_argument("--cassette", help="Replay upstream traffic from this cassette instead of calling an endpoint")
+    parser.add_argument("--cassette-timing", choices=["original", "fast"], default="original",
+                        help="Replay at the recorded timings or as fast as possible")
+    parser.add_argument("--data-dir", help="Conversation directory (defaults to a fresh temp dir)")
+    parser.add_argument("--output", help="Write JSON results here (stdout if omitted)")
+    parser.add_argument("--baseline", help="Earlier result file to compare p95 latency against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p95 regression (fraction)")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    proc = None
+    if args.cassette:
+        os.environ["CASSETTE_MODE"] = "replay"
+        os.environ["CASSETTE_PATH"] = args.cassette
+        os.environ["CASSETTE_TIMING"] = args.cassette_timing
+        if args.llm_url:
+            os.environ["OPENROUTER_API_URL"] = args.llm_url
+    elif args.llm_url:
+        os.environ["OPENROUTER_API_URL"] = args.llm_url
+    else:
+        proc = start_mock(args.mock_port, args.profile)
+        os.environ["OPENROUTER_API_URL"] = f"http://127.0.0.1:{args.mock_port}/api/v1/chat/completions"
+    os.environ["DATA_DIR"] = args.data_dir or tempfile.mkdtemp(prefix="council-bench-")
+
+    try:
+        scenarios = asyncio.run(run_all(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    results = {
+        "benchmark": "council",
+        "environment": environment_info(),
+        "config": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "profile": args.profile,
+            "llm_url": os.environ.get("OPENROUTER_API_URL"),
+            "cassette": args.cassette,
+            "cassette_timing": args.cassette_timing if args.cassette else None,
+        },
+        "scenarios": scenarios,
+    }
+    write_results(results, args.output)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, ["latency", "p95"], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Stage 2 design benchmark: full vs sparse ranking.
+
+Simulates rankers that order responses by a hidden true quality plus
+Gaussian noise, then compares the full design (every ranker ranks every
+response) with the sparse design used when STAGE2_MODE is "sparse" or
+"auto". For each council size it reports Stage 2 prompt size (words across
+all rankers), and how well the aggregate ranking recovers the true order
+(Kendall tau and top-1 accuracy, averaged over trials). No LLM is called.
+
+    python -m benchmarks.bench_stage2 --sizes 4,8,12,16,24 --subset-size 4 \\
+        --noise 1.5 --trials 200 --output stage2.json
+"""
+
+import argparse
+import random
+import re
+from itertools import combinations
+from typing import Any, Dict, List, Optional
+
+from backend.council import _ranking_prompt, calculate_aggregate_rankings
+from backend.ranking import sparse_design
+
+from .common import environment_info, write_results
+
+_WORDS = "council model response ranking evidence answer detail insight accuracy argument".split()
+
+
+def kendall_tau(order: List[str], truth: List[str]) -> float:
+    """Kendall rank correlation between two orderings of the same items."""
+    position = {item: i for i, item in enumerate(order)}
+    concordant = discordant = 0
+    for a, b in combinations(truth, 2):
+        if position[a] < position[b]:
+            concordant += 1
+        else:
+            discordant += 1
+    pairs = concordant + discordant
+    return (concordant - discordant) / pairs if pairs else 1.0
+
+
+def simulate(size: int, subset_size: Optional[int], noise: float, chars: int, rng: random.Random) -> Dict[str, float]:
+    """Run one simulated Stage 2 and score the aggregate ranking."""
+    models = [f"model-{i}" for i in range(size)]
+    quality = {m: rng.gauss(0, 1) for m in models}
+    truth = sorted(models, key=lambda m: -quality[m])
+    stage1 = [{"model": m, "response": " ".join(rng.choice(_WORDS) for _ in range(chars // 8))} for m in models]
+    label_to_model = {f"Response {chr(65 + i)}": m for i, m in enumerate(models)}
+
+    sparse = subset_size is not None and subset_size < size
+    if sparse:
+        design = sparse_design(size, models, subset_size, {m: i for i, m in enumerate(models)}, seed=str(rng.random()))
+    else:
+        design = {m: list(range(size)) for m in models}
+
+    words = 0
+    stage2 = []
+    for ranker in models:
+        prompt = _ranking_prompt("Simulated question?", stage1, design[ranker])
+        words += len(prompt.split())
+        labels = re.findall(r'Response [A-Z](?=:)', prompt)
+        labels.sort(key=lambda label: -(quality[label_to_model[label]] + rng.gauss(0, noise)))
+        entry = {"model": ranker, "ranking": "FINAL RANKING:\n" + "\n".join(f"{i}. {label}" for i, label in enumerate(labels, 1))}
+        if sparse:
+            entry["subset"] = sorted(labels)
+        stage2.append(entry)
+
+    aggregate = [a["model"] for a in calculate_aggregate_rankings(stage2, label_to_model)]
+    # Models nobody ranked sit at the bottom
+    aggregate += [m for m in truth if m not in aggregate]
+    return {"prompt_words": words, "kendall_tau": kendall_tau(aggregate, truth), "top1": float(aggregate[0] == truth[0])}
+
+
+def run_size(size: int, subset_size: Optional[int], args, rng: random.Random) -> Dict[str, Any]:
+    runs = [simulate(size, subset_size, args.noise, args.chars, rng) for _ in range(args.trials)]
+    return {key: round(sum(r[key] for r in runs) / len(runs), 4) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and sparse Stage 2 designs")
+    parser.add_argument("--sizes", default="4,8,12,16,24", help="Council sizes")
+    parser.add_argument("--subset-size", type=int, default=4, help="Responses per ranker in the sparse design")
+    parser.add_argument("--noise", type=float, default=1.5, help="Ranker noise (std dev, in units of quality spread)")
+    parser.add_argument("--chars", type=int, default=2000, help="Characters per Stage 1 response")
+    parser.add_argument("--trials", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write JSON results here (stdout if omitted)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scenarios = {}
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        if size > 26:
+            parser.error("council sizes above 26 exceed the Response A-Z labels")
+        full = run_size(size, None, args, rng)
+        sparse = run_size(size, args.subset_size, args, rng)
+        scenarios[f"n{size}"] = {
+            "full": full,
+            "sparse": sparse,
+            "prompt_ratio": round(sparse["prompt_words"] / full["prompt_words"], 4),
+        }
+
+    write_results({
+        "environment": environment_info(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "scenarios": scenarios,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Storage micro-benchmarks across conversation counts and lengths.
+
+Generates synthetic data directories (10 to 100k conversations, 1 to 500
+turns each) and measures list, get, append and update_message latency plus
+memory use. Each grid cell runs in a fresh subprocess with its own DATA_DIR,
+so any module exposing the storage API can be benchmarked:
+
+    python -m benchmarks.bench_storage --backend backend.storage \\
+        --counts 10,1000,100000 --turns 1,100,500 --output storage.json
+
+The backend module must provide save_conversation, get_conversation,
+get_message, list_conversations, add_user_message, add_assistant_message,
+update_message and delete_conversation with the signatures of
+backend.storage. Mutations run against scratch copies, so generated
+directories stay unchanged and are reused between runs.
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from .common import compare_results, environment_info, now, summarize, write_results
+
+OPS = ["list_cold", "list", "get", "get_message", "append_user", "append_assistant", "update_message"]
+
+_WORDS = (
+    "council model response ranking evidence answer detail insight accuracy "
+    "argument context summary latency storage benchmark synthetic"
+).split()
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words = []
+    size = 0
+    while size < chars:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def synthetic_turn(rng: random.Random, models: List[str], chars: int) -> List[Dict[str, Any]]:
+    """A user message plus a complete 3-stage assistant message."""
+    labels = [f"Response {chr(65 + i)}" for i in range(len(models))]
+    return [
+        {"role": "user", "content": _text(rng, 200)},
+        {
+            "role": "assistant",
+            "stage1": [{"model": m, "response": _text(rng, chars)} for m in models],
+            "stage2": [
+                {
+                    "model": m,
+                    "ranking": _text(rng, chars) + "\n\nFINAL RANKING:\n" + "\n".join(f"{i}. {l}" for i, l in enumerate(labels, 1)),
+                    "parsed_ranking": labels,
+                }
+                for m in models
+            ],
+            "stage3": {"model": models[0], "response": _text(rng, chars)},
+        },
+    ]
+
+
+def generate(storage, data_dir: str, count: int, turns: int, models: List[str], chars: int, seed: int) -> List[str]:
+    """
+    Populate `data_dir` through the backend's save_conversation.
+
+    Reuses a previously generated directory when its marker file matches.
+
+    Returns:
+        List of conversation ids
+    """
+    marker = os.path.join(data_dir, ".bench_complete")
+    rng = random.Random(seed)
+    ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(count)]
+    if os.path.exists(marker):
+        return ids
+    created = datetime(2024, 1, 1)
+    for i, cid in enumerate(ids):
+        messages: List[Dict[str, Any]] = []
+        for _ in range(turns):
+            messages.extend(synthetic_turn(rng, models, chars))
+        storage.save_conversation({
+            "id": cid,
+            "created_at": (created + timedelta(minutes=i)).isoformat(),
+            "title": _text(rng, 30)[:50],
+            "messages": messages,
+            "council_models": models,
+            "chairman_model": models[0],
+        })
+    with open(marker, 'w') as f:
+        f.write("ok")
+    return ids
+
+
+def measure(
+    fn: Callable[[Any], Any],
+    repeats: int,
+    setup: Callable[[], Any] = lambda: None,
+    teardown: Callable[[Any], Any] = lambda _: None,
+) -> Dict[str, Any]:
+    """
+    Latency summary and peak traced allocation of `fn` over `repeats` calls.
+
+    `setup` runs untimed before each call and its result is passed to `fn`
+    and then to `teardown`.
+    """
+    latencies = []
+    peak = 0
+    for _ in range(repeats):
+        arg = setup()
+        gc.collect()
+        tracemalloc.start()
+        start = now()
+        fn(arg)
+        latencies.append(now() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        teardown(arg)
+    result = summarize(latencies)
+    result["peak_alloc_bytes"] = peak
+    return result
+
+
+def run_cell(args) -> Dict[str, Any]:
+    """Benchmark one (count, turns) cell; runs inside the subprocess."""
+    storage = importlib.import_module(args.backend)
+    turns = int(args.turns)
+    models = [f"bench/model-{i}" for i in range(args.models)]
+
+    start = now()
+    ids = generate(storage, os.environ["DATA_DIR"], args.count, turns, models, args.chars, args.seed)
+    generate_seconds = now() - start
+
+    rng = random.Random(args.seed + 1)
+    turn = synthetic_turn(rng, models, args.chars)
+    pick = lambda: rng.choice(ids)
+
+    def scratch_copy() -> str:
+        conversation = storage.get_conversation(pick())
+        conversation["id"] = str(uuid.UUID(int=rng.getrandbits(128)))
+        storage.save_conversation(conversation)
+        return conversation["id"]
+
+    ops = {
+        "list_cold": measure(lambda _: storage.list_conversations(), 1),
+        "list": measure(lambda _: storage.list_conversations(), args.repeats),
+        "get": measure(storage.get_conversation, args.repeats, setup=pick),
+        # Last message of a conversation; backends may read it without loading the rest
+        "get_message": measure(lambda cid: storage.get_message(cid, 2 * turns - 1), args.repeats, setup=pick),
+        "append_user": measure(
+            lambda cid: storage.add_user_message(cid, turn[0]["content"]),
+            args.repeats, setup=scratch_copy, teardown=storage.delete_conversation,
+        ),
+        "append_assistant": measure(
+            lambda cid: storage.add_assistant_message(cid, turn[1]["stage1"], turn[1]["stage2"], turn[1]["stage3"]),
+            args.repeats, setup=scratch_copy, teardown=storage.delete_conversation,
+        ),
+        "update_message": measure(
+            lambda cid: storage.update_message(cid, 1, {"stage3": turn[1]["stage3"]}),
+            args.repeats, setup=scratch_copy, teardown=storage.delete_conversation,
+        ),
+    }
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+    return {
+        "conversations": args.count,
+        "turns": turns,
+        "generate_seconds": generate_seconds,
+        "max_rss_bytes": max_rss,
+        "ops": ops,
+    }
+
+
+def grid(counts: List[int], turns: List[int], cross: bool) -> List[Dict[str, int]]:
+    """Cells to run: the full product with --cross, else each axis against the other's smallest value."""
+    if cross:
+        return [{"count": c, "turns": t} for c in counts for t in turns]
+    cells = [{"count": c, "turns": min(turns)} for c in counts]
+    cells += [{"count": min(counts), "turns": t} for t in turns if t != min(turns)]
+    return cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage micro-benchmarks")
+    parser.add_argument("--backend", default="backend.storage", help="Module implementing the storage API")
+    parser.add_argument("--counts", default="10,100,1000,10000,100000", help="Conversation counts")
+    parser.add_argument("--turns", default="1,10,100,500", help="Turns (user + assistant pairs) per conversation")
+    parser.add_argument("--cross", action="store_true", help="Run the full counts x turns product")
+    parser.add_argument("--models", type=int, default=3, help="Council size in synthetic messages")
+    parser.add_argument("--chars", type=int, default=2000, help="Characters per stage text")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-root", default=os.path.join("data", "bench"),
+                        help="Where synthetic data directories are generated (and reused)")
+    parser.add_argument("--output", help="Write JSON results here (stdout if omitted)")
+    parser.add_argument("--baseline", help="Earlier result file to compare p95 latency against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p95 regression (fraction)")
+    # Internal: run a single cell in this process
+    parser.add_argument("--count", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--cell", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cell:
+        print(json.dumps(run_cell(args)))
+        return
+
+    counts = [int(c) for c in args.counts.split(",") if c.strip()]
+    turns = [int(t) for t in args.turns.split(",") if t.strip()]
+    scenarios = {}
+    for cell in grid(counts, turns, args.cross):
+        name = f"n{cell['count']}_t{cell['turns']}"
+        data_dir = os.path.join(
+            args.data_root, f"{name}_m{args.models}_c{args.chars}_s{args.seed}_{args.backend.replace('.', '-')}"
+        )
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Running {name}...", file=sys.stderr)
+        cmd = [
+            sys.executable, "-m", "benchmarks.bench_storage", "--cell",
+            "--backend", args.backend,
+            "--count", str(cell["count"]),
+            "--turns", str(cell["turns"]),
+            "--models", str(args.models),
+            "--chars", str(args.chars),
+            "--repeats", str(args.repeats),
+            "--seed", str(args.seed),
+        ]
+        out = subprocess.run(
+            cmd, env={**os.environ, "DATA_DIR": data_dir}, capture_output=True, text=True, check=True
+        ).stdout
+        scenarios[name] = json.loads(out.strip().splitlines()[-1])
+
+    results = {
+        "benchmark": "storage",
+        "environment": environment_info(),
+        "config": {
+            "backend": args.backend,
+            "models": args.models,
+            "chars": args.chars,
+            "repeats": args.repeats,
+            "seed": args.seed,
+        },
+        "scenarios": scenarios,
+    }
+    write_results(results, args.output)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = []
+        for op in OPS:
+            regressions += compare_results(results, baseline, ["ops", op, "p95"], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Shared helpers for benchmark suites: statistics, loop lag and result files."""
+
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from backend.metrics import percentile
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    """Summary statistics (count, mean, p50/p95/p99, max) for a sample."""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+class LoopLagMonitor:
+    """
+    Measure event-loop lag by scheduling short sleeps and recording the overshoot.
+
+    Use as an async context manager around the code under measurement.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def environment_info() -> Dict[str, Any]:
+    """Build/host details stored alongside results so runs can be compared."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def write_results(results: Dict[str, Any], path: Optional[str]):
+    """Write results as JSON to `path`, or to stdout when no path is given."""
+    text = json.dumps(results, indent=2)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    metric_path: List[str],
+    threshold: float,
+) -> List[str]:
+    """
+    Compare a metric between two result files, per scenario.
+
+    Args:
+        current: Results of this run
+        baseline: Results of a previous run
+        metric_path: Keys leading from a scenario entry to the metric (e.g. ["latency", "p95"])
+        threshold: Allowed relative increase (0.1 = 10%)
+
+    Returns:
+        List of human-readable regression descriptions (empty if none)
+    """
+    def lookup(entry: Dict[str, Any]):
+        for key in metric_path:
+            if not isinstance(entry, dict) or key not in entry:
+                return None
+            entry = entry[key]
+        return entry
+
+    regressions = []
+    for name, entry in (current.get("scenarios") or {}).items():
+        base_entry = (baseline.get("scenarios") or {}).get(name)
+        if base_entry is None:
+            continue
+        now, before = lookup(entry), lookup(base_entry)
+        if not now or not before:
+            continue
+        if now > before * (1 + threshold):
+            regressions.append(
+                f"{name}: {'.'.join(metric_path)} {before:.4f} -> {now:.4f} (+{(now / before - 1) * 100:.1f}%)"
+            )
+    return regressions
+
+
+def now() -> float:
+    """Monotonic clock used for all benchmark timings."""
+    return time.perf_counter()
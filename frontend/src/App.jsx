@@ -142,10 +142,20 @@ function App() {
         content,
         (eventType, event) => {
           switch (eventType) {
+          case 'queued':
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              lastMsg.queuePosition = event.position;
+              return { ...prev, messages };
+            });
+            break;
+
           case 'stage1_start':
             setCurrentConversation((prev) => {
               const messages = [...prev.messages];
               const lastMsg = messages[messages.length - 1];
+              lastMsg.queuePosition = null;
               lastMsg.loading.stage1 = true;
               return { ...prev, messages };
             });
@@ -156,6 +166,9 @@ function App() {
               const messages = [...prev.messages];
               const lastMsg = messages[messages.length - 1];
               lastMsg.stage1 = event.data;
+              if (event.metadata) {
+                lastMsg.metadata = { ...lastMsg.metadata, ...event.metadata };
+              }
               lastMsg.loading.stage1 = false;
               return { ...prev, messages };
             });
@@ -225,6 +238,12 @@ function App() {
 
           case 'error':
             console.error('Stream error:', event.message);
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              lastMsg.queuePosition = null;
+              return { ...prev, messages };
+            });
             setIsLoading(false);
             break;
 
@@ -351,24 +370,113 @@ function App() {
   const handleContinueNextStage = async () => {
     if (!currentConversationId || !currentConversation) return;
     const msgIndex = currentConversation.messages.length - 1;
-    try {
-      setIsContinuing(true);
-      const res = await api.continueStage(currentConversationId, msgIndex);
+    const updateLastMsg = (fn) => {
       setCurrentConversation((prev) => {
         const messages = [...prev.messages];
-        const lastMsg = messages[messages.length - 1];
-        if (res.stage === 'stage2') {
-          lastMsg.stage2 = res.data;
-          lastMsg.metadata = res.metadata;
-          lastMsg.paused = true;
-          lastMsg.pausedStage = 'stage2';
-        } else if (res.stage === 'stage3') {
-          lastMsg.stage3 = res.data;
-          lastMsg.paused = false;
-          lastMsg.pausedStage = null;
-        }
+        const lastMsg = { ...messages[messages.length - 1] };
+        lastMsg.loading = { ...(lastMsg.loading || {}) };
+        fn(lastMsg);
+        messages[messages.length - 1] = lastMsg;
         return { ...prev, messages };
       });
+    };
+    try {
+      setIsContinuing(true);
+      await api.continueStageStream(currentConversationId, msgIndex, (eventType, event) => {
+        switch (eventType) {
+        case 'queued':
+          updateLastMsg((lastMsg) => {
+            lastMsg.queuePosition = event.position;
+          });
+          break;
+
+        case 'stage2_start':
+          updateLastMsg((lastMsg) => {
+            lastMsg.queuePosition = null;
+            lastMsg.loading.stage2 = true;
+          });
+          break;
+
+        case 'stage2_model_start':
+          updateLastMsg((lastMsg) => {
+            const stage2 = [...(lastMsg.stage2 || [])];
+            if (!stage2.some((r) => r.model === event.model)) {
+              stage2.push({ model: event.model, ranking: '', parsed_ranking: [] });
+            }
+            lastMsg.stage2 = stage2;
+          });
+          break;
+
+        case 'stage2_model_delta':
+          updateLastMsg((lastMsg) => {
+            lastMsg.stage2 = (lastMsg.stage2 || []).map((r) => (
+              r.model === event.model ? { ...r, ranking: r.ranking + event.delta } : r
+            ));
+          });
+          break;
+
+        case 'stage2_model_complete':
+          if (!event.ok) {
+            updateLastMsg((lastMsg) => {
+              lastMsg.stage2 = (lastMsg.stage2 || []).filter((r) => r.model !== event.model);
+            });
+          }
+          break;
+
+        case 'stage2_complete':
+          updateLastMsg((lastMsg) => {
+            lastMsg.stage2 = event.data;
+            lastMsg.metadata = event.metadata;
+            lastMsg.loading.stage2 = false;
+          });
+          break;
+
+        case 'stage3_start':
+          updateLastMsg((lastMsg) => {
+            lastMsg.queuePosition = null;
+            lastMsg.loading.stage3 = true;
+          });
+          break;
+
+        case 'stage3_delta':
+          updateLastMsg((lastMsg) => {
+            const previous = lastMsg.stage3?.response || '';
+            lastMsg.stage3 = { model: event.model, response: previous + event.delta };
+          });
+          break;
+
+        case 'stage3_complete':
+          updateLastMsg((lastMsg) => {
+            lastMsg.stage3 = event.data;
+            lastMsg.loading.stage3 = false;
+            lastMsg.paused = false;
+            lastMsg.pausedStage = null;
+          });
+          break;
+
+        case 'paused':
+          updateLastMsg((lastMsg) => {
+            lastMsg.paused = true;
+            lastMsg.pausedStage = event.stage;
+            lastMsg.loading = { ...lastMsg.loading, stage1: false, stage2: false, stage3: false };
+          });
+          break;
+
+        case 'complete':
+          break;
+
+        case 'error':
+          console.error('Stream error:', event.message);
+          updateLastMsg((lastMsg) => {
+            lastMsg.queuePosition = null;
+            lastMsg.loading = { ...lastMsg.loading, stage2: false, stage3: false };
+          });
+          break;
+
+        default:
+          console.log('Unknown event type:', eventType);
+        }
+      });
     } catch (error) {
       console.error('Failed to continue next stage:', error);
     } finally {
@@ -0,0 +1,32 @@
+import React from 'react'
+import { render, screen } from '@testing-library/react'
+import { it, expect } from 'vitest'
+import Stage2 from '../components/Stage2.jsx'
+
+// Response A stands for two near-identical answers
+const labelToModel = {
+  'Response A': ['openai/gpt-x', 'google/gemini-y'],
+  'Response B': 'x-ai/grok-z',
+}
+
+const rankings = [
+  {
+    model: 'x-ai/grok-z',
+    ranking: 'Response A is thorough.\n\nFINAL RANKING:\n1. Response A\n2. Response B',
+    parsed_ranking: ['Response A', 'Response B'],
+  },
+]
+
+it('names every model behind a grouped label', () => {
+  render(<Stage2 rankings={rankings} labelToModel={labelToModel} />)
+  // In the de-anonymized evaluation text and in the extracted ranking
+  expect(screen.getAllByText('gpt-x = gemini-y').length).toBeGreaterThanOrEqual(2)
+  expect(screen.getAllByText('grok-z').length).toBeGreaterThanOrEqual(2)
+  expect(screen.queryByText(/Response A is thorough/)).not.toBeInTheDocument()
+})
+
+it('keeps single-model labels unchanged', () => {
+  render(<Stage2 rankings={rankings} labelToModel={{ 'Response A': 'openai/gpt-x', 'Response B': 'x-ai/grok-z' }} />)
+  expect(screen.getAllByText('gpt-x').length).toBeGreaterThanOrEqual(2)
+  expect(screen.queryByText(/ = /)).not.toBeInTheDocument()
+})
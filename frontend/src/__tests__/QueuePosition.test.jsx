@@ -0,0 +1,49 @@
+import React from 'react'
+import { render, screen, act, waitFor } from '@testing-library/react'
+import userEvent from '@testing-library/user-event'
+import { it, expect, vi, beforeAll } from 'vitest'
+
+vi.mock('../api', () => ({
+  api: {
+    listConversations: async () => ([
+      { id: 'c1', title: 'One', created_at: '', message_count: 0 },
+    ]),
+    getConversation: async () => ({ id: 'c1', messages: [] }),
+    sendMessageStream: vi.fn(),
+  },
+}))
+
+import App from '../App.jsx'
+import { api } from '../api'
+
+beforeAll(() => {
+  // jsdom has no layout, so no scrolling either
+  Element.prototype.scrollIntoView = vi.fn()
+})
+
+it('shows the queue position until the council starts', async () => {
+  let start
+  api.sendMessageStream.mockImplementation(async (id, content, onEvent) => {
+    onEvent('queued', { type: 'queued', position: 2 })
+    await new Promise((resolve) => { start = resolve })
+    onEvent('queued', { type: 'queued', position: 1 })
+    await new Promise((resolve) => { start = resolve })
+    onEvent('stage1_start', { type: 'stage1_start' })
+  })
+
+  const user = userEvent.setup()
+  render(<App />)
+  await user.click(await screen.findByRole('option'))
+  await user.type(await screen.findByPlaceholderText(/ask your question/i), 'Hello')
+  await user.click(screen.getByRole('button', { name: /^send$/i }))
+
+  expect(await screen.findByText(/waiting for a free council slot \(position 2\)/i)).toBeInTheDocument()
+
+  await act(async () => start())
+  expect(await screen.findByText(/\(position 1\)/)).toBeInTheDocument()
+  expect(screen.queryByText(/\(position 2\)/)).not.toBeInTheDocument()
+
+  await act(async () => start())
+  await waitFor(() => expect(screen.queryByText(/free council slot/i)).not.toBeInTheDocument())
+  expect(screen.getByText(/Running Stage 1/i)).toBeInTheDocument()
+})
@@ -0,0 +1,45 @@
+import React from 'react'
+import { render, screen } from '@testing-library/react'
+import userEvent from '@testing-library/user-event'
+import { it, expect } from 'vitest'
+import Stage1 from '../components/Stage1.jsx'
+import Stage2 from '../components/Stage2.jsx'
+import Stage3 from '../components/Stage3.jsx'
+
+const TRUNCATED = /truncated at max_tokens/
+
+it('flags truncated Stage 1 responses per model', async () => {
+  const user = userEvent.setup()
+  render(
+    <Stage1
+      responses={[
+        { model: 'openai/gpt-x', response: 'cut off', truncated: true },
+        { model: 'x-ai/grok-z', response: 'complete' },
+      ]}
+    />
+  )
+  expect(screen.getByText(TRUNCATED)).toBeInTheDocument()
+
+  await user.click(screen.getByRole('button', { name: 'grok-z' }))
+  expect(screen.queryByText(TRUNCATED)).not.toBeInTheDocument()
+})
+
+it('flags a truncated Stage 2 ranking', () => {
+  render(
+    <Stage2
+      rankings={[{ model: 'openai/gpt-x', ranking: 'Response A is', parsed_ranking: [], truncated: true }]}
+      labelToModel={{ 'Response A': 'x-ai/grok-z' }}
+    />
+  )
+  expect(screen.getByText(TRUNCATED)).toBeInTheDocument()
+})
+
+it('flags a truncated final answer only when it was cut off', () => {
+  const { rerender } = render(
+    <Stage3 finalResponse={{ model: 'openai/gpt-x', response: 'partial', truncated: true }} />
+  )
+  expect(screen.getByText(TRUNCATED)).toBeInTheDocument()
+
+  rerender(<Stage3 finalResponse={{ model: 'openai/gpt-x', response: 'whole' }} />)
+  expect(screen.queryByText(TRUNCATED)).not.toBeInTheDocument()
+})
@@ -156,6 +156,50 @@ export const api = {
     }
   },
 
+  /**
+   * Continue a paused step-mode message and receive streaming updates.
+   * Emits per-model progress and token deltas for Stage 2 and Stage 3.
+   * @param {string} conversationId - The conversation ID
+   * @param {number} messageIndex - Index of the paused assistant message
+   * @param {function} onEvent - Callback function for each event: (eventType, data) => void
+   * @returns {Promise<void>}
+   */
+  async continueStageStream(conversationId, messageIndex, onEvent) {
+    const response = await fetch(
+      `${API_BASE}/api/conversations/${conversationId}/messages/${messageIndex}/continue/stream`,
+      { method: 'POST' }
+    );
+    if (!response.ok) {
+      throw new Error('Failed to continue to next stage');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    // Token deltas are small and frequent, so events may straddle chunk boundaries
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+
+      for (const line of lines) {
+        if (line.startsWith('data: ')) {
+          const data = line.slice(6);
+          try {
+            const event = JSON.parse(data);
+            onEvent(event.type, event);
+          } catch (e) {
+            console.error('Failed to parse SSE event:', e);
+          }
+        }
+      }
+    }
+  },
+
   async continueStage(conversationId, messageIndex) {
     const response = await fetch(
       `${API_BASE}/api/conversations/${conversationId}/messages/${messageIndex}/continue`,
@@ -316,6 +316,13 @@ export default function ChatInterface({
                     <div className="assistant-message">
                       <div className="message-label">LLM Council</div>
 
+                      {msg.queuePosition > 0 && (
+                        <div className="stage-loading">
+                          <div className="spinner"></div>
+                          <span>Server busy: waiting for a free council slot (position {msg.queuePosition})...</span>
+                        </div>
+                      )}
+
                       {/* Stage 1 */}
                       {msg.loading?.stage1 && (
                         <div className="stage-loading">
@@ -353,7 +360,8 @@ export default function ChatInterface({
                       {(() => {
                         const canContinueStage2 = msg.stage1 && !msg.stage2;
                         const canContinueStage3 = msg.stage2 && !msg.stage3;
-                        const canContinue = (msg.paused || executionMode === 'step') && (canContinueStage2 || canContinueStage3);
+                        const isStreamingStage = msg.loading?.stage2 || msg.loading?.stage3;
+                        const canContinue = !isStreamingStage && (msg.paused || executionMode === 'step') && (canContinueStage2 || canContinueStage3);
                         if (!canContinue) return null;
                         const nextLabel = canContinueStage2 ? 'Continue to Stage 2' : 'Continue to Stage 3';
                         return (
@@ -26,7 +26,10 @@ export default function Stage1({ responses, onRerun, disabled = false, loadingMo
       </div>
 
       <div className="tab-content">
-        <div className="model-name">{responses[activeTab].model}</div>
+        <div className="model-name">
+          {responses[activeTab].model}
+          {responses[activeTab].truncated && ' (truncated at max_tokens)'}
+        </div>
         <div className="response-text markdown-content">
           <ReactMarkdown>{responses[activeTab].response}</ReactMarkdown>
         </div>
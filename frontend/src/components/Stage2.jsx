@@ -2,14 +2,19 @@ import { useState } from 'react';
 import ReactMarkdown from 'react-markdown';
 import './Stage2.css';
 
+// A label stands for one model, or for a list of models whose answers were near-identical
+function labelName(model) {
+  const models = Array.isArray(model) ? model : [model];
+  return models.map((m) => m.split('/')[1] || m).join(' = ');
+}
+
 function deAnonymizeText(text, labelToModel) {
   if (!labelToModel) return text;
 
   let result = text;
   // Replace each "Response X" with the actual model name
   Object.entries(labelToModel).forEach(([label, model]) => {
-    const modelShortName = model.split('/')[1] || model;
-    result = result.replace(new RegExp(label, 'g'), `**${modelShortName}**`);
+    result = result.replace(new RegExp(label, 'g'), `**${labelName(model)}**`);
   });
   return result;
 }
@@ -47,6 +52,7 @@ export default function Stage2({ rankings, labelToModel, aggregateRankings, onRe
       <div className="tab-content">
         <div className="ranking-model">
           {rankings[activeTab].model}
+          {rankings[activeTab].truncated && ' (truncated at max_tokens)'}
         </div>
         <div className="ranking-content markdown-content">
           <ReactMarkdown>
@@ -80,7 +86,7 @@ export default function Stage2({ rankings, labelToModel, aggregateRankings, onRe
                 {rankings[activeTab].parsed_ranking.map((label, i) => (
                   <li key={i}>
                     {labelToModel && labelToModel[label]
-                      ? labelToModel[label].split('/')[1] || labelToModel[label]
+                      ? labelName(labelToModel[label])
                       : label}
                   </li>
                 ))}
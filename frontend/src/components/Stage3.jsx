@@ -12,6 +12,7 @@ export default function Stage3({ finalResponse, onRerun, disabled = false, loadi
       <div className="final-response">
         <div className="chairman-label">
           Chairman: {finalResponse.model.split('/')[1] || finalResponse.model}
+          {finalResponse.truncated && ' (truncated at max_tokens)'}
         </div>
         <div className="final-text markdown-content">
           <ReactMarkdown>{finalResponse.response}</ReactMarkdown>
@@ -0,0 +1,11 @@
+"""Shared test setup: keep every file the backend writes in a temporary directory."""
+
+import os
+import tempfile
+
+# Paths in backend.config are read once at import, so set them before any test imports backend
+_DATA_DIR = tempfile.mkdtemp(prefix="llm-council-tests-")
+os.environ["DATA_DIR"] = os.path.join(_DATA_DIR, "conversations")
+os.environ["MODEL_CATALOG_PATH"] = os.path.join(_DATA_DIR, "models.json")
+os.environ["TRACE_FILE"] = os.path.join(_DATA_DIR, "traces.jsonl")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
@@ -0,0 +1,64 @@
+"""Near-duplicate clustering of Stage 1 responses."""
+
+from backend.council import _ranked_groups, plain_label_to_model
+from backend.dedup import cluster, similarity, sketch
+
+
+def _words(start: int, stop: int) -> str:
+    return " ".join(f"w{i}" for i in range(start, stop))
+
+
+def test_identical_and_distinct_texts():
+    a = _words(0, 100)
+    b = _words(500, 600)
+    assert cluster([a, b, a], 0.8) == [[0, 2], [1]]
+    assert similarity(sketch(a), sketch(a)) == 1.0
+    assert similarity(sketch(a), sketch(b)) == 0.0
+
+
+def test_near_duplicates_ignore_case_and_punctuation():
+    a = _words(0, 200)
+    b = a.upper().replace(" ", ", ")
+    c = a.replace("w100", "changed")
+    assert cluster([a, b, c], 0.8) == [[0, 1, 2]]
+
+
+def test_threshold():
+    # 80 of 100 words shared: 78 common shingles out of 118
+    a = _words(0, 100)
+    b = _words(20, 120)
+    assert cluster([a, b], 0.6) == [[0, 1]]
+    assert cluster([a, b], 0.7) == [[0], [1]]
+
+
+def test_clusters_do_not_chain():
+    # b resembles both a and c, but c does not resemble a (the cluster's leader)
+    a = _words(0, 100)
+    b = _words(20, 120)
+    c = _words(40, 140)
+    assert cluster([a, b, c], 0.6) == [[0, 1], [2]]
+
+
+def test_empty_texts_are_never_grouped():
+    assert cluster(["", "", "  ", "same text here", "same text here"], 0.8) == [[0], [1], [2], [3, 4]]
+
+
+def test_long_texts_use_the_sketch_estimate():
+    a = _words(0, 2000)
+    b = _words(0, 1900) + " " + _words(5000, 5100)
+    estimate = similarity(sketch(a), sketch(b))
+    exact = 1898 / 2098
+    assert abs(estimate - exact) < 0.1
+    assert cluster([a, b], 0.8) == [[0, 1]]
+
+
+def test_rerun_ranker_keeps_earlier_labels():
+    stage1 = [
+        {"model": "x/m1", "response": _words(0, 100)},
+        {"model": "x/m2", "response": _words(0, 100)},
+        {"model": "x/m3", "response": _words(500, 600)},
+    ]
+    _, members = _ranked_groups(stage1, plain_label_to_model(stage1))
+    assert members == [["x/m1"], ["x/m2"], ["x/m3"]]
+    _, members = _ranked_groups(stage1, {"Response A": ["x/m1", "x/m2"], "Response B": "x/m3"})
+    assert members == [["x/m1", "x/m2"], ["x/m3"]]
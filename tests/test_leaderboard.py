@@ -0,0 +1,135 @@
+"""Incremental leaderboard totals against a from-scratch recompute."""
+
+import random
+
+import pytest
+
+from backend import council, leaderboard
+
+MODELS = ["a/one", "b/two", "c/three", "d/four", "e/five"]
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """Point the leaderboard at an empty database; call it again for another one."""
+    paths = iter(range(100))
+
+    def use_new_db():
+        if leaderboard._CONN is not None:
+            leaderboard._CONN.close()
+        monkeypatch.setattr(leaderboard, "_CONN", None)
+        monkeypatch.setattr(leaderboard, "LEADERBOARD_DB_PATH", str(tmp_path / f"leaderboard{next(paths)}.sqlite3"))
+
+    use_new_db()
+    yield use_new_db
+    if leaderboard._CONN is not None:
+        leaderboard._CONN.close()
+
+
+def _assistant_message(rng: random.Random) -> dict:
+    models = rng.sample(MODELS, rng.randint(2, len(MODELS)))
+    labels = [f"Response {chr(ord('A') + i)}" for i in range(len(models))]
+    label_to_model = dict(zip(labels, models))
+    if len(models) > 2 and rng.random() < 0.3:
+        # Near-duplicate answers share one label
+        label_to_model[labels[0]] = [models[0], label_to_model.pop(labels[-1])]
+        labels.pop()
+    stage2 = []
+    for ranker in models:
+        order = rng.sample(labels, rng.randint(1, len(labels)))
+        stage2.append({"model": ranker, "ranking": "", "parsed_ranking": order})
+    return {
+        "role": "assistant",
+        "stage1": [{"model": m, "response": "answer"} for m in models],
+        "stage2": stage2,
+        "stage3": {"model": "chair/man", "response": "final"},
+        "metadata": {"label_to_model": label_to_model},
+    }
+
+
+def _conversation(conversation_id: str, rng: random.Random) -> dict:
+    messages = []
+    for _ in range(rng.randint(1, 4)):
+        messages.append({"role": "user", "content": "question"})
+        messages.append(_assistant_message(rng))
+    return {"id": conversation_id, "revision": 1, "messages": messages}
+
+
+def _totals():
+    conn = leaderboard._connect()
+    return (
+        sorted(conn.execute("SELECT model, rank_sum, rankings, first_places FROM model_stats")),
+        sorted(conn.execute("SELECT winner, loser, wins FROM pairwise")),
+        conn.execute("SELECT COUNT(*) FROM contributions").fetchone()[0],
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_updates_match_recompute(fresh_db, seed):
+    rng = random.Random(seed)
+    conversations = {f"c{i}": _conversation(f"c{i}", rng) for i in range(6)}
+    for conversation in conversations.values():
+        leaderboard.record_conversation(conversation)
+
+    for _ in range(10):
+        conversation = conversations[rng.choice(sorted(conversations))]
+        conversation["revision"] += 1
+        messages = conversation["messages"]
+        action = rng.random() if messages else 0.6
+        if action < 0.25:
+            # Stage 2 rerun: new rankings of the same responses
+            message = messages[rng.randrange(1, len(messages), 2)]
+            labels = list(message["metadata"]["label_to_model"])
+            for entry in message["stage2"]:
+                entry["parsed_ranking"] = rng.sample(labels, rng.randint(1, len(labels)))
+        elif action < 0.5:
+            # Full rerun
+            messages[rng.randrange(1, len(messages), 2)] = _assistant_message(rng)
+        elif action < 0.7:
+            messages.extend([{"role": "user", "content": "more"}, _assistant_message(rng)])
+        elif action < 0.8:
+            # Stage 2 cleared
+            messages[1]["stage2"] = []
+        else:
+            del messages[-2:]
+        leaderboard.record_conversation(conversation)
+
+    removed = rng.choice(sorted(conversations))
+    leaderboard.remove_conversation(removed)
+    del conversations[removed]
+    # Recording an unchanged conversation again is a no-op
+    leaderboard.record_conversation(next(iter(conversations.values())))
+
+    incremental = _totals()
+    standings = leaderboard.get_leaderboard(include_pairwise=True)
+
+    fresh_db()
+    for conversation in conversations.values():
+        leaderboard.record_conversation(conversation)
+    assert _totals() == incremental
+    assert leaderboard.get_leaderboard(include_pairwise=True) == standings
+
+
+def test_message_without_stored_labels_uses_plain_stage1_order(fresh_db, monkeypatch):
+    monkeypatch.setattr(council, "STAGE1_DEDUP", True)
+    # Stored before label_to_model metadata existed: one label per response,
+    # even though m1 and m2 answered identically
+    message = {
+        "role": "assistant",
+        "stage1": [
+            {"model": "x/m1", "response": "The same answer, word for word, from both models."},
+            {"model": "x/m2", "response": "The same answer, word for word, from both models."},
+            {"model": "x/m3", "response": "A different answer."},
+        ],
+        "stage2": [{"model": "x/m1", "ranking": "", "parsed_ranking": ["Response C", "Response A", "Response B"]}],
+        "stage3": {"model": "chair/man", "response": "final"},
+    }
+    assert leaderboard.message_contribution(message)["ranks"] == {
+        "x/m3": [1, 1, 1],
+        "x/m1": [2, 1, 0],
+        "x/m2": [3, 1, 0],
+    }
+
+    leaderboard.record_conversation({"id": "old", "revision": 1, "messages": [{"role": "user", "content": "q"}, message]})
+    standings = leaderboard.get_leaderboard()["models"]
+    assert [row["model"] for row in standings] == ["x/m3", "x/m1", "x/m2"]
@@ -0,0 +1,46 @@
+"""Instrumentation of upstream calls."""
+
+import asyncio
+
+import pytest
+
+from backend import metrics, model_stats, openrouter
+
+
+def _cancel_call(model: str, stage: str = "stage1"):
+    """Start an instrumented call, cancel it while it waits on the upstream."""
+    started = asyncio.Event()
+
+    async def call():
+        with openrouter._record_call(model, [{"role": "user", "content": "hi"}], stream=False, stage=stage):
+            started.set()
+            await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.create_task(call())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+
+def test_cancelled_call_is_not_counted_as_success():
+    _cancel_call("test/cancelled")
+
+    assert metrics.LLM_REQUESTS.value(model="test/cancelled", status="cancelled") == 1
+    assert metrics.LLM_REQUESTS.value(model="test/cancelled", status="200") == 0
+    assert metrics.LLM_IN_FLIGHT.value(model="test/cancelled") == 0
+
+
+def test_cancelled_call_is_not_recorded_in_model_stats(monkeypatch):
+    monkeypatch.setattr(model_stats, "_ENABLED", True)
+    _cancel_call("test/stats-cancelled")
+    assert "test/stats-cancelled" not in model_stats.get_stats("stage1")
+
+    # Failed calls are still recorded
+    with pytest.raises(RuntimeError):
+        with openrouter._record_call("test/stats-failed", [], stream=False, stage="stage1"):
+            raise RuntimeError("upstream broke")
+    assert model_stats.get_stats("stage1")["test/stats-failed"]["failure_rate"] == 1.0
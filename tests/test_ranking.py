@@ -0,0 +1,133 @@
+"""Sparse Stage 2 designs and rank aggregation."""
+
+import itertools
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from backend.ranking import bradley_terry, pairwise_wins, sparse_design, top_k_settled
+
+
+@pytest.mark.parametrize("n_items,n_rankers,subset_size", [(8, 8, 4), (12, 12, 4), (10, 6, 3), (24, 24, 4)])
+def test_sparse_design_is_balanced(n_items, n_rankers, subset_size):
+    rankers = [f"r{i}" for i in range(n_rankers)]
+    own_item = {ranker: i for i, ranker in enumerate(rankers)}
+    design = sparse_design(n_items, rankers, subset_size, own_item, seed="q")
+
+    assert design == sparse_design(n_items, rankers, subset_size, own_item, seed="q")
+    appearances = Counter()
+    neighbours = {i: set() for i in range(n_items)}
+    for ranker, block in design.items():
+        assert len(block) == subset_size
+        assert block == sorted(set(block))
+        assert own_item[ranker] not in block
+        appearances.update(block)
+        for a, b in itertools.combinations(block, 2):
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+
+    counts = [appearances[i] for i in range(n_items)]
+    assert max(counts) - min(counts) <= 1
+    # Every item is linked to every other through comparisons, so one scale fits them all
+    seen, frontier = {0}, [0]
+    while frontier:
+        for other in neighbours[frontier.pop()] - seen:
+            seen.add(other)
+            frontier.append(other)
+    assert seen == set(range(n_items))
+
+
+def test_sparse_design_small_council():
+    # Fewer other items than the subset size: rankers see everything, their own item included
+    design = sparse_design(3, ["a", "b", "c"], 4, {"a": 0, "b": 1, "c": 2})
+    assert all(block == [0, 1, 2] for block in design.values())
+
+
+def _plackett_luce(items, strength, rng):
+    remaining = list(items)
+    order = []
+    while remaining:
+        pick = rng.choices(remaining, weights=[strength[i] for i in remaining])[0]
+        order.append(pick)
+        remaining.remove(pick)
+    return order
+
+
+def test_bradley_terry_recovers_order():
+    rng = random.Random(7)
+    items = [f"m{i}" for i in range(8)]
+    strength = {item: 2.0 ** -i for i, item in enumerate(items)}
+    design = sparse_design(len(items), [f"r{i}" for i in range(200)], 4, seed="bt")
+    orders = [_plackett_luce([items[i] for i in block], strength, rng) for block in design.values()]
+
+    fitted = bradley_terry(pairwise_wins(orders), items)
+
+    assert sorted(items, key=lambda i: -fitted[i]) == items
+    # Normalized to a geometric mean of 1
+    assert sum(math.log(v) for v in fitted.values()) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_bradley_terry_undefeated_item_stays_finite():
+    fitted = bradley_terry({("a", "b"): 5, ("b", "c"): 5}, ["a", "b", "c"])
+    assert fitted["a"] > fitted["b"] > fitted["c"] > 0
+    assert math.isfinite(fitted["a"])
+
+
+def _settled_by_brute_force(orders, items, remaining, k):
+    """Whether every way the outstanding rankings could turn out (partial ones too) leaves the current top k in place."""
+    if remaining == 0:
+        return True
+
+    def averages(all_orders):
+        totals = {}
+        for order in all_orders:
+            for position, item in enumerate(order, start=1):
+                total = totals.setdefault(item, [0, 0])
+                total[0] += position
+                total[1] += 1
+        return {item: s / c for item, (s, c) in totals.items()}
+
+    current = averages(orders)
+    leaders = sorted(current, key=lambda i: (current[i], items.index(i)))[:min(k, len(items) - 1)]
+    # Any ordered selection of the items, as parsing a ranking's text may leave some out
+    possible = [order for size in range(1, len(items) + 1) for order in itertools.permutations(items, size)]
+    for count in range(remaining + 1):
+        for extra in itertools.combinations_with_replacement(possible, count):
+            final = averages(list(orders) + list(extra))
+            for i, leader in enumerate(leaders):
+                if any(final[other] <= final[leader] for other in final if other not in leaders[:i + 1]):
+                    return False
+    return True
+
+
+def test_top_k_settled_matches_brute_force():
+    rng = random.Random(3)
+    agreed = 0
+    for _ in range(400):
+        items = [f"m{i}" for i in range(rng.randint(2, 4))]
+        orders = [rng.sample(items, rng.randint(1, len(items))) for _ in range(rng.randint(0, 4))]
+        remaining = rng.randint(0, 2)
+        k = rng.randint(1, 2)
+        settled = top_k_settled(orders, items, remaining, k)
+        if settled and remaining:
+            agreed += 1
+        if settled:
+            # Never settled early: no completion may change the top k
+            assert _settled_by_brute_force(orders, items, remaining, k), (orders, remaining, k)
+    assert agreed > 10
+
+
+def test_top_k_settled_clear_cases():
+    items = ["a", "b", "c"]
+    assert top_k_settled([["a", "b", "c"]] * 5, items, 1, 1)
+    assert not top_k_settled([["a", "b", "c"]], items, 1, 1)
+    assert not top_k_settled([["a", "b", "c"], ["b", "a", "c"]], items, 1, 1)
+    assert top_k_settled([["a", "b", "c"], ["b", "a", "c"]], items, 0, 1)
+    assert top_k_settled([["a", "b", "c"]], items, 0, 2)
+    # "c" was never ranked: a further ranking could put it first
+    assert not top_k_settled([["a", "b"]] * 10, items, 1, 1)
+    # Partial rankings: "a" leads every one it appears in
+    assert top_k_settled([["a"], ["a"], ["a", "b", "c"], ["a", "b", "c"]], items, 1, 1)
+    assert not top_k_settled([["a"], ["b"], ["a", "b", "c"]], items, 1, 1)
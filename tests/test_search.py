@@ -0,0 +1,30 @@
+"""Full-text search over stored conversations."""
+
+import pytest
+
+from backend import search
+
+
+@pytest.fixture
+def fresh_index(tmp_path, monkeypatch):
+    """Point search at an empty index."""
+    monkeypatch.setattr(search, "_CONN", None)
+    monkeypatch.setattr(search, "SEARCH_DB_PATH", str(tmp_path / "search.sqlite3"))
+    yield
+    if search._CONN is not None:
+        search._CONN.close()
+
+
+def test_snippets_escape_stored_text(fresh_index):
+    search.index_conversation({
+        "id": "c1",
+        "title": "Markup",
+        "messages": [{"role": "user", "content": 'Why does <script>alert("x")</script> run & mangle output?'}],
+    })
+
+    results, more = search.search("mangle")
+    assert not more
+    snippet = results[0]["snippet"]
+    assert "<script>" not in snippet
+    assert "&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt;" in snippet
+    assert "&amp; <mark>mangle</mark> output" in snippet
@@ -0,0 +1,83 @@
+"""Byte layouts of stored conversations and sliced message reads."""
+
+import json
+import uuid
+
+import pytest
+
+from backend import storage
+from backend.serialization import decode_conversation, encode_conversation_layout, loads
+
+
+def _conversation(n_messages: int) -> dict:
+    messages = []
+    for i in range(n_messages):
+        if i % 2 == 0:
+            messages.append({"role": "user", "content": f"Question {i} with \"quotes\", commas, and ünïcödé"})
+            continue
+        messages.append({
+            "role": "assistant",
+            # Long enough to be compressed when a codec is set
+            "stage1": [{"model": "a/m1", "response": f"answer {i} " * 200}, {"model": "b/m2", "response": "]}{"}],
+            "stage2": [{"model": "a/m1", "ranking": "FINAL RANKING:\n1. Response B", "parsed_ranking": ["Response B"]}],
+            "stage3": {"model": "c/chair", "response": f"final {i}"},
+        })
+    return {
+        "id": str(uuid.uuid4()),
+        "created_at": "2024-01-01T00:00:00",
+        "title": "Layout",
+        "messages": messages,
+    }
+
+
+@pytest.mark.parametrize("codec", ["none", "gzip"])
+@pytest.mark.parametrize("n_messages", [0, 1, 5])
+def test_layout_offsets_round_trip(codec, n_messages):
+    conversation = _conversation(n_messages)
+    data, layout = encode_conversation_layout(conversation, codec=codec)
+
+    assert decode_conversation(data) == conversation
+    assert len(layout.messages) == len(conversation["messages"])
+    header = loads(data[:layout.header_end] + b"}")
+    assert header == {k: v for k, v in conversation.items() if k != "messages"}
+    for (start, end), message in zip(layout.messages, conversation["messages"]):
+        assert decode_conversation(b'{"messages":[' + data[start:end] + b"]}")["messages"] == [message]
+
+
+def _assert_slices_match_full_parse(conversation_id: str):
+    full = storage.get_conversation(conversation_id)
+    total = len(full["messages"])
+    for start in range(total + 2):
+        for stop in [None] + list(range(total + 2)):
+            window = storage.get_conversation_slice(conversation_id, start, stop)
+            assert window["messages"] == full["messages"][start:stop], (start, stop)
+            assert window["message_count"] == total
+            assert {k: v for k, v in window.items() if k not in ("messages", "message_count")} == \
+                {k: v for k, v in full.items() if k != "messages"}
+
+
+def test_read_slice_matches_full_parse():
+    conversation = _conversation(8)
+    storage.save_conversation(conversation)
+    cid = conversation["id"]
+
+    # Sliced through the layout recorded on write
+    assert storage._current_layout(cid, storage.get_conversation_path(cid)) is not None
+    _assert_slices_match_full_parse(cid)
+
+    # Written by another process: parsed in full once, then sliced
+    storage._LAYOUTS.pop(cid)
+    _assert_slices_match_full_parse(cid)
+    assert storage._current_layout(cid, storage.get_conversation_path(cid)) is not None
+
+
+def test_read_slice_old_format_file():
+    conversation = _conversation(6)
+    storage.ensure_data_dir()
+    path = storage.get_conversation_path(conversation["id"])
+    with open(path, "w") as f:
+        json.dump(conversation, f, indent=2)
+
+    _assert_slices_match_full_parse(conversation["id"])
+    assert conversation["id"] in storage._UNSLICEABLE
+    assert storage._current_layout(conversation["id"], path) is None
@@ -0,0 +1,65 @@
+"""Council event streams handed to responses and sockets."""
+
+import asyncio
+
+from backend import generation, main
+
+CONVERSATION = {"id": "c1", "generation": {"default": {"temperature": 0.25}}}
+
+
+def test_stream_closed_from_another_task():
+    produced = []
+    closed = []
+
+    async def events():
+        try:
+            for name in ("first", "second"):
+                produced.append(name)
+                yield {"type": name, "settings": generation.params("stage1", "x/m1")}
+            await asyncio.sleep(10)
+        finally:
+            closed.append(True)
+
+    async def run():
+        stream = main._council_stream(CONVERSATION, events())
+        # Iterated by one task (a response body), closed by another
+        first = await asyncio.create_task(stream.__anext__())
+        await stream.aclose()
+        return first
+
+    first = asyncio.run(run())
+    assert first["settings"]["temperature"] == 0.25
+    assert closed == [True]
+    # Events are produced as they are asked for
+    assert produced == ["first"]
+    assert generation.params("stage1", "x/m1").get("temperature") != 0.25
+
+
+def test_stream_cancelled_while_producing():
+    closed = []
+
+    async def events():
+        try:
+            yield {"type": "first"}
+            await asyncio.sleep(10)
+            yield {"type": "never"}
+        finally:
+            closed.append(True)
+
+    async def run():
+        stream = main._council_stream(CONVERSATION, events())
+        seen = []
+
+        async def pump():
+            async for event in stream:
+                seen.append(event)
+
+        task = asyncio.create_task(pump())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await stream.aclose()
+        return seen
+
+    assert asyncio.run(run()) == [{"type": "first"}]
+    assert closed == [True]